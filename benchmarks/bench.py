@@ -0,0 +1,197 @@
+"""PackageManager 基准测试
+
+在临时目录中生成合成的游戏目录与资源包，分别计时 install、get_package_list、
+delete_package 和（有图形环境时）refresh_package_list，结果写入 JSON 文件。
+
+用法:
+    python benchmarks/bench.py --packages 50 --files 200 --file-size 4096 --output bench.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from hspm.manager import PackageManager  # noqa: E402
+
+from synth import build_metadata, build_sources  # noqa: E402
+
+
+def _stats(samples):
+    return {
+        "count": len(samples),
+        "total": sum(samples),
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "max": max(samples),
+    }
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def _isolated_manager(workdir):
+    """使用独立配置目录的 PackageManager，避免读写用户配置与缓存"""
+    return PackageManager(config_dir=Path(workdir) / "config")
+
+
+def bench_install(manager, sources, app_root, meta_dir, args):
+    samples = []
+    for src, name, sid, kind in sources:
+        elapsed, _ = _timed(
+            manager.install,
+            src,
+            name,
+            sid,
+            kind,
+            app_root,
+            meta_dir,
+            conflict_func=lambda *a: True,
+            workers=args.workers,
+            hash_mode=args.hash,
+            link_mode=args.link_mode,
+        )
+        samples.append(elapsed)
+    return _stats(samples)
+
+
+def bench_package_list(meta_dir, repeats, workdir):
+    cold, warm = [], []
+    for _ in range(repeats):
+        # 冷启动：新的 PackageManager 且删除持久化缓存
+        shutil.rmtree(Path(meta_dir) / ".hspm", ignore_errors=True)
+        manager = _isolated_manager(workdir)
+        elapsed, packages = _timed(manager.get_package_list, meta_dir)
+        cold.append(elapsed)
+        elapsed, _ = _timed(manager.get_package_list, meta_dir)
+        warm.append(elapsed)
+    return {"cold": _stats(cold), "warm": _stats(warm), "packages": len(packages)}
+
+
+def bench_delete(manager, meta_dir, app_root, count):
+    packages = sorted(manager.get_package_list(meta_dir), key=lambda p: p["meta_path"])
+    samples = []
+    for pkg in packages[:count]:
+        elapsed, (success, msg) = _timed(manager.delete_package, pkg["meta_path"], app_root)
+        if not success:
+            raise RuntimeError(msg)
+        samples.append(elapsed)
+    return _stats(samples) if samples else None
+
+
+def bench_refresh_list(manager, meta_dir, app_root, repeats):
+    """在有图形环境时计时 GUI 列表刷新，否则返回跳过原因
+
+    界面使用传入的独立 PackageManager，不读取用户配置。
+    """
+    try:
+        import tkinter as tk
+
+        root = tk.Tk()
+    except Exception as e:
+        return {"skipped": f"无可用的图形环境: {e}"}
+    try:
+        from hspm.gui import AddPackageGUI
+
+        root.withdraw()
+        app = AddPackageGUI(root, manager=manager)
+        app.meta_dir.set(str(meta_dir))
+        app.app_root.set(str(app_root))
+        samples = []
+        for _ in range(repeats):
+            elapsed, _ = _timed(app.refresh_package_list)
+            root.update_idletasks()
+            samples.append(elapsed)
+        return _stats(samples)
+    finally:
+        root.destroy()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PackageManager 基准测试")
+    parser.add_argument("--packages", type=int, default=20, help="安装的资源包数量")
+    parser.add_argument("--files", type=int, default=100, help="每个资源包的文件数")
+    parser.add_argument("--file-size", type=int, default=4096, help="平均文件大小 (字节)")
+    parser.add_argument(
+        "--meta-packages",
+        type=int,
+        default=0,
+        help="额外生成的仅元数据资源包数量，用于模拟大型资源库",
+    )
+    parser.add_argument("--deletes", type=int, default=5, help="计时卸载的资源包数量")
+    parser.add_argument("--repeats", type=int, default=3, help="列表操作的重复次数")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--hash", action="store_true")
+    parser.add_argument("--link-mode", default="copy")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="工作目录 (默认使用临时目录并在结束后删除)")
+    parser.add_argument("--output", default="bench_results.json", help="结果输出文件")
+    args = parser.parse_args(argv)
+
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="hspm-bench-"))
+    keep = bool(args.workdir)
+    try:
+        src_root = workdir / "sources"
+        app_root = workdir / "game"
+        meta_dir = workdir / "meta"
+        app_root.mkdir(parents=True, exist_ok=True)
+
+        elapsed, sources = _timed(
+            build_sources, src_root, args.packages, args.files, args.file_size, args.seed
+        )
+        generate = {"sources": elapsed}
+        if args.meta_packages:
+            generate["metadata"], _ = _timed(
+                build_metadata, meta_dir, args.meta_packages, args.files, args.seed
+            )
+
+        manager = _isolated_manager(workdir)
+        # 屏蔽 PackageManager 的调试输出，避免打印耗时计入结果
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            results = {
+                "install": bench_install(manager, sources, app_root, meta_dir, args),
+                "get_package_list": bench_package_list(meta_dir, args.repeats, workdir),
+                "refresh_package_list": bench_refresh_list(
+                    _isolated_manager(workdir), meta_dir, app_root, args.repeats
+                ),
+                "delete_package": bench_delete(
+                    _isolated_manager(workdir), meta_dir, app_root, args.deletes
+                ),
+            }
+
+        report = {
+            "timestamp": datetime.now().isoformat(),
+            "version": manager.version,
+            "environment": {
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+            },
+            "params": {k: v for k, v in vars(args).items() if k not in ("output", "workdir")},
+            "generate": generate,
+            "results": results,
+        }
+        Path(args.output).write_text(
+            json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    finally:
+        if not keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
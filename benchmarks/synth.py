@@ -0,0 +1,126 @@
+"""合成 HS2 游戏目录与资源包，用于基准测试
+
+生成的资源包覆盖 get_dest_path 的全部映射规则：
+人物卡 (UserData/chara/female + mods)、DHH 光影包 (DHH_Data) 和普通 MOD (mods + abdata)。
+"""
+
+import json
+import os
+import random
+from datetime import datetime
+from pathlib import Path
+
+from hspm.models import PackageStatus, PackageType
+
+# 人物卡 / DHH / 其他 的比例
+KIND_WEIGHTS = (
+    (PackageType.CHARACTER.value, 6),
+    (PackageType.DHH.value, 1),
+    (PackageType.OTHER.value, 3),
+)
+
+
+def _pick_kind(rng):
+    total = sum(w for _, w in KIND_WEIGHTS)
+    r = rng.uniform(0, total)
+    for kind, weight in KIND_WEIGHTS:
+        r -= weight
+        if r <= 0:
+            return kind
+    return KIND_WEIGHTS[-1][0]
+
+
+def _relpaths(kind, index, files, rng):
+    """按资源包类型生成源目录中的相对路径"""
+    paths = []
+    if kind == PackageType.CHARACTER.value:
+        paths.append(Path("UserData", "chara", "female", f"card_{index}.png"))
+        for i in range(files - 1):
+            paths.append(Path("mods", f"cloth_{i % 8}", f"item_{i}.zipmod"))
+    elif kind == PackageType.DHH.value:
+        for i in range(files):
+            sub = ("Shaders", "Textures", "Presets", "Lut")[i % 4]
+            paths.append(Path("DHH_Data", sub, f"d{i // 200}", f"asset_{i}.bin"))
+    else:
+        for i in range(files):
+            if rng.random() < 0.3:
+                paths.append(Path("abdata", "studio", f"pkg_{index}", f"bundle_{i}.unity3d"))
+            else:
+                paths.append(Path("mods", f"group_{i % 16}", f"mod_{i}.zipmod"))
+    return paths
+
+
+def build_sources(root, packages, files, file_size, seed=0):
+    """生成资源包源目录，返回 [(源目录, 名称, SID, 类型)]"""
+    rng = random.Random(seed)
+    root = Path(root)
+    payload = os.urandom(max(int(file_size * 1.5), 1))
+    result = []
+    for index in range(packages):
+        kind = _pick_kind(rng)
+        if kind == PackageType.CHARACTER.value:
+            name = f"角色{index}"
+            sid = f"HS2ChaF_{20250000000000000 + index}"
+            folder = f"{name}.{sid}"
+        elif kind == PackageType.DHH.value:
+            name = f"DHH光影{index}"
+            sid = f"DHH_{index:06d}"
+            folder = name
+        else:
+            name = f"Mod{index}"
+            sid = f"Other_{index:06d}"
+            folder = name
+        src = root / folder
+        for relpath in _relpaths(kind, index, files, rng):
+            path = src / relpath
+            path.parent.mkdir(parents=True, exist_ok=True)
+            size = max(1, int(file_size * rng.uniform(0.5, 1.5)))
+            path.write_bytes(payload[:size])
+        result.append((src, name, sid, kind))
+    return result
+
+
+def build_metadata(meta_dir, packages, files, seed=0):
+    """直接生成元数据文件（不产生物理文件），用于模拟大规模已安装资源库"""
+    rng = random.Random(seed)
+    meta_dir = Path(meta_dir)
+    meta_dir.mkdir(parents=True, exist_ok=True)
+    now = datetime.now()
+    for index in range(packages):
+        kind = _pick_kind(rng)
+        name = f"Meta{index}"
+        sid = f"HS2ChaF_{30250000000000000 + index}"
+        items = []
+        for relpath in _relpaths(kind, index, files, rng):
+            if relpath.parts[0] == "UserData":
+                dest = Path("UserData", "chara", "female", name, *relpath.parts[3:])
+            elif relpath.parts[0] == "mods":
+                dest = Path("mods", "MyMods", sid, *relpath.parts[1:])
+            elif relpath.parts[0] == "DHH_Data":
+                dest = Path("DHH_Data", name, *relpath.parts[1:])
+            else:
+                dest = relpath
+            items.append(
+                {
+                    "status": "copied",
+                    "source": str(relpath),
+                    "dest": str(dest),
+                    "mtime": int(now.timestamp() * 1_000_000),
+                    "timestamp": now.isoformat(),
+                }
+            )
+        dirs = sorted({str(Path(i["dest"]).parent) for i in items})
+        data = {
+            "name": name,
+            "sid": sid,
+            "type": kind,
+            "status": PackageStatus.NORMAL.value,
+            "source_path": None,
+            "created_at": now.isoformat(),
+            "news": [i["dest"] for i in items],
+            "dirs": [{"dest": d, "timestamp": now.isoformat()} for d in dirs],
+            "files": items,
+        }
+        (meta_dir / f"{name}.{sid}.json").write_text(
+            json.dumps(data, indent=4, ensure_ascii=False), encoding="utf-8"
+        )
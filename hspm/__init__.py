@@ -1,5 +1,13 @@
 from .models import PackageStatus, PackageType, GUIConfigKey
 from .manager import PackageManager
-from .gui import AddPackageGUI
 
 __all__ = ["PackageStatus", "PackageType", "GUIConfigKey", "PackageManager", "AddPackageGUI"]
+
+
+def __getattr__(name):
+    # 延迟导入 GUI，命令行等场景下不加载 tkinter / PIL
+    if name == "AddPackageGUI":
+        from .gui import AddPackageGUI
+
+        return AddPackageGUI
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
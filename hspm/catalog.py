@@ -0,0 +1,171 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+from .index import CACHE_DIR_NAME, scan_meta_files
+from .metafile import meta_stem, other_format_paths, read_meta
+from .models import PackageStatus
+from .trace import tracer
+
+CATALOG_FILE_NAME = "catalog.json"
+CATALOG_VERSION = 1
+
+
+def summarize_package(meta_name, data):
+    """从完整元数据中提取列表展示所需的摘要信息"""
+    parts = meta_stem(meta_name).split(".")
+    status = data.get("status")
+    if status is None:
+        status = (
+            PackageStatus.DRY_RUN.value
+            if data.get("dry_run", False)
+            else PackageStatus.NORMAL.value
+        )
+    return {
+        "name": data.get("name", parts[0] if len(parts) > 0 else "未知"),
+        "sid": data.get("sid", parts[1] if len(parts) > 1 else "未知"),
+        "type": data.get("type", "未知"),
+        "created_at": data.get("created_at", ""),
+        "file_count": len(data.get("news", [])),
+        "status": status,
+    }
+
+
+class PackageCatalog:
+    """资源包摘要缓存
+
+    摘要保存在 <meta_dir>/.hspm/catalog.json，按元数据文件的 mtime/size
+    判断是否需要重新解析，并维护名称与 SID 的内存查找表。
+    """
+
+    def __init__(self, meta_dir):
+        self.meta_dir = Path(meta_dir)
+        self.catalog_path = self.meta_dir / CACHE_DIR_NAME / CATALOG_FILE_NAME
+        self._lock = threading.RLock()
+        self._entries = {}  # 元数据文件名 -> {"mtime_ns", "size", "summary"}
+        self._by_name = {}
+        self._by_sid = {}
+        self._loaded = False
+
+    def _load(self):
+        self._loaded = True
+        if not self.catalog_path.exists():
+            return
+        try:
+            with open(self.catalog_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == CATALOG_VERSION:
+                self._entries = data.get("entries", {})
+        except Exception as e:
+            print(f"读取资源包缓存失败，将重新构建: {e}")
+            self._entries = {}
+
+    def _rebuild_lookups(self):
+        self._by_name = {}
+        self._by_sid = {}
+        for name in sorted(self._entries):
+            summary = self._entries[name]["summary"]
+            self._by_name.setdefault(summary["name"], name)
+            self._by_sid.setdefault(summary["sid"], name)
+
+    def refresh(self):
+        """与元数据目录同步，只重新解析 mtime/size 发生变化的文件"""
+        with self._lock:
+            first_load = not self._loaded
+            if first_load:
+                self._load()
+
+            signatures = scan_meta_files(self.meta_dir)
+            changed = False
+
+            for name in list(self._entries):
+                if name not in signatures:
+                    del self._entries[name]
+                    changed = True
+
+            for name, (mtime_ns, size) in signatures.items():
+                entry = self._entries.get(name)
+                if entry and entry["mtime_ns"] == mtime_ns and entry["size"] == size:
+                    continue
+                tracer.count("meta.parsed")
+                try:
+                    data = read_meta(self.meta_dir / name)
+                except Exception as e:
+                    print(f"读取元数据失败 {self.meta_dir / name}: {e}")
+                    self._entries.pop(name, None)
+                    continue
+                self._entries[name] = {
+                    "mtime_ns": mtime_ns,
+                    "size": size,
+                    "summary": summarize_package(name, data),
+                }
+                changed = True
+
+            if changed or first_load:
+                self._rebuild_lookups()
+            if changed:
+                self._save()
+
+    def update_package(self, meta_path, data):
+        """元数据写入后调用，直接用内存中的数据更新缓存"""
+        meta_path = Path(meta_path)
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            st = meta_path.stat()
+            for other in other_format_paths(meta_path):
+                self._entries.pop(other.name, None)
+            self._entries[meta_path.name] = {
+                "mtime_ns": st.st_mtime_ns,
+                "size": st.st_size,
+                "summary": summarize_package(meta_path.name, data),
+            }
+            self._rebuild_lookups()
+            self._save()
+
+    def remove_package(self, meta_path):
+        """元数据删除后调用"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if self._entries.pop(Path(meta_path).name, None) is not None:
+                self._rebuild_lookups()
+                self._save()
+
+    def packages(self):
+        """返回摘要列表（与 get_package_list 的格式一致）"""
+        with self._lock:
+            return [
+                dict(entry["summary"], meta_path=str(self.meta_dir / name))
+                for name, entry in self._entries.items()
+            ]
+
+    def _lookup(self, table, key):
+        with self._lock:
+            name = table.get(key)
+            if name is None:
+                return None
+            return dict(
+                self._entries[name]["summary"], meta_path=str(self.meta_dir / name)
+            )
+
+    def find_by_name(self, name):
+        return self._lookup(self._by_name, name)
+
+    def find_by_sid(self, sid):
+        return self._lookup(self._by_sid, sid)
+
+    def _save(self):
+        try:
+            self.catalog_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.catalog_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"version": CATALOG_VERSION, "entries": self._entries},
+                    f,
+                    ensure_ascii=False,
+                )
+            os.replace(tmp_path, self.catalog_path)
+        except Exception as e:
+            print(f"保存资源包缓存失败: {e}")
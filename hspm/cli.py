@@ -0,0 +1,589 @@
+"""命令行入口：在无图形界面的环境下安装、卸载和列出资源包
+
+该模块不会导入 tkinter 或 PIL。
+"""
+
+import argparse
+import contextlib
+import json
+import sys
+from pathlib import Path
+
+from .manager import PackageManager
+from .metafile import META_FORMATS, export_meta, is_meta_file
+from .models import PackageStatus, PackageType
+from .progress import format_size
+from .sources import source_stem
+
+# 退出码
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2
+EXIT_PARTIAL = 3  # 操作完成，但存在冲突、跳过或失败的文件
+
+TYPE_ALIASES = {
+    "character": PackageType.CHARACTER.value,
+    "dhh": PackageType.DHH.value,
+    "other": PackageType.OTHER.value,
+}
+
+CONFLICT_POLICIES = ("skip", "overwrite", "abort")
+
+
+class CLIError(Exception):
+    """命令执行失败，携带退出码"""
+
+    def __init__(self, message, code=EXIT_ERROR):
+        super().__init__(message)
+        self.code = code
+
+
+def _parse_type(value):
+    if value in TYPE_ALIASES:
+        return TYPE_ALIASES[value]
+    for t in PackageType:
+        if t is not PackageType.ALL and value == t.value:
+            return t.value
+    raise argparse.ArgumentTypeError(
+        f"未知的资源包类型: {value} (可选: {', '.join(TYPE_ALIASES)})"
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="hspm", description="HS2 资源包管理工具")
+    parser.add_argument("--app-root", help="游戏根目录 (默认读取 config.json)")
+    parser.add_argument("--meta-dir", help="元数据目录 (默认读取 config.json)")
+    parser.add_argument("--json", action="store_true", help="以 JSON 格式输出结果")
+    parser.add_argument("-q", "--quiet", action="store_true", help="不输出过程日志")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_install_args(p):
+        p.add_argument("source", help="资源包目录或压缩包")
+        p.add_argument("--name", help="资源包名称 (默认自动识别)")
+        p.add_argument("--sid", help="资源包 SID (默认自动识别或生成)")
+        p.add_argument(
+            "--type",
+            type=_parse_type,
+            help="资源包类型: character / dhh / other (默认自动识别)",
+        )
+        p.add_argument(
+            "--on-conflict",
+            choices=CONFLICT_POLICIES,
+            default="skip",
+            help="目标文件已存在且不同时的处理方式，abort 表示存在冲突时不安装 (默认 skip)",
+        )
+        p.add_argument("--workers", type=int, help="并行复制线程数")
+        p.add_argument(
+            "--hash", action="store_true", default=None, help="按内容哈希检测冲突"
+        )
+        p.add_argument(
+            "--link-mode", choices=("copy", "hardlink", "reflink", "auto"), help="文件放置方式"
+        )
+
+    p_install = sub.add_parser("install", help="安装资源包")
+    add_install_args(p_install)
+
+    p_dry = sub.add_parser("dry-run", help="模拟安装，不复制文件")
+    add_install_args(p_dry)
+    p_dry.add_argument(
+        "--create-meta", action="store_true", help="为模拟安装保存元数据记录"
+    )
+
+    p_uninstall = sub.add_parser("uninstall", help="卸载资源包")
+    p_uninstall.add_argument(
+        "targets", nargs="+", help="元数据文件路径、资源包名称或 SID"
+    )
+
+    p_list = sub.add_parser("list", help="列出已安装的资源包")
+    p_list.add_argument(
+        "--type", type=_parse_type, help="只列出指定类型: character / dhh / other"
+    )
+
+    p_migrate = sub.add_parser("migrate", help="转换所有元数据的存储格式")
+    p_migrate.add_argument(
+        "--format",
+        dest="meta_format",
+        choices=META_FORMATS,
+        required=True,
+        help="目标格式: json (缩进 JSON) / compact (紧凑) / compact.gz (紧凑并压缩)",
+    )
+
+    p_export = sub.add_parser("export", help="把元数据导出为可读的 JSON")
+    p_export.add_argument("targets", nargs="+", help="元数据文件路径、资源包名称或 SID")
+    p_export.add_argument(
+        "-o", "--output", help="导出目录 (默认 <元数据目录>/.hspm/export)"
+    )
+
+    p_overlaps = sub.add_parser("overlaps", help="列出共享同一文件的资源包")
+    p_overlaps.add_argument(
+        "--files", action="store_true", help="同时列出每个重叠文件及其所属资源包"
+    )
+
+    p_recover = sub.add_parser("recover", help="列出、继续或回滚被中断的安装")
+    p_recover.add_argument("targets", nargs="*", help="资源包名称或 SID (默认全部)")
+    group = p_recover.add_mutually_exclusive_group()
+    group.add_argument(
+        "--resume", action="store_true", help="继续安装（已完成的文件不会重新复制）"
+    )
+    group.add_argument(
+        "--rollback", action="store_true", help="回滚（删除本次已复制的文件）"
+    )
+
+    p_verify = sub.add_parser("verify", help="校验已安装的文件是否缺失或被修改")
+    p_verify.add_argument(
+        "targets", nargs="*", help="元数据文件路径、资源包名称或 SID (默认全部)"
+    )
+    p_verify.add_argument(
+        "--full", action="store_true", help="重新检查所有资源包，不沿用上次的校验结果"
+    )
+    p_verify.add_argument(
+        "--repair", action="store_true", help="从安装来源重新放置缺失或被修改的文件"
+    )
+    p_verify.add_argument("--workers", type=int, help="并行检查线程数")
+
+    p_orphans = sub.add_parser("orphans", help="列出没有任何元数据记录的文件")
+    p_orphans.add_argument(
+        "--abdata", action="store_true", help="同时扫描 abdata (其中大部分是游戏本体文件)"
+    )
+    p_orphans.add_argument("--workers", type=int, help="并行扫描线程数")
+    group = p_orphans.add_mutually_exclusive_group()
+    group.add_argument(
+        "--adopt", metavar="NAME", help="把找到的文件记录为一个新资源包（文件保留在原位置）"
+    )
+    group.add_argument("--delete", action="store_true", help="删除找到的文件")
+    p_orphans.add_argument("--sid", help="收编时使用的 SID (默认自动生成)")
+    p_orphans.add_argument(
+        "--type", type=_parse_type, help="收编时的资源包类型 (默认 other)"
+    )
+    return parser
+
+
+class CLI:
+    def __init__(self, args):
+        self.args = args
+        self.manager = PackageManager()
+        config = self.manager.config
+        self.app_root = args.app_root or config.get("app_root")
+        self.meta_dir = args.meta_dir or config.get("meta_dir")
+        # 结果始终写入真正的 stdout（执行期间 stdout 可能被重定向）
+        self.stdout = sys.stdout
+
+    def log(self, message):
+        if not self.args.quiet:
+            # JSON 模式下日志写入 stderr，保证 stdout 只有结果
+            print(message, file=sys.stderr if self.args.json else self.stdout)
+
+    def output(self, result, text_lines):
+        if self.args.json:
+            print(json.dumps(result, ensure_ascii=False, indent=2), file=self.stdout)
+        else:
+            for line in text_lines:
+                print(line, file=self.stdout)
+
+    def require_paths(self, need_app_root=True):
+        if need_app_root and (not self.app_root or not Path(self.app_root).is_dir()):
+            raise CLIError(f"游戏根目录无效或不存在: {self.app_root}")
+        if not self.meta_dir:
+            raise CLIError("元数据目录未配置，请使用 --meta-dir 或检查 config.json")
+
+    def fail(self, message, code=EXIT_ERROR):
+        if self.args.json:
+            print(json.dumps({"error": message}, ensure_ascii=False), file=self.stdout)
+        else:
+            print(f"错误: {message}", file=sys.stderr)
+        return code
+
+    def cmd_install(self, dry_run=False):
+        args = self.args
+        self.require_paths()
+        source = Path(args.source)
+        if not source.exists():
+            return self.fail(f"资源包不存在: {source}")
+
+        name, sid, pkg_type = self.manager.detect_package_info(source_stem(source))
+        pkg_type = args.type or pkg_type
+        name = args.name or name
+        if pkg_type == PackageType.CHARACTER.value:
+            sid = args.sid or sid
+            if not sid:
+                return self.fail("人物卡需要 SID，请使用 --sid 指定", EXIT_USAGE)
+        else:
+            sid = args.sid or self.manager.generate_sid(pkg_type)
+
+        if self.manager.find_package(self.meta_dir, name=name):
+            return self.fail(f"已存在名称为 '{name}' 的资源包")
+        if self.manager.find_package(self.meta_dir, sid=sid):
+            return self.fail(f"已存在 SID 为 '{sid}' 的资源包")
+
+        overwrite = args.on_conflict == "overwrite"
+        conflicts = []
+
+        def conflict_policy(planned):
+            conflicts.extend(
+                {
+                    "dest": c["dest"],
+                    "old_size": c["old_size"],
+                    "new_size": c["new_size"],
+                    "owners": c["owners"],
+                }
+                for c in planned
+            )
+            if args.on_conflict == "abort":
+                return None
+            return {c["dest"] for c in planned} if overwrite else set()
+
+        summary = self.manager.install(
+            source=source,
+            name=name,
+            sid=sid,
+            pkg_type=pkg_type,
+            app_root=self.app_root,
+            meta_dir=self.meta_dir,
+            dry_run=dry_run,
+            create_meta_on_dry_run=getattr(args, "create_meta", False),
+            log_func=self.log,
+            resolve_func=conflict_policy,
+            workers=args.workers,
+            hash_mode=args.hash,
+            link_mode=args.link_mode,
+        )
+        result = {
+            "name": name,
+            "sid": sid,
+            "type": pkg_type,
+            "dry_run": dry_run,
+            "copied": summary["copied"],
+            "overwritten": summary["overwritten"],
+            "skipped": summary["skipped"],
+            "failed": summary["failed"],
+            "conflicts": conflicts,
+            "conflict_policy": args.on_conflict,
+            "aborted": summary["aborted"],
+        }
+        if summary["aborted"]:
+            line = f"{name} ({sid}): 存在 {len(conflicts)} 个冲突文件，已取消安装"
+        else:
+            line = (
+                f"{name} ({sid}): 复制 {summary['copied']}，覆盖 {summary['overwritten']}，"
+                f"跳过 {summary['skipped']}，失败 {len(summary['failed'])}，冲突 {len(conflicts)}"
+            )
+        lines = [line]
+        for c in conflicts:
+            if c["owners"]:
+                owners = "、".join(
+                    o["package"] + (" (已被修改)" if o["modified"] else "")
+                    for o in c["owners"]
+                )
+                lines.append(f"  冲突: {c['dest']} 属于 {owners}")
+        self.output(result, lines)
+        if summary["aborted"]:
+            return EXIT_ERROR
+        if summary["failed"] or (conflicts and not overwrite):
+            return EXIT_PARTIAL
+        return EXIT_OK
+
+    def resolve_target(self, target):
+        """将 元数据路径 / 名称 / SID 解析为元数据文件路径"""
+        path = Path(target)
+        if is_meta_file(path.name) and path.exists():
+            return path
+        pkg = self.manager.find_package(self.meta_dir, name=target) or (
+            self.manager.find_package(self.meta_dir, sid=target)
+        )
+        return Path(pkg["meta_path"]) if pkg else None
+
+    def cmd_uninstall(self):
+        self.require_paths()
+        targets = self.args.targets
+        results = [None] * len(targets)
+        found = []  # (位置, 元数据路径)
+        for pos, target in enumerate(targets):
+            meta_path = self.resolve_target(target)
+            if meta_path is None:
+                results[pos] = {
+                    "target": target,
+                    "success": False,
+                    "message": "未找到资源包",
+                }
+            else:
+                found.append((pos, meta_path))
+
+        # 所有目标作为一个批次卸载
+        deleted = self.manager.delete_packages(
+            [meta_path for _, meta_path in found], self.app_root
+        )
+        for (pos, _), result in zip(found, deleted):
+            results[pos] = dict(result, target=targets[pos])
+
+        code = EXIT_OK
+        for r in results:
+            if not r["success"]:
+                code = EXIT_ERROR
+            elif r.get("status") == PackageStatus.CONFLICT.value and code == EXIT_OK:
+                code = EXIT_PARTIAL
+        self.output(
+            results,
+            [
+                f"{'成功' if r['success'] else '失败'}: {r['target']} - {r['message']}"
+                for r in results
+            ],
+        )
+        return code
+
+    def cmd_list(self):
+        self.require_paths(need_app_root=False)
+        packages = self.manager.get_package_list(self.meta_dir)
+        if self.args.type:
+            packages = [p for p in packages if p.get("type") == self.args.type]
+        packages.sort(key=lambda p: p.get("created_at", ""))
+        self.output(
+            packages,
+            [
+                f"{p['name']}\t{p['sid']}\t{p['type']}\t{p['created_at']}\t"
+                f"{p['file_count']}\t{p['status']}"
+                for p in packages
+            ],
+        )
+        return EXIT_OK
+
+    def cmd_migrate(self):
+        self.require_paths(need_app_root=False)
+        summary = self.manager.migrate_metadata(
+            self.meta_dir, self.args.meta_format, log_func=self.log
+        )
+        self.output(
+            dict(summary, format=self.args.meta_format),
+            [
+                f"转换 {summary['converted']}，无需转换 {summary['unchanged']}，"
+                f"失败 {len(summary['failed'])}"
+            ],
+        )
+        return EXIT_ERROR if summary["failed"] else EXIT_OK
+
+    def cmd_export(self):
+        self.require_paths(need_app_root=False)
+        results = []
+        code = EXIT_OK
+        for target in self.args.targets:
+            meta_path = self.resolve_target(target)
+            if meta_path is None:
+                results.append({"target": target, "error": "未找到资源包"})
+                code = EXIT_ERROR
+                continue
+            if self.args.output:
+                out = export_meta(meta_path, self.args.output)
+            else:
+                out = self.manager.export_metadata(meta_path)
+            results.append({"target": target, "path": str(out)})
+        self.output(
+            results,
+            [r.get("path") or f"失败: {r['target']} - {r['error']}" for r in results],
+        )
+        return code
+
+    def cmd_overlaps(self):
+        self.require_paths(need_app_root=False)
+        report = self.manager.overlap_report(self.meta_dir)
+        lines = [
+            f"{p['packages'][0]}\t{p['packages'][1]}\t{p['files']}" for p in report["pairs"]
+        ]
+        if self.args.files:
+            lines.extend(
+                f"{dest}\t{'、'.join(packages)}" for dest, packages in report["files"].items()
+            )
+        if not report["pairs"]:
+            lines = ["没有资源包共享文件"]
+        self.output(report, lines)
+        return EXIT_OK
+
+    def cmd_recover(self):
+        args = self.args
+        self.require_paths(need_app_root=False)
+        pending = [
+            p
+            for p in self.manager.pending_installs(self.meta_dir)
+            if not args.targets or p["name"] in args.targets or p["sid"] in args.targets
+        ]
+        if not args.resume and not args.rollback:
+            self.output(
+                pending,
+                [
+                    f"{p['name']}\t{p['sid']}\t{p['done']}/{p['total']}\t{p['source']}"
+                    + ("" if p["source_exists"] else "\t(来源已不存在)")
+                    for p in pending
+                ]
+                or ["没有被中断的安装"],
+            )
+            return EXIT_OK
+
+        results = []
+        code = EXIT_OK
+        for p in pending:
+            result = {"name": p["name"], "sid": p["sid"]}
+            try:
+                if args.resume:
+                    summary = self.manager.resume_install(p["journal"], log_func=self.log)
+                    result.update(summary, success=True)
+                    line = (
+                        f"已继续安装: {p['name']} ({p['sid']}) - 复制 {summary['copied']}，"
+                        f"覆盖 {summary['overwritten']}，失败 {len(summary['failed'])}"
+                    )
+                    partial = bool(summary["failed"])
+                else:
+                    summary = self.manager.rollback_install(p["journal"], log_func=self.log)
+                    result.update(summary, success=True)
+                    line = (
+                        f"已回滚: {p['name']} ({p['sid']}) - 删除 {summary['removed']}，"
+                        f"删除失败 {len(summary['failed'])}，无法恢复 {len(summary['kept'])}"
+                    )
+                    partial = bool(summary["failed"] or summary["kept"])
+                if partial and code == EXIT_OK:
+                    code = EXIT_PARTIAL
+            except Exception as e:
+                result.update(success=False, error=str(e))
+                line = f"失败: {p['name']} ({p['sid']}) - {e}"
+                code = EXIT_ERROR
+            result["message"] = line
+            results.append(result)
+        self.output(results, [r["message"] for r in results] or ["没有被中断的安装"])
+        return code
+
+    def cmd_verify(self):
+        args = self.args
+        self.require_paths()
+        meta_paths = None
+        if args.targets:
+            meta_paths = []
+            for target in args.targets:
+                meta_path = self.resolve_target(target)
+                if meta_path is None:
+                    raise CLIError(f"未找到资源包: {target}")
+                meta_paths.append(meta_path)
+        results = self.manager.verify_packages(
+            self.meta_dir,
+            self.app_root,
+            full=args.full,
+            workers=args.workers,
+            meta_paths=meta_paths,
+        )
+
+        code = EXIT_OK
+        lines = []
+        for r in results:
+            if args.repair and r["repairable"]:
+                try:
+                    r["repair"] = self.manager.repair_package(
+                        r["meta_path"], self.app_root, log_func=self.log
+                    )
+                except Exception as e:
+                    r["repair"] = {"repaired": [], "failed": [], "error": str(e)}
+                repaired = set(r["repair"]["repaired"])
+                r["missing"] = [d for d in r["missing"] if d not in repaired]
+                r["modified"] = [d for d in r["modified"] if d not in repaired]
+                r["intact"] += len(repaired)
+            problems = len(r["missing"]) + len(r["modified"])
+            if problems and code == EXIT_OK:
+                code = EXIT_PARTIAL
+            line = (
+                f"{r['name']}\t{r['sid']}\t完好 {r['intact']}，缺失 {len(r['missing'])}，"
+                f"被修改 {len(r['modified'])}，被覆盖 {len(r['replaced'])}"
+            )
+            if "repair" in r:
+                line += f"，已修复 {len(r['repair']['repaired'])}"
+            elif problems and not r["repairable"]:
+                line += "，来源不可用，无法修复"
+            lines.append(line)
+            lines.extend(f"  缺失: {dest}" for dest in r["missing"])
+            lines.extend(f"  被修改: {dest}" for dest in r["modified"])
+            lines.extend(f"  被覆盖: {x['dest']} 属于 {x['package']}" for x in r["replaced"])
+        self.output(results, lines or ["没有已安装的资源包"])
+        return code
+
+    def cmd_orphans(self):
+        args = self.args
+        self.require_paths()
+        orphans = self.manager.scan_orphans(
+            self.meta_dir, self.app_root, include_abdata=args.abdata, workers=args.workers
+        )
+        total = sum(o["size"] for o in orphans)
+        dests = [o["dest"] for o in orphans]
+        if args.adopt:
+            adopted = {"meta_path": None, "adopted": []}
+            if dests:
+                adopted = self.manager.adopt_orphans(
+                    self.meta_dir,
+                    self.app_root,
+                    dests,
+                    args.adopt,
+                    sid=args.sid,
+                    pkg_type=args.type,
+                    log_func=self.log,
+                )
+            meta_path = adopted["meta_path"]
+            written = set(adopted["adopted"])
+            adopted_size = sum(o["size"] for o in orphans if o["dest"] in written)
+            result = {
+                "orphans": orphans,
+                "adopted": adopted["adopted"],
+                "meta_path": str(meta_path) if meta_path else None,
+            }
+            if meta_path is None:
+                lines = ["没有收编任何文件（文件已被其他元数据记录或已不存在）"]
+                code = EXIT_ERROR if orphans else EXIT_OK
+            else:
+                lines = [
+                    f"已收编 {len(written)}/{len(orphans)} 个文件 "
+                    f"({format_size(adopted_size)}): {meta_path}"
+                ]
+                code = EXIT_PARTIAL if len(written) < len(orphans) else EXIT_OK
+        elif args.delete:
+            summary = self.manager.delete_orphans(
+                self.meta_dir, self.app_root, dests, log_func=self.log, workers=args.workers
+            )
+            result = dict(summary, orphans=orphans)
+            lines = [f"已删除 {summary['removed']} 个文件，失败 {len(summary['failed'])}"]
+            code = EXIT_PARTIAL if summary["failed"] else EXIT_OK
+        else:
+            result = orphans
+            lines = [f"{format_size(o['size'])}\t{o['dest']}" for o in orphans]
+            lines.append(f"共 {len(orphans)} 个文件，{format_size(total)}")
+            code = EXIT_OK
+        if not orphans:
+            lines = ["没有孤立文件"]
+        self.output(result, lines)
+        return code
+
+    def run(self):
+        command = self.args.command
+        # PackageManager 的调试输出不应混入 JSON 结果
+        stdout = sys.stderr if self.args.json else sys.stdout
+        handlers = {
+            "install": self.cmd_install,
+            "dry-run": lambda: self.cmd_install(dry_run=True),
+            "uninstall": self.cmd_uninstall,
+            "list": self.cmd_list,
+            "migrate": self.cmd_migrate,
+            "export": self.cmd_export,
+            "overlaps": self.cmd_overlaps,
+            "recover": self.cmd_recover,
+            "verify": self.cmd_verify,
+            "orphans": self.cmd_orphans,
+        }
+        try:
+            with contextlib.redirect_stdout(stdout):
+                return handlers[command]()
+        except CLIError as e:
+            return self.fail(str(e), e.code)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return CLI(args).run()
+    except Exception as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+
+if __name__ == "__main__":
+    sys.exit(main())
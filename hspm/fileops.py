@@ -0,0 +1,181 @@
+import os
+import shutil
+import stat
+import sys
+
+from .trace import tracer
+
+# 安装方式
+LINK_COPY = "copy"  # 普通复制
+LINK_HARDLINK = "hardlink"  # 硬链接（源与目标共享同一份数据）
+LINK_REFLINK = "reflink"  # 写时复制克隆（仅部分文件系统支持）
+LINK_AUTO = "auto"  # 依次尝试 reflink -> hardlink -> copy
+LINK_MODES = (LINK_COPY, LINK_HARDLINK, LINK_REFLINK, LINK_AUTO)
+
+# Linux FICLONE ioctl: _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+
+# 同一目录下目标文件达到该数量时改为扫描整个目录，否则逐个 stat
+SCANDIR_THRESHOLD = 8
+
+# 需要汇报进度时，达到该大小的文件分块复制，以便在单个大文件复制过程中更新进度
+CHUNKED_COPY_THRESHOLD = 16 * 1024 * 1024
+COPY_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def reflink(src, dest):
+    """以写时复制方式克隆文件，不支持时抛出 OSError"""
+    if not sys.platform.startswith("linux"):
+        raise OSError("当前平台不支持 reflink")
+    import fcntl
+
+    with open(src, "rb") as fsrc, open(dest, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            os.unlink(dest)
+            raise
+    shutil.copystat(src, dest)
+
+
+def _remove_existing(dest):
+    """移除已存在的目标文件
+
+    目标可能是指向源库的硬链接，直接写入会修改源文件，因此先解除链接再放置新文件。
+    os.unlink 不会跟随链接，只会删除目标路径本身。
+    """
+    if os.path.lexists(dest):
+        os.unlink(dest)
+
+
+def copy_chunked(src, dest, progress):
+    """分块复制文件内容和元信息，每写入一块调用 progress(字节数)"""
+    buf = bytearray(COPY_CHUNK_SIZE)
+    view = memoryview(buf)
+    with open(src, "rb") as fsrc, open(dest, "wb") as fdst:
+        while n := fsrc.readinto(buf):
+            fdst.write(view[:n])
+            progress(n)
+    shutil.copystat(src, dest)
+
+
+def place_file(src, dest, mode=LINK_COPY, progress=None):
+    """按指定方式将 src 放置到 dest，链接失败时回退为复制
+
+    返回实际使用的方式（LINK_COPY / LINK_HARDLINK / LINK_REFLINK）。
+    提供 progress 时，大文件分块复制并逐块汇报写入的字节数；其他情况不汇报，
+    由调用方在放置完成后计入。
+    """
+    src = str(src)
+    dest = str(dest)
+    _remove_existing(dest)
+
+    if mode in (LINK_REFLINK, LINK_AUTO):
+        try:
+            reflink(src, dest)
+            return LINK_REFLINK
+        except OSError:
+            pass
+
+    if mode in (LINK_HARDLINK, LINK_AUTO):
+        try:
+            os.link(src, dest)
+            return LINK_HARDLINK
+        except OSError:
+            pass
+
+    if progress and os.path.getsize(src) >= CHUNKED_COPY_THRESHOLD:
+        copy_chunked(src, dest, progress)
+    else:
+        shutil.copy2(src, dest)
+    return LINK_COPY
+
+
+def _stat_dir(parent, members):
+    """获取同一目录下多个文件的状态，members 为 [(文件名, 键)]"""
+    result = {}
+    if len(members) < SCANDIR_THRESHOLD:
+        tracer.count("syscall.stat", len(members))
+        for name, key in members:
+            try:
+                st = os.stat(os.path.join(parent, name))
+            except OSError:
+                continue
+            if stat.S_ISREG(st.st_mode):
+                result[key] = st
+        return result
+
+    # Windows 下文件名不区分大小写，按 normcase 匹配
+    wanted = {os.path.normcase(name): key for name, key in members}
+    tracer.count("syscall.scandir")
+    try:
+        with os.scandir(parent) as it:
+            for entry in it:
+                key = wanted.get(os.path.normcase(entry.name))
+                if key is not None and entry.is_file():
+                    result[key] = entry.stat()
+    except OSError:
+        pass
+    return result
+
+
+def stat_files(root, rel_paths, pool=None):
+    """批量获取 root 下多个文件的状态
+
+    按所在目录分组，文件较多的目录只扫描一次（Windows 上 scandir 直接返回 stat 信息），
+    提供线程池时各目录并行处理。返回 {相对路径: stat}，不存在或不是普通文件的路径不在结果中。
+    """
+    groups = {}
+    for rel in rel_paths:
+        path = os.path.join(root, rel)
+        groups.setdefault(os.path.dirname(path), []).append((os.path.basename(path), rel))
+
+    if pool:
+        scans = pool.map(lambda group: _stat_dir(*group), groups.items())
+    else:
+        scans = (_stat_dir(parent, members) for parent, members in groups.items())
+    result = {}
+    for part in scans:
+        result.update(part)
+    return result
+
+
+def unlink_files(paths, pool=None, progress_func=None):
+    """删除多个文件，返回 [(路径, 异常)]；progress_func(已处理数, 总数) 在调用线程中执行"""
+    errors = []
+    total = len(paths)
+
+    def _unlink(path):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            return e
+        return None
+
+    tracer.count("syscall.unlink", total)
+    results = pool.map(_unlink, paths) if pool else map(_unlink, paths)
+    for done, (path, error) in enumerate(zip(paths, results), 1):
+        if error is not None:
+            errors.append((path, error))
+        if progress_func:
+            progress_func(done, total)
+    return errors
+
+
+def prune_dirs(paths):
+    """从最深的目录开始依次尝试删除，非空或不存在的目录直接跳过，返回删除的目录数"""
+    removed = 0
+    ordered = sorted(
+        paths, key=lambda p: len(os.path.normpath(p).split(os.sep)), reverse=True
+    )
+    tracer.count("syscall.rmdir", len(ordered))
+    for path in ordered:
+        try:
+            os.rmdir(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
@@ -0,0 +1,212 @@
+import math
+import os
+import queue
+import tkinter as tk
+from tkinter import ttk
+
+from .preview import PreviewLoader
+from .thumbs import LRUCache
+
+# 卡片尺寸（像素）
+CELL_WIDTH = 150
+CELL_HEIGHT = 220
+THUMB_HEIGHT = 180
+# 可视区域上下额外渲染的行数
+OVERSCAN_ROWS = 1
+# 内存中保留的缩略图数量（与人物卡总数无关）
+GALLERY_PHOTO_CACHE_SIZE = 240
+POLL_INTERVAL = 30
+
+
+class CardGallery:
+    """虚拟化的人物卡网格
+
+    只为可视区域内的卡片创建 Canvas 图元，滚动时回收离开视口的图元；
+    缩略图由后台线程按需加载，离开视口的请求会被新的请求取消。
+    """
+
+    def __init__(self, parent, load_func, photo_func, open_func):
+        """load_func(meta_path, app_root, height) 在后台线程返回图片或提示文本；
+        photo_func(result) 在主线程把结果转换为 PhotoImage；
+        open_func(package) 在双击卡片时调用
+        """
+        self.photo_func = photo_func
+        self.open_func = open_func
+        self.packages = []
+        self.app_root = ""
+        self.columns = 1
+        self.cells = {}  # 卡片序号 -> (rect_id, image_id, text_id, note_id)
+        # 缩略图缓存；没有图片或加载失败时保存提示文本，避免反复加载
+        self.photos = LRUCache(GALLERY_PHOTO_CACHE_SIZE)
+        self.loader = PreviewLoader(load_func)
+        self.selected = None
+        self._update_pending = False
+
+        self.frame = ttk.Frame(parent)
+        self.canvas = tk.Canvas(self.frame, highlightthickness=0, background="white")
+        self.scrollbar = ttk.Scrollbar(
+            self.frame, orient="vertical", command=self.canvas.yview
+        )
+        self.canvas.configure(yscrollcommand=self._on_view_changed)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        self.canvas.bind("<Configure>", lambda e: self.relayout())
+        self.canvas.bind("<MouseWheel>", self._on_mousewheel)
+        self.canvas.bind("<Button-4>", lambda e: self.canvas.yview_scroll(-1, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.canvas.yview_scroll(1, "units"))
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Double-1>", self._on_double_click)
+        self.canvas.configure(yscrollincrement=CELL_HEIGHT // 4)
+        self.frame.after(POLL_INTERVAL, self.poll)
+
+    def set_packages(self, packages, app_root):
+        """设置要显示的人物卡列表（只保存摘要，不加载图片）"""
+        self.packages = list(packages)
+        self.app_root = app_root
+        self.selected = None
+        self.canvas.delete("all")
+        self.cells.clear()
+        self.relayout()
+
+    def relayout(self):
+        width = max(self.canvas.winfo_width(), CELL_WIDTH)
+        columns = max(1, width // CELL_WIDTH)
+        if columns != self.columns:
+            self.columns = columns
+            # 列数变化后所有卡片位置都会改变，清空重新绘制
+            self.canvas.delete("all")
+            self.cells.clear()
+        rows = math.ceil(len(self.packages) / self.columns)
+        self.canvas.configure(scrollregion=(0, 0, width, rows * CELL_HEIGHT))
+        self._schedule_update()
+
+    def _on_view_changed(self, first, last):
+        self.scrollbar.set(first, last)
+        self._schedule_update()
+
+    def _on_mousewheel(self, event):
+        self.canvas.yview_scroll(int(-event.delta / 120) * 2, "units")
+
+    def _schedule_update(self):
+        if not self._update_pending:
+            self._update_pending = True
+            self.canvas.after_idle(self.update_visible)
+
+    def _visible_range(self):
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        first_row = max(0, int(top // CELL_HEIGHT) - OVERSCAN_ROWS)
+        last_row = int(bottom // CELL_HEIGHT) + OVERSCAN_ROWS
+        start = first_row * self.columns
+        end = min(len(self.packages), (last_row + 1) * self.columns)
+        return range(start, end)
+
+    def update_visible(self):
+        """只为可视区域内的卡片创建图元，并回收离开视口的图元"""
+        self._update_pending = False
+        visible = self._visible_range()
+
+        for index in [i for i in self.cells if i not in visible]:
+            for item in self.cells.pop(index):
+                self.canvas.delete(item)
+
+        to_load = []
+        for index in visible:
+            pkg = self.packages[index]
+            key = self._photo_key(pkg)
+            photo = self.photos.get(key) if key else None
+            if index not in self.cells:
+                self._create_cell(index, pkg)
+            if photo is not None:
+                self._show_thumb(self.cells[index], photo)
+            elif key:
+                to_load.append((key, (pkg["meta_path"], self.app_root, THUMB_HEIGHT)))
+
+        # 新的请求会取消离开视口的旧请求
+        self.loader.request(prefetch=to_load)
+
+    def _create_cell(self, index, pkg):
+        row, col = divmod(index, self.columns)
+        x = col * CELL_WIDTH
+        y = row * CELL_HEIGHT
+        outline = "#3c7dd9" if index == self.selected else "#dddddd"
+        rect = self.canvas.create_rectangle(
+            x + 4, y + 4, x + CELL_WIDTH - 4, y + CELL_HEIGHT - 4, outline=outline
+        )
+        image = self.canvas.create_image(x + CELL_WIDTH // 2, y + 8, anchor="n")
+        text = self.canvas.create_text(
+            x + CELL_WIDTH // 2,
+            y + THUMB_HEIGHT + 14,
+            text=pkg["name"],
+            width=CELL_WIDTH - 12,
+            anchor="n",
+        )
+        note = self.canvas.create_text(
+            x + CELL_WIDTH // 2,
+            y + 8 + THUMB_HEIGHT // 2,
+            text="",
+            width=CELL_WIDTH - 16,
+            fill="#888888",
+        )
+        self.cells[index] = (rect, image, text, note)
+
+    def _show_thumb(self, cell, photo):
+        """显示缩略图，photo 为字符串时显示提示文本"""
+        if isinstance(photo, str):
+            self.canvas.itemconfigure(cell[1], image="")
+            self.canvas.itemconfigure(cell[3], text=photo)
+        else:
+            self.canvas.itemconfigure(cell[1], image=photo)
+            self.canvas.itemconfigure(cell[3], text="")
+
+    def _photo_key(self, pkg):
+        try:
+            return (pkg["meta_path"], os.stat(pkg["meta_path"]).st_mtime_ns)
+        except OSError:
+            return None
+
+    def _index_at(self, event):
+        x = self.canvas.canvasx(event.x)
+        y = self.canvas.canvasy(event.y)
+        col = int(x // CELL_WIDTH)
+        if col >= self.columns:
+            return None
+        index = int(y // CELL_HEIGHT) * self.columns + col
+        return index if index < len(self.packages) else None
+
+    def _on_click(self, event):
+        index = self._index_at(event)
+        for i in (self.selected, index):
+            if i is not None and i in self.cells:
+                color = "#3c7dd9" if i == index else "#dddddd"
+                self.canvas.itemconfigure(self.cells[i][0], outline=color)
+        self.selected = index
+
+    def _on_double_click(self, event):
+        index = self._index_at(event)
+        if index is not None:
+            self.open_func(self.packages[index])
+
+    def poll(self):
+        """把后台加载好的缩略图放到对应卡片上（在 Tk 主线程中执行）"""
+        try:
+            while True:
+                _, key, result, _ = self.loader.results.get_nowait()
+                if isinstance(result, Exception):
+                    photo = f"加载失败: {result}"
+                elif isinstance(result, str):
+                    photo = result
+                else:
+                    try:
+                        photo = self.photo_func(result)
+                    except Exception as e:
+                        photo = f"图片加载失败: {e}"
+                self.photos.put(key, photo)
+                for index, cell in self.cells.items():
+                    if self.packages[index]["meta_path"] == key[0]:
+                        self._show_thumb(cell, photo)
+                        break
+        except queue.Empty:
+            pass
+        self.frame.after(POLL_INTERVAL, self.poll)
@@ -1,20 +1,58 @@
 import os
 import re
-import json
+import queue
 import threading
 import tkinter as tk
 from datetime import datetime
 from pathlib import Path
-from tkinter import filedialog, messagebox, ttk
+from tkinter import filedialog, messagebox, simpledialog, ttk
 
+from .gallery import CardGallery
+from .logsink import LogSink
 from .manager import PackageManager
+from .metafile import read_meta
+from .preview import PreviewLoader
+from .progress import format_progress, format_size, progress_fraction
+from .search import PackageSearchIndex
 from .models import PackageStatus, PackageType, GUIConfigKey
+from .sources import ARCHIVE_SUFFIXES, find_card_image, is_archive, source_stem
+from .thumbs import LRUCache, ThumbnailCache
+
+
+# 日志控件最多保留的行数（完整日志写入配置目录下的 logs/）
+LOG_MAX_LINES = 2000
+# 日志控件刷新间隔（毫秒）与每次最多取出的条数
+LOG_POLL_INTERVAL = 100
+LOG_BATCH_SIZE = 2000
+# 内存中缓存的预览图数量
+PHOTO_CACHE_SIZE = 64
+# 后台预览结果的轮询间隔（毫秒）
+PREVIEW_POLL_INTERVAL = 30
+# 资源包列表的列，path 列的值即行 iid（元数据路径）
+LIST_COLUMNS = ("name", "sid", "type", "date", "files", "status", "action", "path")
+# 状态列的排序顺序
+STATUS_SORT_RANK = {
+    PackageStatus.NORMAL.value: 0,
+    PackageStatus.CONFLICT.value: 1,
+    PackageStatus.DRY_RUN.value: 2,
+}
+# 进度条的刻度数（按字节比例换算）
+PROGRESS_SCALE = 1000
+# 搜索框输入后延迟过滤的时间（毫秒）
+SEARCH_DEBOUNCE_MS = 150
+
+
+def format_owners(owners):
+    """冲突文件所属资源包的显示文本"""
+    if not owners:
+        return "（非资源包文件）"
+    return "、".join(o["package"] + ("（已修改）" if o["modified"] else "") for o in owners)
 
 
 class AddPackageGUI:
-    def __init__(self, root):
+    def __init__(self, root, manager=None):
         self.root = root
-        self.manager = PackageManager()
+        self.manager = manager or PackageManager()
         self.root.title(f"HS2 资源包管理工具 v{self.manager.version}")
         self.root.geometry("1600x900")
 
@@ -30,7 +68,14 @@ class AddPackageGUI:
         self.sid = tk.StringVar()
         self.dry_run = tk.BooleanVar(value=False)
         self.create_meta_on_dry_run = tk.BooleanVar(value=False)
-        self.original_order = []
+        self.original_order = []  # 元数据路径，按资源包读取顺序
+        self.list_rows = {}  # 元数据路径 -> 表格行
+        self.list_sort_keys = {}  # 元数据路径 -> {列: 排序键}
+        self.list_search_index = PackageSearchIndex()
+        self.list_search = tk.StringVar()
+        self.list_search.trace_add("write", lambda *_: self.on_list_search_change())
+        self.list_search_job = None
+        self.list_sort = None  # (列, 是否降序)
 
         # 列表页筛选变量
         self.list_filter_type = tk.StringVar(value=PackageType.CHARACTER.value)
@@ -46,19 +91,37 @@ class AddPackageGUI:
         self.initial_tab = gui_config.get(GUIConfigKey.SELECTED_TAB.value, 0)
 
         self.last_hover = None  # 记录上次悬停的状态 (item_id, part)
+        self.deleting = False  # 是否有卸载任务正在后台执行
+        self.log_sink = LogSink(self.manager.config_dir / "logs")
+        # 预览图缓存：内存中的 PhotoImage + 磁盘上的缩略图
+        self.photo_cache = LRUCache(PHOTO_CACHE_SIZE)
+        thumb_limit_mb = gui_config.get(GUIConfigKey.THUMBNAIL_CACHE_MB.value, 256)
+        self.thumbnails = ThumbnailCache(
+            self.manager.config_dir / "thumbs", max_bytes=thumb_limit_mb * 1024 * 1024
+        )
+        self.preview_loader = PreviewLoader(self.load_list_preview)
 
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(LOG_POLL_INTERVAL, self.poll_log)
+        self.root.after(PREVIEW_POLL_INTERVAL, self.poll_preview)
 
         # 延迟初始化界面状态，确保窗口已渲染
         self.root.after(100, self.initialize_ui_state)
         # 延迟检查配置，确保窗口已初始化后再弹窗
         self.root.after(500, self.check_config_on_startup)
 
+    def on_close(self):
+        """关闭窗口：关闭日志文件后销毁窗口"""
+        self.log_sink.close()
+        self.root.destroy()
+
     def initialize_ui_state(self):
         """初始化界面状态（在窗口渲染后执行）"""
         self.on_type_change()
         self.on_dry_run_change()
         self.on_list_filter_change()
+        self.refresh_package_list()
 
     def check_config_on_startup(self):
         if not self.config_exists:
@@ -77,6 +140,71 @@ class AddPackageGUI:
                         print(f"已创建目录: {my_mods_dir}")
                     except Exception as e:
                         print(f"创建目录失败 {my_mods_dir}: {e}")
+            self.check_interrupted_installs()
+
+    def check_interrupted_installs(self):
+        """启动时检查被中断的安装，逐个询问继续安装还是回滚"""
+        meta_dir = self.meta_dir.get()
+        if not meta_dir or not Path(meta_dir).exists():
+            return
+        actions = []  # (中断的安装, 是否继续安装)
+        for pending in self.manager.pending_installs(meta_dir):
+            title = f"资源包 {pending['name']} ({pending['sid']}) 的安装被中断"
+            progress = f"已完成 {pending['done']}/{pending['total']} 个文件"
+            if not pending["source_exists"]:
+                if messagebox.askyesno(
+                    "安装未完成",
+                    f"{title}（{progress}），但来源已不存在：\n{pending['source']}\n\n"
+                    "是否回滚（删除本次已复制的文件）？选择“否”将在下次启动时再次询问。",
+                ):
+                    actions.append((pending, False))
+                continue
+            choice = messagebox.askyesnocancel(
+                "安装未完成",
+                f"{title}（{progress}）。\n\n"
+                "是：继续安装（已完成的文件不会重新复制）\n"
+                "否：回滚（删除本次已复制的文件）\n"
+                "取消：暂不处理，下次启动时再次询问",
+            )
+            if choice is not None:
+                actions.append((pending, choice))
+        if actions:
+            threading.Thread(
+                target=self.run_recover_thread, args=(actions,), daemon=True
+            ).start()
+
+    def run_recover_thread(self, actions):
+        for pending, resume in actions:
+            name = pending["name"]
+            try:
+                if resume:
+                    result = self.manager.resume_install(
+                        pending["journal"],
+                        log_func=self.log,
+                        progress_func=self.install_progress_callback(name),
+                    )
+                    if result["failed"]:
+                        messagebox.showwarning(
+                            "完成",
+                            f"资源包 {name} 安装完成，但有 {len(result['failed'])} 个文件复制失败，详见运行日志。",
+                        )
+                    else:
+                        messagebox.showinfo("完成", f"资源包 {name} 安装成功！")
+                else:
+                    result = self.manager.rollback_install(
+                        pending["journal"], log_func=self.log
+                    )
+                    if result["failed"] or result["kept"]:
+                        messagebox.showwarning(
+                            "回滚完成",
+                            f"资源包 {name} 已回滚，{len(result['failed'])} 个文件删除失败，"
+                            f"{len(result['kept'])} 个被覆盖的文件无法恢复，详见运行日志。",
+                        )
+                    else:
+                        messagebox.showinfo("回滚完成", f"资源包 {name} 已回滚。")
+            except Exception as e:
+                self.log(f"\n发生错误: {str(e)}")
+                messagebox.showerror("错误", f"处理中断的安装 {name} 时出错: {str(e)}")
 
     def open_config_dir(self):
         if self.manager.config_dir.exists():
@@ -91,67 +219,399 @@ class AddPackageGUI:
         else:
             messagebox.showerror("错误", f"元数据目录不存在: {meta_path}")
 
+    def show_overlap_report(self):
+        """列出共享同一文件的资源包对，选中一对时显示它们共享的文件"""
+        meta_path = Path(self.meta_dir.get())
+        if not meta_path.exists():
+            messagebox.showerror("错误", f"元数据目录不存在: {meta_path}")
+            return
+        report = self.manager.overlap_report(meta_path)
+        if not report["pairs"]:
+            messagebox.showinfo("重叠报告", "没有资源包共享文件。")
+            return
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title("重叠报告")
+        dialog.geometry("900x600")
+        dialog.transient(self.root)
+
+        tree = ttk.Treeview(dialog, columns=("a", "b", "files"), show="headings", height=10)
+        tree.heading("a", text="资源包")
+        tree.heading("b", text="资源包")
+        tree.heading("files", text="共享文件数")
+        tree.column("a", width=350)
+        tree.column("b", width=350)
+        tree.column("files", width=100, anchor="e")
+        tree.pack(fill="x", padx=10, pady=5)
+        pairs = {}
+        for pair in report["pairs"]:
+            a, b = pair["packages"]
+            pairs[tree.insert("", "end", values=(a, b, pair["files"]))] = (a, b)
+
+        listbox = tk.Listbox(dialog)
+        listbox.pack(fill="both", expand=True, padx=10, pady=5)
+
+        def on_select(event):
+            listbox.delete(0, "end")
+            for iid in tree.selection():
+                a, b = pairs[iid]
+                for dest, packages in report["files"].items():
+                    if a in packages and b in packages:
+                        listbox.insert("end", dest)
+
+        tree.bind("<<TreeviewSelect>>", on_select)
+
+    def verify_installed(self):
+        """在后台线程中校验所有资源包的文件，完成后汇报结果并询问是否修复"""
+        meta_path = Path(self.meta_dir.get())
+        app_root = Path(self.app_root.get())
+        if not meta_path.exists():
+            messagebox.showerror("错误", f"元数据目录不存在: {meta_path}")
+            return
+        if not app_root.is_dir():
+            messagebox.showerror("错误", f"游戏根目录不存在: {app_root}")
+            return
+        self.list_status.config(text="正在校验...")
+        threading.Thread(
+            target=self.run_verify_thread, args=(meta_path, app_root), daemon=True
+        ).start()
+
+    def run_verify_thread(self, meta_path, app_root):
+        try:
+            results = self.manager.verify_packages(meta_path, app_root)
+        except Exception as e:
+            self.log(f"\n发生错误: {str(e)}")
+            self.root.after(0, lambda: self.list_status.config(text=""))
+            messagebox.showerror("错误", f"校验失败: {str(e)}")
+            return
+        self.root.after(0, lambda: self.show_verify_result(results, app_root))
+
+    def show_verify_result(self, results, app_root):
+        self.list_status.config(text="")
+        damaged = [r for r in results if r["missing"] or r["modified"]]
+        if not damaged:
+            messagebox.showinfo("完整性校验", f"已校验 {len(results)} 个资源包，文件均完好。")
+            return
+        for r in damaged:
+            self.log(f"\n资源包 {r['name']} ({r['sid']}):")
+            for dest in r["missing"]:
+                self.log(f"  缺失: {dest}")
+            for dest in r["modified"]:
+                self.log(f"  被修改: {dest}")
+        repairable = [r for r in damaged if r["repairable"]]
+        summary = (
+            f"{len(damaged)} 个资源包的文件缺失或被修改"
+            f"（其中 {len(repairable)} 个可以从安装来源修复），详见运行日志。"
+        )
+        if not repairable:
+            messagebox.showwarning("完整性校验", summary)
+            return
+        if messagebox.askyesno("完整性校验", summary + "\n\n是否立即修复？"):
+            threading.Thread(
+                target=self.run_repair_thread, args=(repairable, app_root), daemon=True
+            ).start()
+
+    def run_repair_thread(self, packages, app_root):
+        repaired = failed = 0
+        for r in packages:
+            try:
+                result = self.manager.repair_package(
+                    r["meta_path"], app_root, log_func=self.log
+                )
+                repaired += len(result["repaired"])
+                failed += len(result["failed"])
+            except Exception as e:
+                self.log(f"\n修复资源包 {r['name']} 时出错: {str(e)}")
+                failed += len(r["missing"]) + len(r["modified"])
+        if failed:
+            messagebox.showwarning(
+                "修复完成", f"已修复 {repaired} 个文件，{failed} 个文件修复失败，详见运行日志。"
+            )
+        else:
+            messagebox.showinfo("修复完成", f"已修复 {repaired} 个文件。")
+
+    def scan_orphans(self):
+        """在后台线程中扫描没有元数据记录的文件，完成后显示列表"""
+        meta_path = Path(self.meta_dir.get())
+        app_root = Path(self.app_root.get())
+        if not app_root.is_dir():
+            messagebox.showerror("错误", f"游戏根目录不存在: {app_root}")
+            return
+        include_abdata = messagebox.askyesno(
+            "孤立文件", "是否同时扫描 abdata？\n（其中大部分是游戏本体文件，通常不需要扫描）"
+        )
+        self.list_status.config(text="正在扫描...")
+
+        def _run():
+            try:
+                orphans = self.manager.scan_orphans(meta_path, app_root, include_abdata)
+            except Exception as e:
+                self.log(f"\n发生错误: {str(e)}")
+                self.root.after(0, lambda: self.list_status.config(text=""))
+                messagebox.showerror("错误", f"扫描失败: {str(e)}")
+                return
+            self.root.after(0, lambda: self.show_orphans(orphans, meta_path, app_root))
+
+        threading.Thread(target=_run, daemon=True).start()
+
+    def show_orphans(self, orphans, meta_path, app_root):
+        """列出孤立文件，可把选中的文件收编为新资源包或删除"""
+        self.list_status.config(text="")
+        if not orphans:
+            messagebox.showinfo("孤立文件", "没有孤立文件。")
+            return
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title("孤立文件")
+        dialog.geometry("900x600")
+        dialog.transient(self.root)
+
+        summary = ttk.Label(dialog)
+        summary.pack(fill="x", padx=10, pady=5)
+        tree = ttk.Treeview(dialog, columns=("dest", "size"), show="headings")
+        tree.heading("dest", text="文件")
+        tree.heading("size", text="大小")
+        tree.column("dest", width=700)
+        tree.column("size", width=100, anchor="e")
+        tree.pack(fill="both", expand=True, padx=10, pady=5)
+        rows = {}
+        for o in orphans:
+            rows[tree.insert("", "end", values=(o["dest"], format_size(o["size"])))] = o
+
+        def update_summary():
+            remaining = [rows[iid] for iid in tree.get_children()]
+            summary.config(
+                text=f"共 {len(remaining)} 个文件，"
+                f"{format_size(sum(o['size'] for o in remaining))}（可多选）"
+            )
+
+        def selected():
+            return tree.selection() or tree.get_children()
+
+        def on_adopt():
+            items = selected()
+            name = simpledialog.askstring(
+                "收编为资源包", f"为 {len(items)} 个文件创建资源包记录，名称：", parent=dialog
+            )
+            if not name:
+                return
+            try:
+                result = self.manager.adopt_orphans(
+                    meta_path, app_root, [rows[iid]["dest"] for iid in items], name,
+                    log_func=self.log,
+                )
+            except Exception as e:
+                messagebox.showerror("错误", f"收编失败: {str(e)}", parent=dialog)
+                return
+            # 已被其他元数据记录或已不存在的文件不再是孤立文件，一并移出列表
+            tree.delete(*items)
+            update_summary()
+            self.refresh_package_list()
+            if result["meta_path"]:
+                messagebox.showinfo(
+                    "完成",
+                    f"已收编 {len(result['adopted'])} 个文件，"
+                    f"资源包记录: {result['meta_path'].name}",
+                    parent=dialog,
+                )
+            else:
+                messagebox.showwarning(
+                    "收编", "没有收编任何文件（文件已被其他元数据记录或已不存在）。", parent=dialog
+                )
+
+        def on_delete():
+            items = selected()
+            if not messagebox.askyesno(
+                "确认删除", f"确定要删除 {len(items)} 个文件吗？此操作不可撤销。", parent=dialog
+            ):
+                return
+            try:
+                result = self.manager.delete_orphans(
+                    meta_path, app_root, [rows[iid]["dest"] for iid in items], log_func=self.log
+                )
+            except Exception as e:
+                messagebox.showerror("错误", f"删除失败: {str(e)}", parent=dialog)
+                return
+            failed = {f["dest"] for f in result["failed"]}
+            tree.delete(*[iid for iid in items if rows[iid]["dest"] not in failed])
+            update_summary()
+            if failed:
+                messagebox.showwarning(
+                    "删除完成", f"{len(failed)} 个文件删除失败，详见运行日志。", parent=dialog
+                )
+
+        frame_buttons = ttk.Frame(dialog)
+        frame_buttons.pack(fill="x", padx=10, pady=5)
+        ttk.Label(frame_buttons, text="未选中时对全部文件操作", style="Hint.TLabel").pack(
+            side="left"
+        )
+        ttk.Button(frame_buttons, text="删除", command=on_delete).pack(side="right", padx=5)
+        ttk.Button(frame_buttons, text="收编为资源包", command=on_adopt).pack(
+            side="right", padx=5
+        )
+        update_summary()
+
     def on_tab_changed(self, event):
-        selected_tab = self.notebook.index(self.notebook.select())
+        selected_tab = self.notebook.select()
         self.save_settings()
-        if selected_tab == 1:  # 资源包列表 Tab 的索引
+        if selected_tab == str(self.tab_list):
             self.refresh_package_list()
+        elif selected_tab == str(self.tab_gallery):
+            self.refresh_gallery()
+
+    def refresh_gallery(self):
+        """重新读取人物卡列表（只读取摘要，图片在滚动到可视区域时才加载）"""
+        packages = [
+            pkg
+            for pkg in self.manager.get_package_list(self.meta_dir.get())
+            if pkg.get("type") == PackageType.CHARACTER.value
+        ]
+        packages.sort(key=lambda p: p.get("name", "").lower())
+        self.gallery.set_packages(packages, self.app_root.get())
+
+    def open_gallery_package(self, pkg):
+        self.view_metadata(pkg["meta_path"])
+
+    def view_metadata(self, meta_path):
+        """打开元数据文件；紧凑格式先导出为可读的 JSON 再打开"""
+        if not os.path.exists(meta_path):
+            messagebox.showerror("错误", f"文件不存在: {meta_path}")
+            return
+        try:
+            os.startfile(self.manager.export_metadata(meta_path))
+        except Exception as e:
+            messagebox.showerror("错误", f"打开元数据失败: {e}")
 
     def refresh_package_list(self):
-        # 清空现有数据
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        """重新读取资源包，只对变化的行执行插入、更新和删除
 
+        行的 iid 即元数据路径；滚动位置和选中项在刷新后保持不变。
+        """
         packages = self.manager.get_package_list(self.meta_dir.get())
-        filter_type = self.list_filter_type.get()
-
+        rows = {pkg["meta_path"]: self.package_row_values(pkg) for pkg in packages}
+
+        removed = [iid for iid in self.list_rows if iid not in rows]
+        if removed:
+            self.tree.delete(*removed)
+        for iid in removed:
+            self.list_search_index.remove(iid)
+            del self.list_sort_keys[iid]
         for pkg in packages:
-            # 筛选逻辑
-            if filter_type != PackageType.ALL.value and pkg.get("type") != filter_type:
-                continue
+            iid = pkg["meta_path"]
+            values = rows[iid]
+            old = self.list_rows.get(iid)
+            if old is None:
+                self.tree.insert("", "end", iid=iid, values=values)
+            elif old != values:
+                self.tree.item(iid, values=values)
+            self.list_sort_keys[iid] = self.package_sort_keys(pkg)
+            # 名称、SID、类型
+            self.list_search_index.add(iid, values[:3])
+
+        self.list_rows = rows
+        # 记录原始顺序
+        self.original_order = list(rows)
+        self.apply_list_view()
 
-            date_display = pkg["created_at"]
-            try:
-                dt = datetime.fromisoformat(pkg["created_at"])
-                date_display = dt.strftime("%Y-%m-%d %H:%M:%S")
-            except:
-                pass
-
-            status_val = pkg.get("status")
-            if status_val == PackageStatus.DRY_RUN.value:
-                status_display = "模拟"
-            elif status_val == PackageStatus.CONFLICT.value:
-                # 冲突状态必然是正式安装产生的
-                status_display = "正式 (残留)"
-            else:
-                status_display = "正式"
+    def package_row_values(self, pkg):
+        """资源包摘要对应的表格行"""
+        date_display = pkg["created_at"]
+        try:
+            dt = datetime.fromisoformat(pkg["created_at"])
+            date_display = dt.strftime("%Y-%m-%d %H:%M:%S")
+        except:
+            pass
 
-            self.tree.insert(
-                "",
-                "end",
-                values=(
-                    pkg["name"],
-                    pkg["sid"],
-                    pkg.get("type", "未知"),
-                    date_display,
-                    pkg["file_count"],
-                    status_display,
-                    "👁查看 🗑删除",
-                    pkg["meta_path"],
-                ),
-            )
+        status_val = pkg.get("status")
+        if status_val == PackageStatus.DRY_RUN.value:
+            status_display = "模拟"
+        elif status_val == PackageStatus.CONFLICT.value:
+            # 冲突状态必然是正式安装产生的
+            status_display = "正式 (残留)"
+        else:
+            status_display = "正式"
+
+        return (
+            pkg["name"],
+            pkg["sid"],
+            pkg.get("type", "未知"),
+            date_display,
+            pkg["file_count"],
+            status_display,
+            "👁查看 🗑删除",
+            pkg["meta_path"],
+        )
 
-        # 记录原始顺序
-        self.original_order = list(self.tree.get_children(""))
-
-        # 默认选中第一行
-        children = self.tree.get_children()
-        if children:
-            self.tree.selection_set(children[0])
-            self.tree.focus(children[0])
-            self.tree.see(children[0])
+    def package_sort_keys(self, pkg):
+        """预先计算各列的排序键，点击表头时无需读取控件内容"""
+        try:
+            created = datetime.fromisoformat(pkg["created_at"]).timestamp()
+        except (TypeError, ValueError, OSError):
+            created = 0.0
+        file_count = pkg.get("file_count")
+        return {
+            "name": pkg.get("name", "").lower(),
+            "sid": pkg.get("sid", "").lower(),
+            "type": pkg.get("type") or "",
+            "date": created,
+            "files": file_count if isinstance(file_count, int) else 0,
+            "status": STATUS_SORT_RANK.get(pkg.get("status"), len(STATUS_SORT_RANK)),
+        }
+
+    def on_list_search_change(self):
+        """搜索框输入变化时延迟过滤，连续输入只触发一次"""
+        if self.list_search_job is not None:
+            self.root.after_cancel(self.list_search_job)
+        self.list_search_job = self.root.after(
+            SEARCH_DEBOUNCE_MS, self.apply_list_search
+        )
+
+    def apply_list_search(self):
+        self.list_search_job = None
+        self.apply_list_view()
+
+    def apply_list_view(self):
+        """按当前筛选和排序重新挂载行（不重新读取资源包）
+
+        被筛掉的行只是从树上摘下，仍保留在模型中。
+        """
+        filter_type = self.list_filter_type.get()
+        query = self.list_search.get().strip()
+        matches = self.list_search_index.search(query) if query else None
+        visible = [
+            iid
+            for iid in self.original_order
+            if (
+                filter_type == PackageType.ALL.value
+                or self.list_rows[iid][2] == filter_type
+            )
+            and (matches is None or iid in matches)
+        ]
+        if self.list_sort:
+            col, reverse = self.list_sort
+            keys = self.list_sort_keys
+            visible.sort(key=lambda iid: keys[iid][col], reverse=reverse)
+
+        if list(self.tree.get_children("")) != visible:
+            yview = self.tree.yview()[0]
+            # 一次性设置子节点，不在列表中的行会被摘下而不是删除
+            self.tree.set_children("", *visible)
+            self.tree.yview_moveto(yview)
+
+        visible_set = set(visible)
+        selected = [iid for iid in self.tree.selection() if iid in visible_set]
+        if selected:
+            if len(selected) != len(self.tree.selection()):
+                self.tree.selection_set(selected)
+            self.on_tree_select()
+        elif visible:
+            # 默认选中第一行
+            self.tree.selection_set(visible[0])
+            self.tree.focus(visible[0])
+            self.tree.see(visible[0])
             self.on_tree_select()
         else:
+            self.tree.selection_set(())
             # 如果没有数据，清空预览
             self.list_preview_label.config(image="", text="列表为空")
 
@@ -172,24 +632,97 @@ class AddPackageGUI:
                     cell_width = bbox[2]
                     if cell_x < cell_width / 2:
                         # 查看逻辑
-                        if os.path.exists(meta_path):
-                            os.startfile(meta_path)
-                        else:
-                            messagebox.showerror("错误", f"文件不存在: {meta_path}")
+                        self.view_metadata(meta_path)
                     else:
                         # 删除逻辑
                         if messagebox.askyesno(
                             "确认删除",
                             f"确定要删除资源包 {values[0]} 吗？\n这将删除所有已安装的文件和目录。",
                         ):
-                            success, msg = self.manager.delete_package(
-                                meta_path, self.app_root.get()
-                            )
-                            if success:
-                                messagebox.showinfo("成功", msg)
-                                self.refresh_package_list()
-                            else:
-                                messagebox.showerror("错误", msg)
+                            self.start_delete([meta_path], values[0])
+
+    def delete_selected(self):
+        """批量卸载列表中选中的资源包（一次确认，一个批次）"""
+        selected = list(self.tree.selection())
+        if not selected:
+            messagebox.showinfo("提示", "请先在列表中选择要删除的资源包")
+            return
+        names = [self.list_rows[iid][0] for iid in selected]
+        preview = "\n".join(names[:10])
+        if len(names) > 10:
+            preview += f"\n... 等共 {len(names)} 个"
+        if messagebox.askyesno(
+            "确认删除",
+            f"确定要删除以下 {len(names)} 个资源包吗？\n这将删除所有已安装的文件和目录。\n\n{preview}",
+        ):
+            self.start_delete(selected, f"{len(names)} 个资源包")
+
+    def start_delete(self, meta_paths, label):
+        """在后台线程中卸载资源包，界面保持响应"""
+        if self.deleting:
+            messagebox.showinfo("提示", "正在卸载其他资源包，请稍候")
+            return
+        self.deleting = True
+        self.list_status.config(text=f"正在卸载 {label}...")
+        self.list_progress.config(value=0)
+        threading.Thread(
+            target=self.run_delete_thread,
+            args=(meta_paths, label, self.app_root.get()),
+            daemon=True,
+        ).start()
+
+    def run_delete_thread(self, meta_paths, label, app_root):
+        def progress(event):
+            # 事件已按间隔节流，只需转交主线程
+            self.root.after(0, self.update_delete_progress, label, event)
+
+        try:
+            results = self.manager.delete_packages(
+                meta_paths, app_root, progress_func=progress
+            )
+        except Exception as e:
+            results = [
+                {"meta_path": p, "success": False, "message": f"删除失败: {e}"}
+                for p in meta_paths
+            ]
+        self.root.after(0, self.finish_delete, results)
+
+    def update_delete_progress(self, label, event):
+        self.list_status.config(text=f"正在卸载 {label}: {format_progress(event)}")
+        self.list_progress.config(
+            maximum=PROGRESS_SCALE, value=progress_fraction(event) * PROGRESS_SCALE
+        )
+
+    def finish_delete(self, results):
+        self.deleting = False
+        self.list_status.config(text="")
+        self.list_progress.config(value=0)
+        if len(results) == 1:
+            result = results[0]
+            if result["success"]:
+                messagebox.showinfo("成功", result["message"])
+            else:
+                messagebox.showerror("错误", result["message"])
+        else:
+            ok = [r for r in results if r["success"] and not r.get("status")]
+            conflict = [
+                r for r in results if r.get("status") == PackageStatus.CONFLICT.value
+            ]
+            failed = [r for r in results if not r["success"]]
+            lines = [
+                f"已卸载: {len(ok)}",
+                f"有文件保留 (冲突): {len(conflict)}",
+                f"失败: {len(failed)}",
+            ]
+            details = [
+                f"{Path(r['meta_path']).name}: {r['message']}" for r in conflict + failed
+            ]
+            if details:
+                lines.append("")
+                lines.extend(details[:20])
+            show = messagebox.showwarning if conflict or failed else messagebox.showinfo
+            show("批量卸载完成", "\n".join(lines))
+        self.refresh_package_list()
 
     def reset_tree_hover(self):
         """重置表格的悬停高亮状态"""
@@ -255,10 +788,7 @@ class AddPackageGUI:
 
                 if column != "#7":
                     # 双击非操作列默认执行查看
-                    if os.path.exists(meta_path):
-                        os.startfile(meta_path)
-                    else:
-                        messagebox.showerror("错误", f"文件不存在: {meta_path}")
+                    self.view_metadata(meta_path)
 
     def treeview_sort_column(self, col, state):
         """表格排序逻辑: asc -> desc -> original"""
@@ -273,8 +803,8 @@ class AddPackageGUI:
 
         if state == "original":
             # 恢复原始顺序
-            for index, k in enumerate(self.original_order):
-                self.tree.move(k, "", index)
+            self.list_sort = None
+            self.apply_list_view()
 
             # 重置所有表头图标和命令
             for c_id, c_name in columns.items():
@@ -285,22 +815,8 @@ class AddPackageGUI:
                 )
             return
 
-        # 获取所有行的数据
-        l = [(self.tree.set(k, col), k) for k in self.tree.get_children("")]
-
-        reverse = state == "desc"
-
-        # 根据列类型进行排序
-        if col == "files":
-            l.sort(
-                key=lambda t: int(t[0]) if str(t[0]).isdigit() else 0, reverse=reverse
-            )
-        else:
-            l.sort(reverse=reverse)
-
-        # 重新排列项目
-        for index, (val, k) in enumerate(l):
-            self.tree.move(k, "", index)
+        self.list_sort = (col, state == "desc")
+        self.apply_list_view()
 
         # 更新表头图标和下一次点击的命令
         next_state = "desc" if state == "asc" else "original"
@@ -343,6 +859,17 @@ class AddPackageGUI:
         self.tab_import = ttk.Frame(self.notebook)
         self.notebook.add(self.tab_import, text="导入资源包")
 
+        # 3. "人物卡图库" Tab
+        self.tab_gallery = ttk.Frame(self.notebook)
+        self.notebook.add(self.tab_gallery, text="人物卡图库")
+        self.gallery = CardGallery(
+            self.tab_gallery,
+            self.load_list_preview,
+            self.photo_from_result,
+            self.open_gallery_package,
+        )
+        self.gallery.frame.pack(fill="both", expand=True, padx=5, pady=5)
+
         # 资源包列表筛选工具栏
         frame_filter = ttk.Frame(self.tab_list)
         frame_filter.pack(fill="x", **padding)
@@ -379,6 +906,28 @@ class AddPackageGUI:
         ttk.Button(
             frame_list_tools, text="打开元数据目录", command=self.open_meta_dir
         ).pack(side="left", padx=5)
+        ttk.Button(
+            frame_list_tools, text="删除选中", command=self.delete_selected
+        ).pack(side="left", padx=5)
+        ttk.Button(
+            frame_list_tools, text="重叠报告", command=self.show_overlap_report
+        ).pack(side="left", padx=5)
+        ttk.Button(
+            frame_list_tools, text="完整性校验", command=self.verify_installed
+        ).pack(side="left", padx=5)
+        ttk.Button(
+            frame_list_tools, text="孤立文件", command=self.scan_orphans
+        ).pack(side="left", padx=5)
+        self.list_progress = ttk.Progressbar(
+            frame_list_tools, length=200, mode="determinate"
+        )
+        self.list_progress.pack(side="left", padx=10)
+        self.list_status = ttk.Label(frame_list_tools, text="", style="Hint.TLabel")
+        self.list_status.pack(side="left", padx=5)
+        entry_search = ttk.Entry(frame_list_tools, textvariable=self.list_search, width=30)
+        entry_search.pack(side="right", padx=5)
+        entry_search.bind("<Escape>", lambda e: self.list_search.set(""))
+        ttk.Label(frame_list_tools, text="搜索 (名称/SID/类型):").pack(side="right")
 
         # 列表主区域
         self.frame_list_main = ttk.Frame(self.tab_list)
@@ -391,17 +940,10 @@ class AddPackageGUI:
         # 资源包列表表格
         self.tree = ttk.Treeview(
             self.frame_tree,
-            columns=(
-                "name",
-                "sid",
-                "type",
-                "date",
-                "files",
-                "status",
-                "action",
-                "path",
-            ),
+            columns=LIST_COLUMNS,
             show="headings",
+            # 支持 Ctrl / Shift 多选，用于批量删除
+            selectmode="extended",
         )
         self.tree.heading(
             "name",
@@ -532,6 +1074,9 @@ class AddPackageGUI:
         ttk.Entry(frame_path, textvariable=self.source_path).pack(
             side="left", fill="x", expand=True, padx=5
         )
+        ttk.Button(
+            frame_path, text="选择压缩包...", command=self.browse_archive
+        ).pack(side="right", padx=5)
         ttk.Button(frame_path, text="浏览...", command=self.browse_source).pack(
             side="right", padx=5
         )
@@ -613,6 +1158,52 @@ class AddPackageGUI:
         )
         # 初始状态由 on_dry_run_change 决定
 
+        # 批量导入队列
+        frame_queue = ttk.LabelFrame(self.tab_import, text="批量导入队列")
+        frame_queue.pack(fill="x", **padding)
+
+        frame_queue_tools = ttk.Frame(frame_queue)
+        frame_queue_tools.pack(fill="x", padx=5, pady=2)
+        ttk.Button(
+            frame_queue_tools, text="添加目录...", command=self.queue_add_folder
+        ).pack(side="left", padx=5)
+        ttk.Button(
+            frame_queue_tools, text="添加子目录...", command=self.queue_add_children
+        ).pack(side="left", padx=5)
+        ttk.Button(
+            frame_queue_tools, text="添加压缩包...", command=self.queue_add_archives
+        ).pack(side="left", padx=5)
+        ttk.Button(
+            frame_queue_tools, text="移除选中", command=self.queue_remove_selected
+        ).pack(side="left", padx=5)
+        ttk.Button(frame_queue_tools, text="清空队列", command=self.queue_clear).pack(
+            side="left", padx=5
+        )
+        self.btn_queue_install = ttk.Button(
+            frame_queue_tools, text="批量安装", command=self.start_queue_process
+        )
+        self.btn_queue_install.pack(side="right", padx=5)
+
+        self.queue_tree = ttk.Treeview(
+            frame_queue,
+            columns=("name", "sid", "type", "state", "source"),
+            show="headings",
+            height=5,
+        )
+        for col, text, width in (
+            ("name", "名称", 200),
+            ("sid", "SID", 250),
+            ("type", "类型", 80),
+            ("state", "状态", 200),
+            ("source", "来源", 500),
+        ):
+            self.queue_tree.heading(col, text=text)
+            self.queue_tree.column(col, width=width)
+        self.queue_tree.pack(fill="x", padx=5, pady=2)
+        # 队列项 id -> {"name", "sid", "type", "source", "state"}
+        # Treeview 只用于显示：Tk 会把 "01" 这类值转换成数字，不能从中读回原始字符串
+        self.queue_jobs = {}
+
         # 日志输出
         frame_log = ttk.LabelFrame(self.tab_import, text="运行日志")
         frame_log.pack(fill="both", expand=True, **padding)
@@ -620,6 +1211,16 @@ class AddPackageGUI:
         self.log_text = tk.Text(frame_log, height=10, state="disabled")
         self.log_text.pack(fill="both", expand=True, padx=5, pady=5)
 
+        # 安装进度
+        frame_progress = ttk.Frame(self.tab_import)
+        frame_progress.pack(fill="x", **padding)
+        self.install_progress = ttk.Progressbar(
+            frame_progress, maximum=PROGRESS_SCALE, mode="determinate"
+        )
+        self.install_progress.pack(side="left", fill="x", expand=True, padx=5)
+        self.install_status = ttk.Label(frame_progress, text="", width=60)
+        self.install_status.pack(side="left", padx=5)
+
         # 操作按钮
         frame_actions = ttk.Frame(self.tab_import)
         frame_actions.pack(pady=10)
@@ -631,6 +1232,15 @@ class AddPackageGUI:
             side="left", padx=10
         )
 
+    def install_progress_callback(self, name):
+        """返回传给 install() 的 progress_func：事件已按间隔节流，只需转交主线程"""
+        return lambda event: self.root.after(0, self.update_install_progress, name, event)
+
+    def update_install_progress(self, name, event):
+        self.install_progress.config(value=progress_fraction(event) * PROGRESS_SCALE)
+        state = "完成" if event["finished"] else "安装中"
+        self.install_status.config(text=f"{name} {state}: {format_progress(event)}")
+
     def clear_log(self):
         """清除运行日志"""
         self.log_text.config(state="normal")
@@ -664,7 +1274,7 @@ class AddPackageGUI:
 
         # 确保预览面板的显示状态与变量同步
         self.on_list_preview_toggle(save=False)
-        self.refresh_package_list()
+        self.apply_list_view()
 
     def on_list_preview_toggle(self, save=True):
         """列表预览开关切换时触发"""
@@ -685,7 +1295,7 @@ class AddPackageGUI:
             self.frame_list_preview.pack_forget()
 
     def on_tree_select(self, event=None):
-        """列表选中项改变时更新预览"""
+        """列表选中项改变时更新预览（解析与解码在后台线程进行）"""
         if (
             not self.show_card_view.get()
             or self.list_filter_type.get() != PackageType.CHARACTER.value
@@ -694,71 +1304,152 @@ class AddPackageGUI:
 
         selected = self.tree.selection()
         if not selected:
+            self.preview_loader.cancel()
             self.list_preview_label.config(image="", text="未选择项目")
             return
 
-        item = self.tree.item(selected[0])
-        values = item["values"]
+        item_id = selected[0]
+        values = self.tree.item(item_id)["values"]
         pkg_type = values[2]
-        meta_path = values[7]
+        meta_path = str(values[7])
 
         if pkg_type != PackageType.CHARACTER.value:
+            self.preview_loader.cancel()
             self.list_preview_label.config(image="", text="该类型不支持预览")
             return
 
+        # 预取相邻行，方向键连续浏览时可直接命中缓存
+        app_root = self.app_root.get()
+        prefetch = []
+        for neighbour in (self.tree.next(item_id), self.tree.prev(item_id)):
+            if not neighbour:
+                continue
+            n_values = self.tree.item(neighbour)["values"]
+            if n_values[2] != PackageType.CHARACTER.value:
+                continue
+            n_key = self.preview_cache_key(str(n_values[7]))
+            if n_key and self.photo_cache.get(n_key) is None:
+                prefetch.append((n_key, (str(n_values[7]), app_root)))
+
+        key = self.preview_cache_key(meta_path)
+        photo = self.photo_cache.get(key) if key else None
+        if photo is not None:
+            self.list_preview_label.config(image=photo, text="")
+            self.list_preview_label.image = photo
+            self.preview_loader.request(prefetch=prefetch)
+            return
+
+        self.list_preview_label.config(image="", text="加载中...")
+        self.preview_loader.request(
+            key or ("meta", meta_path, None), (meta_path, app_root), prefetch
+        )
+
+    def preview_cache_key(self, meta_path):
+        """列表预览图的缓存键，元数据文件变化后自动失效"""
         try:
-            with open(meta_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            return ("meta", meta_path, os.stat(meta_path).st_mtime_ns)
+        except OSError:
+            return None
+
+    def resolve_card_image(self, meta_path, app_root):
+        """根据元数据找到人物卡图片，返回 (图片路径或数据流, 缓存键对应的来源文件)
 
+        在后台线程执行，不能访问 Tk 控件。
+        """
+        data = read_meta(meta_path)
+
+        png_path = None
+        key_path = None  # 缓存键对应的来源文件，压缩包内的图片以压缩包为准
+        status = data.get("status")
+
+        if status == PackageStatus.DRY_RUN.value:
+            # 模拟数据：从原始路径（目录或压缩包）加载
+            source_path = data.get("source_path")
+            if source_path and os.path.exists(source_path):
+                png_path = find_card_image(source_path)
+                if is_archive(source_path):
+                    key_path = source_path
+        else:
+            # 正式数据：从安装目标路径加载
+            png_candidates = []
+            for f_info in data.get("files", []):
+                dest = f_info.get("dest")
+                if dest and dest.lower().endswith(".png"):
+                    # 统一路径分隔符进行匹配
+                    norm_dest = dest.replace("\\", "/")
+                    if "userdata/chara" in norm_dest.lower():
+                        png_candidates.append(dest)
+
+            # 优先级：female > male > 其他
+            png_candidates.sort(
+                key=lambda x: (
+                    0 if "female" in x.lower() else 1 if "male" in x.lower() else 2
+                )
+            )
+
+            if png_candidates:
+                png_path = Path(app_root) / png_candidates[0]
+
+        if isinstance(png_path, Path) and not png_path.exists():
             png_path = None
-            status = data.get("status")
-
-            if status == PackageStatus.DRY_RUN.value:
-                # 模拟数据：从原始路径加载
-                source_path = data.get("source_path")
-                if source_path and os.path.exists(source_path):
-                    src_pngs = list(Path(source_path).rglob("*.png"))
-                    # 优先级：female > male > 其他
-                    src_pngs.sort(
-                        key=lambda x: (
-                            0
-                            if "female" in str(x).lower()
-                            else 1 if "male" in str(x).lower() else 2
+        return png_path, key_path or png_path
+
+    def load_list_preview(self, meta_path, app_root, height=400):
+        """后台线程：解析并解码列表预览图
+
+        返回 PIL 图像；没有 PIL 时返回图片路径或数据流交给主线程处理；
+        找不到图片时返回提示文本。
+        """
+        png_path, key_path = self.resolve_card_image(meta_path, app_root)
+        if not png_path:
+            return "未找到人物卡预览图"
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            return png_path
+        # 列表页预览图高度可以稍微大一点，或者保持一致
+        return self.thumbnails.get(key_path, height, lambda: png_path)
+
+    def poll_preview(self):
+        """处理后台预览线程返回的结果（在 Tk 主线程中创建 PhotoImage）"""
+        try:
+            while True:
+                token, key, result, is_prefetch = self.preview_loader.results.get_nowait()
+                is_current = not is_prefetch and token == self.preview_loader.token
+                if isinstance(result, Exception):
+                    if is_current:
+                        self.list_preview_label.config(image="", text=f"加载失败: {result}")
+                    continue
+                if isinstance(result, str):
+                    if is_current:
+                        self.list_preview_label.config(image="", text=result)
+                    continue
+                try:
+                    photo = self.photo_from_result(result)
+                except Exception as e:
+                    if is_current:
+                        self.list_preview_label.config(
+                            image="", text=f"图片加载失败: {e}"
                         )
-                    )
-                    if src_pngs:
-                        png_path = src_pngs[0]
-            else:
-                # 正式数据：从安装目标路径加载
-                app_root = Path(self.app_root.get())
-                png_candidates = []
-                for f_info in data.get("files", []):
-                    dest = f_info.get("dest")
-                    if dest and dest.lower().endswith(".png"):
-                        # 统一路径分隔符进行匹配
-                        norm_dest = dest.replace("\\", "/")
-                        if "userdata/chara" in norm_dest.lower():
-                            png_candidates.append(dest)
-
-                # 优先级：female > male > 其他
-                png_candidates.sort(
-                    key=lambda x: (
-                        0 if "female" in x.lower() else 1 if "male" in x.lower() else 2
-                    )
-                )
+                    continue
+                if key[2] is not None:
+                    self.photo_cache.put(key, photo)
+                if is_current:
+                    self.list_preview_label.config(image=photo, text="")
+                    self.list_preview_label.image = photo
+        except queue.Empty:
+            pass
+        self.root.after(PREVIEW_POLL_INTERVAL, self.poll_preview)
 
-                if png_candidates:
-                    png_path = app_root / png_candidates[0]
+    def photo_from_result(self, result):
+        if hasattr(result, "size") and hasattr(result, "mode"):
+            from PIL import ImageTk
 
-            if png_path and os.path.exists(png_path):
-                # 列表页预览图高度可以稍微大一点，或者保持一致
-                self.load_image_to_label(
-                    png_path, self.list_preview_label, target_height=400
-                )
-            else:
-                self.list_preview_label.config(image="", text="未找到人物卡预览图")
-        except Exception as e:
-            self.list_preview_label.config(image="", text=f"加载失败: {e}")
+            return ImageTk.PhotoImage(result)
+        # 没有 PIL：回退到 Tkinter 原生 PhotoImage (功能有限)
+        if hasattr(result, "read"):
+            return tk.PhotoImage(data=result.read())
+        return tk.PhotoImage(file=str(result))
 
     def on_import_preview_toggle(self, save=True):
         """导入页预览开关切换时触发"""
@@ -786,48 +1477,57 @@ class AddPackageGUI:
             self.import_preview_label.config(image="", text="请先选择资源包")
             return
 
-        # 在源目录中寻找 PNG
-        png_path = None
-        for p in Path(source).rglob("*.png"):
-            if "userdata\\chara" in str(p).lower():
-                png_path = p
-                break
+        # 在源目录或压缩包中寻找 PNG
+        png_path = find_card_image(source) if os.path.exists(source) else None
 
-        if png_path and png_path.exists():
+        if png_path:
             # 导入页预览图高度略小于左侧表单的高度 (约 180 像素)
             self.load_image_to_label(
-                png_path, self.import_preview_label, target_height=180
+                png_path,
+                self.import_preview_label,
+                target_height=180,
+                key_path=source if is_archive(source) else None,
             )
         else:
             self.import_preview_label.config(image="", text="未找到人物卡预览图")
 
-    def load_image_to_label(self, path, label, target_height=None):
-        """加载并缩放图片到 Label"""
+    def load_image_to_label(self, path, label, target_height=None, key_path=None):
+        """加载并缩放图片到 Label
+
+        path 可以是文件路径或压缩包中读出的图片数据流；key_path 为决定缓存是否失效的
+        来源文件（默认即 path）。重复预览直接使用内存中的 PhotoImage，内存未命中时
+        优先读取磁盘上的缩略图，不再解码原始人物卡。
+        """
         try:
-            # 使用 PIL 进行高质量缩放 (如果可用)
-            try:
-                from PIL import Image, ImageTk
-
-                img = Image.open(str(path))
-
-                if target_height:
-                    # 按比例缩放
-                    w, h = img.size
-                    ratio = target_height / h
-                    new_w = int(w * ratio)
-                    img = img.resize((new_w, target_height), Image.Resampling.LANCZOS)
-
-                photo = ImageTk.PhotoImage(img)
-                label.config(image=photo, text="")
-                label.image = photo
-            except ImportError:
-                # 回退到 Tkinter 原生 PhotoImage (功能有限)
-                img = tk.PhotoImage(file=str(path))
-                label.config(image=img, text="")
-                label.image = img
+            key_path = key_path or path
+            st = os.stat(key_path)
+            cache_key = (str(key_path), st.st_mtime_ns, target_height)
+            photo = self.photo_cache.get(cache_key)
+            if photo is None:
+                photo = self.create_photo(path, target_height, key_path)
+                self.photo_cache.put(cache_key, photo)
+            label.config(image=photo, text="")
+            label.image = photo
         except Exception as e:
             label.config(image="", text=f"图片加载失败: {e}")
 
+    def create_photo(self, path, target_height, key_path):
+        """解码图片并生成 PhotoImage"""
+        # 使用 PIL 进行高质量缩放 (如果可用)
+        try:
+            from PIL import Image, ImageTk
+
+            if target_height:
+                img = self.thumbnails.get(key_path, target_height, lambda: path)
+            else:
+                img = Image.open(path if hasattr(path, "read") else str(path))
+            return ImageTk.PhotoImage(img)
+        except ImportError:
+            # 回退到 Tkinter 原生 PhotoImage (功能有限)
+            if hasattr(path, "read"):
+                return tk.PhotoImage(data=path.read())
+            return tk.PhotoImage(file=str(path))
+
     def save_settings(self):
         """保存当前设置到配置文件"""
         config = self.manager.config
@@ -853,11 +1553,21 @@ class AddPackageGUI:
             self.create_meta_on_dry_run.set(False)  # 隐藏时重置为不勾选
 
     def log(self, message):
-        self.log_text.config(state="normal")
-        self.log_text.insert("end", message + "\n")
-        self.log_text.see("end")
-        self.log_text.config(state="disabled")
-        self.root.update_idletasks()
+        """写入日志（可在任意线程调用，由 poll_log 批量显示）"""
+        self.log_sink.write(message)
+
+    def poll_log(self):
+        """定时从日志队列取出一批日志并显示，控件只保留最近 LOG_MAX_LINES 行"""
+        lines = self.log_sink.drain(LOG_BATCH_SIZE)
+        if lines:
+            self.log_text.config(state="normal")
+            self.log_text.insert("end", "\n".join(lines) + "\n")
+            line_count = int(self.log_text.index("end-1c").split(".")[0])
+            if line_count > LOG_MAX_LINES:
+                self.log_text.delete("1.0", f"{line_count - LOG_MAX_LINES}.0")
+            self.log_text.see("end")
+            self.log_text.config(state="disabled")
+        self.root.after(LOG_POLL_INTERVAL, self.poll_log)
 
     def browse_source(self):
         path = filedialog.askdirectory()
@@ -865,24 +1575,197 @@ class AddPackageGUI:
             self.source_path.set(path)
             self.auto_detect(Path(path).name)
 
+    def browse_archive(self):
+        patterns = " ".join(f"*{suffix}" for suffix in ARCHIVE_SUFFIXES)
+        path = filedialog.askopenfilename(
+            filetypes=[("压缩包", patterns), ("所有文件", "*.*")]
+        )
+        if path:
+            self.source_path.set(path)
+            self.auto_detect(source_stem(path))
+
     def auto_detect(self, folder_name: str):
-        # 尝试匹配女性或男性角色特征 (例如: 名称.HS2ChaF_数字)
-        match = re.search(r"^(.*)\.(HS2Cha[FM]_\d+)$", folder_name)
-        if match:
-            self.name.set(match.group(1))
-            self.sid.set(match.group(2))
-            self.pkg_type.set(PackageType.CHARACTER.value)
-        elif "DHH" in folder_name.upper():
-            self.name.set(folder_name)
-            self.sid.set("")
-            self.pkg_type.set(PackageType.DHH.value)
-        else:
-            # 未检测到标准 SID 格式
-            self.name.set(folder_name)
-            self.sid.set("")  # 设为 None (空字符串)
-            self.pkg_type.set(PackageType.OTHER.value)
+        name, sid, pkg_type = self.manager.detect_package_info(folder_name)
+        self.name.set(name)
+        self.sid.set(sid)
+        self.pkg_type.set(pkg_type)
         self.on_type_change()
 
+    def queue_add_sources(self, paths):
+        """将资源包目录或压缩包加入批量导入队列，已在队列中的来源会被忽略"""
+        queued = {job["source"] for job in self.queue_jobs.values()}
+        for path in paths:
+            path = str(Path(path))
+            if path in queued:
+                continue
+            name, sid, pkg_type = self.manager.detect_package_info(source_stem(path))
+            item = self.queue_tree.insert(
+                "", "end", values=(name, sid, pkg_type, "等待", path)
+            )
+            self.queue_jobs[item] = {
+                "name": name,
+                "sid": sid,
+                "type": pkg_type,
+                "source": path,
+                "state": "等待",
+            }
+            queued.add(path)
+
+    def queue_add_folder(self):
+        path = filedialog.askdirectory()
+        if path:
+            self.queue_add_sources([path])
+
+    def queue_add_children(self):
+        """将所选目录下的每个子目录和压缩包分别加入队列"""
+        parent = filedialog.askdirectory()
+        if not parent:
+            return
+        children = sorted(
+            p
+            for p in Path(parent).iterdir()
+            if p.is_dir() or p.name.lower().endswith(ARCHIVE_SUFFIXES)
+        )
+        self.queue_add_sources(children)
+
+    def queue_add_archives(self):
+        patterns = " ".join(f"*{suffix}" for suffix in ARCHIVE_SUFFIXES)
+        paths = filedialog.askopenfilenames(
+            filetypes=[("压缩包", patterns), ("所有文件", "*.*")]
+        )
+        if paths:
+            self.queue_add_sources(paths)
+
+    def queue_remove_selected(self):
+        for item in self.queue_tree.selection():
+            self.queue_tree.delete(item)
+            self.queue_jobs.pop(item, None)
+
+    def queue_clear(self):
+        for item in self.queue_tree.get_children():
+            self.queue_tree.delete(item)
+        self.queue_jobs.clear()
+
+    def start_queue_process(self):
+        """在后台依次安装队列中的所有资源包"""
+        app_root_val = self.app_root.get()
+        meta_dir_val = self.meta_dir.get()
+        if not app_root_val or not Path(app_root_val).is_dir():
+            messagebox.showerror(
+                "配置错误",
+                f"游戏根目录无效或不存在: {app_root_val}\n请检查 config.json",
+            )
+            return
+        if not meta_dir_val:
+            messagebox.showerror("配置错误", "元数据目录未配置，请检查 config.json")
+            return
+
+        jobs = []
+        for item in self.queue_tree.get_children():
+            job = self.queue_jobs[item]
+            if job["state"] != "等待":
+                continue
+            jobs.append((item, job["source"], job["name"], job["sid"], job["type"]))
+        if not jobs:
+            messagebox.showinfo("提示", "队列中没有等待安装的资源包")
+            return
+
+        Path(meta_dir_val).mkdir(parents=True, exist_ok=True)
+        self.btn_queue_install.config(state="disabled")
+        threading.Thread(
+            target=self.run_queue_thread,
+            args=(jobs, self.create_meta_on_dry_run.get()),
+            daemon=True,
+        ).start()
+
+    def set_queue_state(self, item, state):
+        """从工作线程更新队列项状态（转交 Tk 主线程执行）"""
+
+        def _update():
+            if item in self.queue_jobs:
+                self.queue_jobs[item]["state"] = state
+            if self.queue_tree.exists(item):
+                self.queue_tree.set(item, "state", state)
+
+        self.root.after(0, _update)
+
+    def run_queue_thread(self, jobs, create_meta_on_dry_run):
+        app_root = self.app_root.get()
+        meta_dir = self.meta_dir.get()
+        dry_run = self.dry_run.get()
+
+        # 重复检测只基于开始时的一次快照，并随本次安装的结果更新
+        snapshot = self.manager.get_package_list(meta_dir)
+        names = {pkg["name"] for pkg in snapshot}
+        sids = {pkg["sid"] for pkg in snapshot}
+
+        succeeded, skipped, failed = [], [], []
+        conflict_count = 0
+
+        for seq, (item, source, name, sid, pkg_type) in enumerate(jobs):
+            if pkg_type != PackageType.CHARACTER.value:
+                sid = self.manager.generate_sid(pkg_type, seq)
+            elif not sid:
+                self.set_queue_state(item, "跳过: 缺少 SID")
+                skipped.append(f"{name}: 缺少 SID")
+                continue
+
+            if name in names or sid in sids:
+                self.set_queue_state(item, "跳过: 已存在同名或同 SID")
+                skipped.append(f"{name}: 已存在同名或同 SID 的资源包")
+                continue
+
+            self.set_queue_state(item, "安装中...")
+            try:
+                result = self.manager.install(
+                    source=source,
+                    name=name,
+                    sid=sid,
+                    pkg_type=pkg_type,
+                    app_root=app_root,
+                    meta_dir=meta_dir,
+                    dry_run=dry_run,
+                    create_meta_on_dry_run=create_meta_on_dry_run,
+                    log_func=self.log,
+                    resolve_func=lambda c, n=name: self.resolve_conflicts(c, n),
+                    progress_func=self.install_progress_callback(name),
+                )
+            except Exception as e:
+                self.log(f"\n发生错误: {str(e)}")
+                self.set_queue_state(item, f"失败: {e}")
+                failed.append(f"{name}: {e}")
+                continue
+
+            conflict_count += result["conflicts"]
+            if result["aborted"]:
+                self.set_queue_state(item, "已取消: 文件冲突")
+                skipped.append(f"{name}: 因文件冲突取消安装")
+                continue
+
+            names.add(name)
+            sids.add(sid)
+            if result["failed"]:
+                self.set_queue_state(item, f"完成 ({len(result['failed'])} 个文件失败)")
+                failed.append(f"{name}: {len(result['failed'])} 个文件复制失败")
+            else:
+                self.set_queue_state(item, "完成")
+            succeeded.append(name)
+
+        lines = [
+            f"成功: {len(succeeded)}",
+            f"跳过: {len(skipped)}",
+            f"失败: {len(failed)}",
+            f"文件冲突: {conflict_count}",
+        ]
+        details = skipped + failed
+        if details:
+            lines.append("")
+            lines.extend(details[:20])
+            if len(details) > 20:
+                lines.append(f"... 以及其他 {len(details) - 20} 项，详见运行日志")
+        self.root.after(0, lambda: self.btn_queue_install.config(state="normal"))
+        messagebox.showinfo("批量安装完成", "\n".join(lines))
+
     def start_process(self):
         source = self.source_path.get()
         pkg_type = self.pkg_type.get()
@@ -909,10 +1792,8 @@ class AddPackageGUI:
             if not source:
                 messagebox.showerror("错误", "请先选择资源包目录")
                 return
-            folder_path = Path(source)
-            name = self.name.get() or folder_path.name
-            prefix = "DHH" if pkg_type == PackageType.DHH.value else "Other"
-            sid = f"{prefix}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+            name = self.name.get() or source_stem(source)
+            sid = self.manager.generate_sid(pkg_type)
 
         # 校验配置路径
         if not app_root_val or not Path(app_root_val).is_dir():
@@ -927,18 +1808,16 @@ class AddPackageGUI:
             return
 
         # 检测是否存在同名或同 SID 的资源包
-        existing_packages = self.manager.get_package_list(meta_dir_val)
-        for pkg in existing_packages:
-            if pkg["name"] == name:
-                messagebox.showerror(
-                    "导入失败", f"已存在名称为 '{name}' 的资源包，请先卸载或更改名称。"
-                )
-                return
-            if pkg["sid"] == sid:
-                messagebox.showerror(
-                    "导入失败", f"已存在 SID 为 '{sid}' 的资源包，请先卸载。"
-                )
-                return
+        if self.manager.find_package(meta_dir_val, name=name):
+            messagebox.showerror(
+                "导入失败", f"已存在名称为 '{name}' 的资源包，请先卸载或更改名称。"
+            )
+            return
+        if self.manager.find_package(meta_dir_val, sid=sid):
+            messagebox.showerror(
+                "导入失败", f"已存在 SID 为 '{sid}' 的资源包，请先卸载。"
+            )
+            return
 
         # 元数据目录如果不存在可以尝试创建，或者也要求必须存在
         meta_path = Path(meta_dir_val)
@@ -960,19 +1839,96 @@ class AddPackageGUI:
             daemon=True,
         ).start()
 
+    def resolve_conflicts(self, conflicts, name):
+        """在安装线程中调用：弹出一次冲突对话框并等待用户选择
+
+        返回需要覆盖的目标路径集合，取消安装时返回 None。
+        """
+        done = threading.Event()
+        result = {}
+
+        def finish(value):
+            result["value"] = value
+            done.set()
+
+        self.root.after(0, lambda: self.show_conflict_dialog(conflicts, name, finish))
+        done.wait()
+        return result["value"]
+
+    def show_conflict_dialog(self, conflicts, name, finish):
+        """列出全部冲突文件，用户可选择覆盖全部、覆盖选中、全部跳过或取消安装"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title(f"文件冲突 - {name}")
+        dialog.geometry("900x500")
+        dialog.transient(self.root)
+
+        ttk.Label(
+            dialog,
+            text=f"以下 {len(conflicts)} 个文件已存在且内容不同，请选择要覆盖的文件（可多选）：",
+        ).pack(fill="x", padx=10, pady=5)
+
+        frame = ttk.Frame(dialog)
+        frame.pack(fill="both", expand=True, padx=10)
+        tree = ttk.Treeview(
+            frame,
+            columns=("dest", "owner", "old", "new"),
+            show="headings",
+            selectmode="extended",
+        )
+        tree.heading("dest", text="目标文件")
+        tree.heading("owner", text="所属资源包")
+        tree.heading("old", text="原大小")
+        tree.heading("new", text="新大小")
+        tree.column("dest", width=440)
+        tree.column("owner", width=200)
+        tree.column("old", width=100, anchor="e")
+        tree.column("new", width=100, anchor="e")
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        tree.pack(side="left", fill="both", expand=True)
+        rows = {
+            tree.insert(
+                "",
+                "end",
+                values=(c["dest"], format_owners(c["owners"]), c["old_size"], c["new_size"]),
+            ): c["dest"]
+            for c in conflicts
+        }
+
+        def close(value):
+            dialog.destroy()
+            finish(value)
+
+        frame_buttons = ttk.Frame(dialog)
+        frame_buttons.pack(fill="x", padx=10, pady=10)
+        ttk.Button(
+            frame_buttons,
+            text="全部覆盖",
+            command=lambda: close({c["dest"] for c in conflicts}),
+        ).pack(side="left", padx=5)
+        ttk.Button(
+            frame_buttons,
+            text="覆盖选中",
+            command=lambda: close({rows[i] for i in tree.selection()}),
+        ).pack(side="left", padx=5)
+        ttk.Button(frame_buttons, text="全部跳过", command=lambda: close(set())).pack(
+            side="left", padx=5
+        )
+        ttk.Button(frame_buttons, text="取消安装", command=lambda: close(None)).pack(
+            side="right", padx=5
+        )
+        # 关闭窗口等同于取消安装
+        dialog.protocol("WM_DELETE_WINDOW", lambda: close(None))
+        dialog.grab_set()
+
     def run_install_thread(self, source, name, sid, pkg_type, create_meta_on_dry_run):
         app_root = self.app_root.get()
         meta_dir = self.meta_dir.get()
         dry_run = self.dry_run.get()
 
-        def conflict_callback(rel_dest, old_size, new_size):
-            return messagebox.askyesno(
-                "文件冲突",
-                f"文件已存在:\n{rel_dest}\n\n原大小: {old_size}\n新大小: {new_size}\n是否覆盖?",
-            )
-
         try:
-            self.manager.install(
+            result = self.manager.install(
                 source=source,
                 name=name,
                 sid=sid,
@@ -982,9 +1938,18 @@ class AddPackageGUI:
                 dry_run=dry_run,
                 create_meta_on_dry_run=create_meta_on_dry_run,
                 log_func=self.log,
-                conflict_func=conflict_callback,
+                resolve_func=lambda c: self.resolve_conflicts(c, name),
+                progress_func=self.install_progress_callback(name),
             )
-            messagebox.showinfo("完成", f"资源包 {name} 安装成功！")
+            if result["aborted"]:
+                messagebox.showinfo("已取消", f"资源包 {name} 因文件冲突取消安装，未修改任何文件。")
+            elif result["failed"]:
+                messagebox.showwarning(
+                    "完成",
+                    f"资源包 {name} 安装完成，但有 {len(result['failed'])} 个文件复制失败，详见运行日志。",
+                )
+            else:
+                messagebox.showinfo("完成", f"资源包 {name} 安装成功！")
         except Exception as e:
             self.log(f"\n发生错误: {str(e)}")
             messagebox.showerror("错误", f"安装过程中出错: {str(e)}")
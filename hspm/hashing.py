@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+from .trace import tracer
+
+HASH_ALGORITHM = "blake2b"
+HASH_DIGEST_SIZE = 20
+HASH_CACHE_VERSION = 1
+CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path):
+    """计算文件内容的 BLAKE2b 摘要（十六进制）"""
+    h = hashlib.blake2b(digest_size=HASH_DIGEST_SIZE)
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            h.update(chunk)
+            tracer.count("hash.bytes", len(chunk))
+    tracer.count("hash.files")
+    return h.hexdigest()
+
+
+class HashCache:
+    """以 (路径, 大小, mtime) 为键的持久化文件哈希缓存
+
+    文件大小与 mtime 均未变化时直接返回缓存的摘要，不会重新读取文件内容。
+    """
+
+    def __init__(self, cache_path):
+        self.cache_path = Path(cache_path)
+        self._lock = threading.Lock()
+        self._entries = {}  # 路径 -> [size, mtime_ns, digest]
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        if not self.cache_path.exists():
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if (
+                data.get("version") == HASH_CACHE_VERSION
+                and data.get("algorithm") == HASH_ALGORITHM
+            ):
+                self._entries = data.get("entries", {})
+        except Exception as e:
+            print(f"读取哈希缓存失败: {e}")
+
+    def get(self, path, st=None):
+        """返回文件摘要，必要时重新计算；st 可传入已有的 stat 结果以省去一次 stat"""
+        key = str(path)
+        if st is None:
+            st = os.stat(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+                return entry[2]
+        digest = hash_file(key)
+        self.put(key, st, digest)
+        return digest
+
+    def put(self, path, st, digest):
+        """记录已知的文件摘要（例如复制完成后的目标文件）"""
+        with self._lock:
+            self._entries[str(path)] = [st.st_size, st.st_mtime_ns, digest]
+            self._dirty = True
+
+    def discard(self, path):
+        with self._lock:
+            if self._entries.pop(str(path), None) is not None:
+                self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.cache_path.with_suffix(".tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(
+                        {
+                            "version": HASH_CACHE_VERSION,
+                            "algorithm": HASH_ALGORITHM,
+                            "entries": self._entries,
+                        },
+                        f,
+                        ensure_ascii=False,
+                    )
+                os.replace(tmp_path, self.cache_path)
+                self._dirty = False
+            except Exception as e:
+                print(f"保存哈希缓存失败: {e}")
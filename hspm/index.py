@@ -0,0 +1,244 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+from .metafile import is_meta_file, other_format_paths, read_meta
+from .trace import tracer
+
+# 缓存目录位于元数据目录下，只扫描顶层文件，因此不会被当作资源包
+CACHE_DIR_NAME = ".hspm"
+INDEX_FILE_NAME = "file_index.json"
+INDEX_VERSION = 2
+
+
+def scan_meta_files(meta_dir):
+    """扫描元数据目录，返回 {文件名: (mtime_ns, size)}，只做 stat 不解析内容"""
+    signatures = {}
+    tracer.count("syscall.scandir")
+    try:
+        with os.scandir(meta_dir) as it:
+            for entry in it:
+                if not is_meta_file(entry.name) or not entry.is_file():
+                    continue
+                st = entry.stat()
+                signatures[entry.name] = (st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        pass
+    return signatures
+
+
+def collect_dests(data):
+    """从元数据中收集所有被引用的文件和目录路径"""
+    dests = []
+    for item in data.get("files", []):
+        dest = item.get("dest")
+        if dest:
+            dests.append(dest)
+    for d_info in data.get("dirs", []):
+        dest = d_info.get("dest")
+        if dest:
+            dests.append(dest)
+    return dests
+
+
+def is_package_file(item):
+    """文件项是否为该资源包安装（或已存在且相同）的文件
+
+    因冲突而选择不覆盖的文件并不是该资源包的内容。
+    """
+    if not item.get("dest"):
+        return False
+    status = item.get("status")
+    return status in ("copied", "overwritten") or (
+        status == "skipped" and item.get("message") in ("same size", "same content")
+    )
+
+
+def collect_files(data):
+    """收集资源包记录的文件及其安装时的 [大小, mtime]，用于判断文件是否仍是该包安装的版本
+
+    旧元数据没有记录大小时为 None。
+    """
+    return {
+        item["dest"]: [item.get("size"), item.get("mtime")]
+        for item in data.get("files", [])
+        if is_package_file(item)
+    }
+
+
+class FileIndex:
+    """持久化的 目标路径 -> 所属资源包 索引
+
+    索引保存在 <meta_dir>/.hspm/file_index.json，并记录每个元数据文件的
+    mtime/size。refresh() 只重新解析发生变化的元数据文件，因此即使索引丢失
+    或被外部修改过，也能以元数据 JSON 为准自动重建。
+    """
+
+    def __init__(self, meta_dir):
+        self.meta_dir = Path(meta_dir)
+        self.index_path = self.meta_dir / CACHE_DIR_NAME / INDEX_FILE_NAME
+        self._lock = threading.RLock()
+        self._packages = {}  # 元数据文件名 -> {"mtime_ns", "size", "dests", "files"}
+        self._owners = {}  # 目标路径 -> 所属元数据文件名集合
+        self._loaded = False
+        self._dirty = False
+
+    def _load(self):
+        self._loaded = True
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != INDEX_VERSION:
+                return
+            for name, info in data.get("packages", {}).items():
+                self._add(name, info)
+        except Exception as e:
+            print(f"读取文件索引失败，将重新构建: {e}")
+            self._packages = {}
+            self._owners = {}
+
+    def _add(self, name, info):
+        self._packages[name] = info
+        for dest in info["dests"]:
+            self._owners.setdefault(dest, set()).add(name)
+
+    def _remove(self, name):
+        info = self._packages.pop(name, None)
+        if not info:
+            return
+        for dest in info["dests"]:
+            owners = self._owners.get(dest)
+            if owners is None:
+                continue
+            owners.discard(name)
+            if not owners:
+                del self._owners[dest]
+
+    def refresh(self):
+        """与元数据目录同步：重新读取变化的文件，移除已删除的文件"""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+
+            signatures = scan_meta_files(self.meta_dir)
+
+            for name in list(self._packages):
+                if name not in signatures:
+                    self._remove(name)
+                    self._dirty = True
+
+            for name, (mtime_ns, size) in signatures.items():
+                info = self._packages.get(name)
+                if info and info["mtime_ns"] == mtime_ns and info["size"] == size:
+                    continue
+                tracer.count("meta.parsed")
+                try:
+                    data = read_meta(self.meta_dir / name)
+                except Exception as e:
+                    print(f"读取元数据失败 {name}: {e}")
+                    continue
+                self._remove(name)
+                self._add(
+                    name,
+                    {
+                        "mtime_ns": mtime_ns,
+                        "size": size,
+                        "dests": collect_dests(data),
+                        "files": collect_files(data),
+                    },
+                )
+                self._dirty = True
+
+            self.save()
+
+    def update_package(self, meta_path, data):
+        """元数据写入后调用，直接用内存中的数据更新索引，避免重新解析"""
+        meta_path = Path(meta_path)
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            st = meta_path.stat()
+            self._remove(meta_path.name)
+            # write_meta 会删除其他格式的旧文件
+            for other in other_format_paths(meta_path):
+                self._remove(other.name)
+            self._add(
+                meta_path.name,
+                {
+                    "mtime_ns": st.st_mtime_ns,
+                    "size": st.st_size,
+                    "dests": collect_dests(data),
+                    "files": collect_files(data),
+                },
+            )
+            self._dirty = True
+            self.save()
+
+    def owners(self, dest):
+        """返回引用该路径的元数据文件名集合"""
+        with self._lock:
+            return set(self._owners.get(dest, ()))
+
+    def file_owners(self, dest, exclude=()):
+        """返回记录了该文件的资源包 [(元数据文件名, 大小, mtime)]"""
+        with self._lock:
+            owners = []
+            for name in self._owners.get(dest, ()):
+                if name in exclude:
+                    continue
+                record = self._packages[name].get("files", {}).get(dest)
+                if record is not None:
+                    owners.append((name, record[0], record[1]))
+            return sorted(owners)
+
+    def overlaps(self):
+        """返回被多个资源包记录的文件 {目标路径: [元数据文件名]}（不含目录）"""
+        with self._lock:
+            result = {}
+            for dest, owners in self._owners.items():
+                if len(owners) < 2:
+                    continue
+                names = sorted(
+                    name for name in owners if dest in self._packages[name].get("files", {})
+                )
+                if len(names) > 1:
+                    result[dest] = names
+            return result
+
+    def is_referenced(self, dest, exclude=()):
+        """判断路径是否被 exclude 以外的资源包引用"""
+        with self._lock:
+            owners = self._owners.get(dest)
+            if not owners:
+                return False
+            return any(name not in exclude for name in owners)
+
+    def referenced_dests(self, exclude=()):
+        """返回 exclude 以外的资源包引用的全部路径"""
+        with self._lock:
+            return {
+                dest
+                for dest, owners in self._owners.items()
+                if any(name not in exclude for name in owners)
+            }
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                self.index_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.index_path.with_suffix(".tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(
+                        {"version": INDEX_VERSION, "packages": self._packages},
+                        f,
+                        ensure_ascii=False,
+                    )
+                os.replace(tmp_path, self.index_path)
+                self._dirty = False
+            except Exception as e:
+                print(f"保存文件索引失败: {e}")
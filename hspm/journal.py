@@ -0,0 +1,130 @@
+"""安装日志（预写日志）
+
+正式安装在修改任何文件之前，先把完整的安装计划写入
+<meta_dir>/.hspm/journal/<名称>.<SID>.jsonl 的第一行，之后每放置完一个文件追加一行记录。
+元数据写入后删除日志。进程中途退出时日志会保留下来，下次启动时可据此继续安装
+（已完成的文件不再复制或计算哈希）或回滚。
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from .index import CACHE_DIR_NAME
+
+JOURNAL_DIR_NAME = "journal"
+JOURNAL_SUFFIX = ".jsonl"
+JOURNAL_VERSION = 1
+# 记录落盘（fsync）的最短间隔（秒），每条记录都会立即写入操作系统缓冲
+JOURNAL_SYNC_INTERVAL = 1.0
+
+
+def journal_dir(meta_dir):
+    return Path(meta_dir) / CACHE_DIR_NAME / JOURNAL_DIR_NAME
+
+
+def journal_path(meta_dir, name, sid):
+    return journal_dir(meta_dir) / f"{name}.{sid}{JOURNAL_SUFFIX}"
+
+
+def list_journals(meta_dir):
+    """列出元数据目录下所有未完成安装的日志"""
+    directory = journal_dir(meta_dir)
+    if not directory.exists():
+        return []
+    return sorted(p for p in directory.iterdir() if p.name.endswith(JOURNAL_SUFFIX))
+
+
+def interrupted_error(name, sid):
+    """同名同 SID 的安装被中断、日志仍在时，新的安装需要先继续或回滚"""
+    return FileExistsError(f"资源包 {name} ({sid}) 有未完成的安装，请先继续安装或回滚")
+
+
+def load_journal(path):
+    """读取日志，返回 (计划, {文件项序号: 完成记录})
+
+    最后一行可能因进程退出而不完整，解析失败的行直接忽略。
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("version") != JOURNAL_VERSION:
+            raise ValueError(f"不支持的安装日志版本: {header.get('version')}")
+        done = {}
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            done[record["i"]] = record
+    return header, done
+
+
+class InstallJournal:
+    """追加写入的安装日志，record() 可在复制线程中调用"""
+
+    def __init__(self, path, header=None):
+        """提供 header 时新建日志，否则以追加方式打开已有日志
+
+        同名日志已存在说明上次安装被中断，必须先继续安装或回滚，不能直接覆盖。
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        if header is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                self._file = open(self.path, "x", encoding="utf-8")
+            except FileExistsError:
+                raise interrupted_error(header.get("name"), header.get("sid")) from None
+            self._file.write(
+                json.dumps(dict(header, version=JOURNAL_VERSION), ensure_ascii=False) + "\n"
+            )
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        else:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._last_sync = time.monotonic()
+
+    def record(self, i, dest_stat, digest=None, used_mode=None):
+        """记录第 i 个文件项已放置完成"""
+        record = {
+            "i": i,
+            "mtime": int(dest_stat.st_mtime * 1_000_000),
+            "size": dest_stat.st_size,
+        }
+        if digest:
+            record["hash"] = digest
+        if used_mode:
+            record["link"] = used_mode
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            now = time.monotonic()
+            if now - self._last_sync >= JOURNAL_SYNC_INTERVAL:
+                os.fsync(self._file.fileno())
+                self._last_sync = now
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def discard(self):
+        """安装已完成（或已回滚），删除日志"""
+        self.close()
+        remove_journal(self.path)
+
+
+def remove_journal(path):
+    """删除日志文件，日志目录为空时一并删除"""
+    path = Path(path)
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+    try:
+        path.parent.rmdir()
+    except OSError:
+        pass
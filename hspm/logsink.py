@@ -0,0 +1,65 @@
+import atexit
+import queue
+import threading
+from datetime import datetime
+from pathlib import Path
+
+
+class LogSink:
+    """线程安全的日志队列
+
+    工作线程调用 write() 只做入队和写文件，界面线程定时调用 drain() 批量取出，
+    避免每条日志都触发一次控件重绘。完整日志同时追加到磁盘文件中，
+    使用完毕后调用 close()（或用 with 语句）关闭文件；进程退出时也会自动关闭。
+    """
+
+    def __init__(self, log_dir=None):
+        self._queue = queue.SimpleQueue()
+        self._file_lock = threading.Lock()
+        self._file = None
+        self.log_path = None
+        if log_dir:
+            self.log_path = Path(log_dir) / f"install-{datetime.now():%Y%m%d}.log"
+            try:
+                self.log_path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.log_path, "a", encoding="utf-8")
+                atexit.register(self.close)
+            except Exception as e:
+                print(f"打开日志文件失败: {e}")
+                self.log_path = None
+
+    def write(self, message):
+        self._queue.put(message)
+        if self._file:
+            with self._file_lock:
+                # 关闭之后仍在运行的工作线程只入队，不再写文件
+                if self._file:
+                    self._file.write(f"[{datetime.now():%H:%M:%S}] {message}\n")
+
+    def drain(self, max_items=1000):
+        """取出最多 max_items 条待显示的日志"""
+        lines = []
+        try:
+            while len(lines) < max_items:
+                lines.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        if self._file:
+            with self._file_lock:
+                if self._file:
+                    self._file.flush()
+        return lines
+
+    def close(self):
+        """关闭日志文件，可重复调用"""
+        with self._file_lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,21 +1,71 @@
 import json
-import shutil
+import os
+import re
 import sys
+import threading
 import tomllib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
+from .catalog import PackageCatalog
+from .fileops import LINK_COPY, LINK_MODES, prune_dirs, stat_files, unlink_files
+from .hashing import HASH_ALGORITHM, HashCache
+from .index import CACHE_DIR_NAME, FileIndex, is_package_file, scan_meta_files
+from .journal import (
+    InstallJournal,
+    interrupted_error,
+    journal_path,
+    list_journals,
+    load_journal,
+    remove_journal,
+)
+from .metafile import (
+    META_FORMAT_COMPACT_GZ,
+    META_FORMAT_JSON,
+    META_FORMATS,
+    export_meta,
+    iter_meta_files,
+    meta_filename,
+    meta_format_of,
+    meta_stem,
+    read_meta,
+    write_meta,
+)
 from .models import PackageStatus, PackageType
+from .orphans import find_orphans, is_managed, managed_roots, walk_files
+from .plan import SKIP_REASONS, InstallPlan, conflict_owners, missing_dirs
+from .progress import PHASE_INSTALL, PHASE_UNINSTALL, ProgressTracker
+from .sources import PACKAGE_TOP_DIRS, open_source
+from .trace import traced, tracer
+from .verify import VerifyState, check_file, file_signatures, package_files
+
+
+# 元数据批量更新的暂存目录（位于 <meta_dir>/.hspm/ 下）与清单文件
+TXN_DIR_NAME = "txn"
+TXN_MANIFEST_NAME = "manifest.json"
 
 
 class PackageManager:
     """处理资源包安装、元数据管理和配置的核心逻辑类"""
 
-    def __init__(self):
+    def __init__(self, config_dir=None):
         # 配置文件路径: 用户目录/.config/HS2PackageManager/config.json
-        self.config_dir = Path.home() / ".config" / "HS2PackageManager"
+        # 指定 config_dir 时使用独立的配置目录（基准测试等），不读写用户配置与缓存
+        if config_dir is None:
+            config_dir = Path.home() / ".config" / "HS2PackageManager"
+        self.config_dir = Path(config_dir)
         self.config_path = self.config_dir / "config.json"
         self.config = self.load_config()
+        self._configure_trace()
         self.version = self._load_version()
+        self._file_indexes = {}  # 元数据目录 -> FileIndex
+        self._catalogs = {}  # 元数据目录 -> PackageCatalog
+        self._hash_cache = None
+        self._txn_lock = threading.Lock()
+
+    def _configure_trace(self):
+        """配置项 trace 为 true 时记录各阶段耗时，跟踪文件写入配置目录的 traces/"""
+        tracer.configure(self.config.get("trace", False), self.config_dir / "traces")
 
     def _load_version(self):
         """从 pyproject.toml 读取版本号"""
@@ -35,6 +85,24 @@ class PackageManager:
             print(f"读取版本号失败: {e}")
         return "0.1.0"
 
+    @traced("index.refresh")
+    def get_file_index(self, meta_dir):
+        """获取（并同步）指定元数据目录的文件归属索引"""
+        key = str(Path(meta_dir).resolve())
+        index = self._file_indexes.get(key)
+        if index is None:
+            index = FileIndex(meta_dir)
+            self._file_indexes[key] = index
+        self._recover_meta_batch(meta_dir)
+        index.refresh()
+        return index
+
+    def get_hash_cache(self):
+        """获取文件哈希缓存（保存在配置目录下）"""
+        if self._hash_cache is None:
+            self._hash_cache = HashCache(self.config_dir / "hash_cache.json")
+        return self._hash_cache
+
     def load_config(self):
         if not self.config_dir.exists():
             try:
@@ -58,49 +126,42 @@ class PackageManager:
             with open(self.config_path, "w", encoding="utf-8") as f:
                 json.dump(config_data, f, indent=4, ensure_ascii=False)
             self.config = config_data
+            self._configure_trace()
             return True
         except Exception as e:
             print(f"保存配置失败: {e}")
             return False
 
+    @traced("catalog.refresh")
+    def get_catalog(self, meta_dir):
+        """获取（并同步）指定元数据目录的资源包摘要缓存"""
+        key = str(Path(meta_dir).resolve())
+        catalog = self._catalogs.get(key)
+        if catalog is None:
+            catalog = PackageCatalog(meta_dir)
+            self._catalogs[key] = catalog
+        self._recover_meta_batch(meta_dir)
+        catalog.refresh()
+        return catalog
+
     def get_package_list(self, meta_dir):
         """获取所有已安装资源包的元数据列表"""
-        packages = []
-        meta_path = Path(meta_dir)
-        if not meta_path.exists():
-            return packages
-
-        for json_file in meta_path.glob("*.json"):
-            try:
-                with open(json_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+        if not Path(meta_dir).exists():
+            return []
+        return self.get_catalog(meta_dir).packages()
 
-                parts = json_file.stem.split(".")
-                is_dry_run = data.get("dry_run", False)
-                status = data.get("status")
-                if status is None:
-                    status = (
-                        PackageStatus.DRY_RUN.value
-                        if is_dry_run
-                        else PackageStatus.NORMAL.value
-                    )
-
-                packages.append(
-                    {
-                        "name": data.get(
-                            "name", parts[0] if len(parts) > 0 else "未知"
-                        ),
-                        "sid": data.get("sid", parts[1] if len(parts) > 1 else "未知"),
-                        "type": data.get("type", "未知"),
-                        "created_at": data.get("created_at", ""),
-                        "file_count": len(data.get("news", [])),
-                        "status": status,
-                        "meta_path": str(json_file),
-                    }
-                )
-            except Exception as e:
-                print(f"读取元数据失败 {json_file}: {e}")
-        return packages
+    def find_package(self, meta_dir, name=None, sid=None):
+        """按名称或 SID 查找已安装的资源包，未找到时返回 None"""
+        if not Path(meta_dir).exists():
+            return None
+        catalog = self.get_catalog(meta_dir)
+        if name is not None:
+            pkg = catalog.find_by_name(name)
+            if pkg:
+                return pkg
+        if sid is not None:
+            return catalog.find_by_sid(sid)
+        return None
 
     def get_dest_path(self, relpath: Path, sid: str, name: str, app_root: Path, pkg_type: str = None):
         """计算目标安装路径"""
@@ -129,6 +190,24 @@ class PackageManager:
 
         return None
 
+    def detect_package_info(self, folder_name):
+        """根据文件夹（或压缩包）名称识别 (名称, SID, 类型)，非人物卡的 SID 为空"""
+        # 尝试匹配女性或男性角色特征 (例如: 名称.HS2ChaF_数字)
+        match = re.search(r"^(.*)\.(HS2Cha[FM]_\d+)$", folder_name)
+        if match:
+            return match.group(1), match.group(2), PackageType.CHARACTER.value
+        if "DHH" in folder_name.upper():
+            return folder_name, "", PackageType.DHH.value
+        # 未检测到标准 SID 格式
+        return folder_name, "", PackageType.OTHER.value
+
+    def generate_sid(self, pkg_type, seq=None):
+        """为非人物卡资源包生成 SID；批量导入时用 seq 区分同一秒内生成的多个 SID"""
+        prefix = "DHH" if pkg_type == PackageType.DHH.value else "Other"
+        sid = f"{prefix}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        return sid if seq is None else f"{sid}_{seq}"
+
+    @traced("install", operation=True)
     def install(
         self,
         source,
@@ -141,12 +220,47 @@ class PackageManager:
         create_meta_on_dry_run=False,
         log_func=None,
         conflict_func=None,
+        workers=None,
+        hash_mode=None,
+        link_mode=None,
+        resolve_func=None,
+        progress_func=None,
     ):
-        """执行安装逻辑"""
+        """执行安装逻辑
+
+        安装分为两个阶段：先扫描源文件生成完整的安装计划（复制、跳过、冲突和需要
+        新建的目录），冲突一次性交给回调解决，然后不间断地执行计划。模拟运行只生成
+        计划并汇报统计，不逐个文件输出日志。
+        source 可以是资源包目录，也可以是 zip / tar 压缩包（成员直接流式写入目标路径）。
+        resolve_func(conflicts) 接收全部冲突 [{"source", "dest", "old_size", "new_size", "owners"}]，
+        返回需要覆盖的目标路径集合，返回 None 表示取消安装；未提供时按旧接口对每个冲突
+        调用 conflict_func(rel_dest, old_size, new_size)，两者都未提供时冲突文件不安装。
+        workers 为复制线程数，未指定时读取配置项 install_workers（默认 1，即顺序复制）。
+        hash_mode 开启后按内容哈希判断目标文件是否相同，并在 files 中记录哈希，
+        未指定时读取配置项 hash_mode（默认关闭）。
+        link_mode 为文件放置方式：copy / hardlink / reflink / auto，链接失败的文件
+        自动回退为复制，未指定时读取配置项 link_mode（默认 copy）。
+        progress_func(事件) 在复制过程中按字节汇报文件数、字节数、吞吐量和剩余时间
+        （格式见 progress 模块），可能在复制线程中调用。
+        单个文件复制失败不会中断安装，失败项以 failed 状态记录在元数据中。
+        冲突检测基于元数据目录的文件归属索引，owners 列出记录了该文件的其他资源包，
+        以及文件在其安装之后是否又被修改过。
+        返回各状态的文件数统计，失败详情位于 "failed" 列表，取消安装时 "aborted" 为 True。
+        """
         root = Path(source)
         app_root = Path(app_root)
         meta_dir = Path(meta_dir)
-        items = []
+        if workers is None:
+            workers = self.config.get("install_workers", 1)
+        workers = max(1, int(workers))
+        if hash_mode is None:
+            hash_mode = self.config.get("hash_mode", False)
+        hash_cache = self.get_hash_cache() if hash_mode else None
+        if link_mode is None:
+            link_mode = self.config.get("link_mode", LINK_COPY)
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"未知的安装方式: {link_mode}")
+        failed = []
         dirs = []
 
         def _log(msg):
@@ -157,189 +271,656 @@ class PackageManager:
         if dry_run:
             _log("--- 模拟运行模式 ---")
 
-        for path in root.rglob("*"):
-            if not path.is_file():
-                continue
+        if not dry_run and journal_path(meta_dir, name, sid).exists():
+            # 在询问冲突之前就拒绝，不覆盖被中断安装的日志
+            raise interrupted_error(name, sid)
+
+        index = self.get_file_index(meta_dir)
+        with open_source(root) as src:
+            plan = self.plan_install(
+                src, name, sid, pkg_type, app_root, hash_cache, index=index
+            )
+            if not any(item["dest"] for item in plan.items):
+                # 没有任何文件对应到游戏目录，多半是压缩包结构不对，不要报告安装成功
+                raise ValueError(
+                    f"资源包中没有可安装的文件（根目录下应包含 {'、'.join(PACKAGE_TOP_DIRS)} 之一）"
+                )
+            conflict_count = len(plan.conflicts)
+
+            if plan.conflicts:
+                _log(f"发现 {conflict_count} 个冲突文件")
+                for package, count in sorted(plan.owner_counts().items()):
+                    _log(f"  其中 {count} 个属于资源包 {package}")
+                if resolve_func:
+                    overwrite = resolve_func(list(plan.conflicts))
+                    if overwrite is None:
+                        _log("\n已取消安装，未修改任何文件。")
+                        return {
+                            "copied": 0,
+                            "overwritten": 0,
+                            "skipped": 0,
+                            "failed": [],
+                            "conflicts": conflict_count,
+                            "aborted": True,
+                        }
+                    plan.resolve(set(overwrite))
+                elif conflict_func:
+                    plan.resolve(
+                        {
+                            c["dest"]
+                            for c in plan.conflicts
+                            if conflict_func(Path(c["dest"]), c["old_size"], c["new_size"])
+                        }
+                    )
+                else:
+                    for c in plan.conflicts:
+                        _log(f"跳过: {c['source']} (文件冲突且未提供处理回调)")
+                    plan.drop_conflicts()
+
+            if dry_run:
+                _log(f"安装计划: {plan.describe()}")
+                for rel_d in plan.dirs:
+                    dirs.append({"dest": rel_d, "timestamp": datetime.now().isoformat()})
+                if hash_cache:
+                    for _, itd, entry, _ in plan.placements():
+                        itd["hash"] = src.hash(entry, hash_cache)
+            else:
+                # 修改任何文件之前先写入安装日志，中途退出时可继续安装或回滚
+                journal = InstallJournal(
+                    journal_path(meta_dir, name, sid),
+                    header={
+                        "name": name,
+                        "sid": sid,
+                        "type": pkg_type,
+                        "source": str(root.resolve()),
+                        "app_root": str(app_root),
+                        "hash_mode": bool(hash_cache),
+                        "link_mode": link_mode,
+                        "dirs": plan.dirs,
+                        "items": plan.items,
+                    },
+                )
+                try:
+                    self._execute_plan(
+                        src,
+                        plan,
+                        app_root,
+                        dirs,
+                        failed,
+                        _log,
+                        workers,
+                        hash_cache,
+                        link_mode,
+                        journal=journal,
+                        progress_func=progress_func,
+                    )
+                finally:
+                    journal.close()
+        items = plan.items
+
+        # 保存元数据
+        # 逻辑：正式安装始终保存；模拟安装仅在勾选了创建选项时保存
+        should_save_meta = not dry_run or (dry_run and create_meta_on_dry_run)
+
+        if should_save_meta:
+            self._save_install_meta(
+                meta_dir, name, sid, pkg_type, items, dirs, dry_run, root, hash_cache, link_mode
+            )
+        if not dry_run:
+            journal.discard()
+
+        if hash_cache:
+            hash_cache.save()
+
+        if dry_run:
+            if create_meta_on_dry_run:
+                _log("\n模拟安装完成！元数据（模拟记录）已保存。")
+            else:
+                _log("\n模拟安装完成！(未保存元数据)")
+        else:
+            if failed:
+                _log(f"\n有 {len(failed)} 个文件复制失败，已记录在元数据中。")
+            _log("\n安装完成！元数据已保存。")
 
-            relpath = path.relative_to(root)
+        return self._install_summary(items, failed, conflict_count)
+
+    def _install_summary(self, items, failed, conflict_count):
+        summary = {
+            "copied": 0,
+            "overwritten": 0,
+            "skipped": 0,
+            "failed": failed,
+            "conflicts": conflict_count,
+            "aborted": False,
+        }
+        for itd in items:
+            if itd["status"] in ("copied", "overwritten", "skipped"):
+                summary[itd["status"]] += 1
+        return summary
+
+    @traced("save_meta")
+    def _save_install_meta(
+        self, meta_dir, name, sid, pkg_type, items, dirs, dry_run, root, hash_cache, link_mode
+    ):
+        """写入安装元数据并更新索引和摘要缓存，返回元数据文件路径
+
+        root 为安装来源，没有来源（收编的孤立文件）时为 None。
+        """
+        outdata = {
+            "name": name,
+            "sid": sid,
+            "type": pkg_type,
+            "status": (
+                PackageStatus.DRY_RUN.value if dry_run else PackageStatus.NORMAL.value
+            ),
+            "source_path": str(Path(root).resolve()) if root is not None else None,
+            "created_at": datetime.now().isoformat(),
+            "news": [d["dest"] for d in items if d["status"] in ("copied", "overwritten")],
+            "dirs": dirs,
+            "files": items,
+        }
+        if hash_cache:
+            outdata["hash_algorithm"] = HASH_ALGORITHM
+        if link_mode != LINK_COPY:
+            outdata["link_mode"] = link_mode
+        meta_dir = Path(meta_dir)
+        meta_dir.mkdir(parents=True, exist_ok=True)
+        index = self.get_file_index(meta_dir)
+        catalog = self.get_catalog(meta_dir)
+        with tracer.span("write_meta", files=len(items)):
+            outfile = write_meta(
+                meta_dir / meta_filename(name, sid), outdata, self.get_meta_format()
+            )
+        with tracer.span("index.update"):
+            index.update_package(outfile, outdata)
+            catalog.update_package(outfile, outdata)
+        return outfile
+
+    @traced("plan")
+    def plan_install(
+        self, src, name, sid, pkg_type, app_root, hash_cache=None, index=None
+    ):
+        """扫描阶段：只读取源文件列表和目标路径状态，生成安装计划，不修改任何文件
+
+        提供 index 时，冲突项会附带记录了该文件的其他资源包（同名同 SID 的旧记录除外）。
+        """
+        app_root = Path(app_root)
+        plan = InstallPlan()
+        known_dirs = set()
+        own_names = {
+            meta_filename(name, sid, fmt) for fmt in (META_FORMAT_JSON, META_FORMAT_COMPACT_GZ)
+        }
+
+        for entry in src.entries():
+            relpath = entry.relpath
             dest = self.get_dest_path(relpath, sid, name, app_root, pkg_type)
-            src_stat = path.stat()
-            mtime_float = src_stat.st_mtime
+            mtime_float = entry.mtime
             mtime_int = int(mtime_float * 1_000_000)
             mtime_iso = datetime.fromtimestamp(mtime_float).isoformat()
 
             if dest is None:
-                _log(f"跳过: {relpath} (无目标路径或规则跳过)")
-                items.append(
-                    {
-                        "status": "skipped",
-                        "source": str(relpath),
-                        "dest": None,
-                        "mtime": mtime_int,
-                        "message": "global skip rule",
-                        "timestamp": mtime_iso,
-                    }
-                )
+                itd = {
+                    "status": "skipped",
+                    "source": str(relpath),
+                    "dest": None,
+                    "mtime": mtime_int,
+                    "message": "global skip rule",
+                    "timestamp": mtime_iso,
+                }
+                plan.add(itd, entry, None)
                 continue
 
             rel_dest = dest.relative_to(app_root)
-            overwrite = False
-
-            if dest.exists():
-                src_size = src_stat.st_size
-                dest_size = dest.stat().st_size
-                if src_size == dest_size:
-                    _log(f"跳过: {relpath} (文件已存在且大小相同)")
-                    items.append(
-                        {
-                            "status": "skipped",
-                            "source": str(relpath),
-                            "dest": str(rel_dest),
-                            "mtime": int(dest.stat().st_mtime * 1_000_000),
-                            "message": "same size",
-                            "timestamp": mtime_iso,
-                        }
-                    )
-                    continue
+            tracer.count("plan.entries")
+            tracer.count("plan.bytes", entry.size)
+            tracer.count("syscall.stat")
+            try:
+                dest_stat = dest.stat()
+            except OSError:
+                dest_stat = None
 
-                # 处理冲突
-                if conflict_func:
-                    if conflict_func(rel_dest, dest_size, src_size):
-                        overwrite = True
-                    else:
-                        _log(f"跳过: {relpath} (用户选择不覆盖)")
-                        items.append(
-                            {
-                                "status": "skipped",
-                                "source": str(relpath),
-                                "dest": str(rel_dest),
-                                "mtime": mtime_int,
-                                "message": "user chose not to overwrite",
-                                "timestamp": mtime_iso,
-                            }
-                        )
-                        continue
+            if dest_stat is not None:
+                src_size = entry.size
+                dest_size = dest_stat.st_size
+                src_hash = None
+                if hash_cache:
+                    # 哈希模式：大小相同且内容一致才视为已安装
+                    same = False
+                    if src_size == dest_size:
+                        src_hash = src.hash(entry, hash_cache)
+                        same = hash_cache.get(dest, dest_stat) == src_hash
                 else:
-                    _log(f"跳过: {relpath} (文件冲突且未提供处理回调)")
-                    continue
-
-            action_prefix = "模拟" if dry_run else ""
-            action = f"{action_prefix}覆盖" if overwrite else f"{action_prefix}复制"
-            _log(f"{action}: {relpath} -> {rel_dest}")
-
-            # 检查并记录目录创建
-            current_parent = dest.parent
-            dirs_to_create: list[Path] = []
-            while not current_parent.exists() and current_parent != app_root:
-                dirs_to_create.append(current_parent)
-                current_parent = current_parent.parent
-
-            for d in reversed(dirs_to_create):
-                if not dry_run:
-                    d.mkdir(exist_ok=True)
-                    _log(f"创建目录: {d.relative_to(app_root)}")
-
-                rel_d = d.relative_to(app_root)
-                if str(rel_d) not in [x["dest"] for x in dirs]:
-                    dirs.append(
-                        {
-                            "dest": str(rel_d),
-                            "timestamp": datetime.now().isoformat(),
-                        }
+                    same = src_size == dest_size
+                if same:
+                    itd = {
+                        "status": "skipped",
+                        "source": str(relpath),
+                        "dest": str(rel_dest),
+                        "mtime": int(dest_stat.st_mtime * 1_000_000),
+                        "size": dest_size,
+                        "message": "same content" if hash_cache else "same size",
+                        "timestamp": mtime_iso,
+                    }
+                    if src_hash:
+                        itd["hash"] = src_hash
+                    plan.add(itd, entry, dest)
+                else:
+                    itd = {
+                        "status": "conflict",
+                        "source": str(relpath),
+                        "dest": str(rel_dest),
+                        "mtime": mtime_int,
+                        "size": src_size,
+                        "timestamp": mtime_iso,
+                    }
+                    owners = (
+                        conflict_owners(index, str(rel_dest), dest_stat, own_names)
+                        if index is not None
+                        else ()
                     )
+                    plan.add_conflict(itd, entry, dest, dest_size, src_size, owners)
+                continue
 
+            for d in missing_dirs(dest.parent, app_root, known_dirs):
+                plan.dirs.append(str(d.relative_to(app_root)))
             itd = {
-                "status": "overwritten" if overwrite else "copied",
+                "status": "copied",
                 "source": str(relpath),
                 "dest": str(rel_dest),
                 "mtime": mtime_int,
+                "size": entry.size,
                 "timestamp": mtime_iso,
             }
+            plan.add(itd, entry, dest)
 
-            if not dry_run:
-                dest.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copy2(str(path), str(dest))
-                # 核心修复：记录目标文件在安装后的实际时间戳，确保删除校验一致
-                itd["mtime"] = int(dest.stat().st_mtime * 1_000_000)
+        return plan
 
-            items.append(itd)
+    @traced("execute")
+    def _execute_plan(
+        self,
+        src,
+        plan,
+        app_root,
+        dirs,
+        failed,
+        _log,
+        workers,
+        hash_cache,
+        link_mode,
+        journal=None,
+        done=(),
+        progress_func=None,
+    ):
+        """执行阶段：创建目录并放置计划中的文件，不再向用户询问
 
-        # 保存元数据
-        # 逻辑：正式安装始终保存；模拟安装仅在勾选了创建选项时保存
-        should_save_meta = not dry_run or (dry_run and create_meta_on_dry_run)
+        每个文件放置完成后写入 journal；done 为继续安装时已完成的文件项序号，直接跳过。
+        提供 progress_func 时按字节汇报进度（见 progress.ProgressTracker）。
+        """
+        for rel_d in plan.dirs:
+            (app_root / rel_d).mkdir(exist_ok=True)
+            _log(f"创建目录: {rel_d}")
+            dirs.append({"dest": rel_d, "timestamp": datetime.now().isoformat()})
 
-        if should_save_meta:
-            outdata = {
-                "name": name,
-                "sid": sid,
-                "type": pkg_type,
-                "status": (
-                    PackageStatus.DRY_RUN.value
-                    if dry_run
-                    else PackageStatus.NORMAL.value
-                ),
-                "source_path": str(root) if dry_run else None,
-                "created_at": datetime.now().isoformat(),
-                "news": [
-                    d["dest"] for d in items if d["status"] in ("copied", "overwritten")
-                ],
-                "dirs": dirs,
-                "files": items,
-            }
-            meta_dir.mkdir(parents=True, exist_ok=True)
-            outfile = meta_dir / f"{name}.{sid}.json"
-            outfile.write_text(
-                json.dumps(outdata, indent=4, ensure_ascii=False), encoding="utf-8"
+        for itd in plan.items:
+            if itd["status"] == "skipped":
+                reason = SKIP_REASONS.get(itd.get("message"), itd.get("message"))
+                _log(f"跳过: {itd['source']} ({reason})")
+
+        pool = (
+            ThreadPoolExecutor(max_workers=workers)
+            if workers > 1 and src.parallel_safe
+            else None
+        )
+        placements = [p for p in plan.placements() if p[0] not in done]
+        tracker = None
+        if progress_func:
+            tracker = ProgressTracker(
+                PHASE_INSTALL,
+                len(placements),
+                sum(entry.size for _, _, entry, _ in placements),
+                progress_func,
             )
 
-        if dry_run:
-            if create_meta_on_dry_run:
-                _log("\n模拟安装完成！元数据（模拟记录）已保存。")
+        pending = []  # (itd, future)
+        for i, itd, entry, dest in placements:
+            action = "覆盖" if itd["status"] == "overwritten" else "复制"
+            _log(f"{action}: {itd['source']} -> {itd['dest']}")
+            if pool:
+                future = pool.submit(
+                    self._place_file,
+                    src,
+                    entry,
+                    dest,
+                    hash_cache,
+                    link_mode,
+                    journal,
+                    i,
+                    tracker,
+                )
+                pending.append((itd, future))
             else:
-                _log("\n模拟安装完成！(未保存元数据)")
+                try:
+                    result = self._place_file(
+                        src, entry, dest, hash_cache, link_mode, journal, i, tracker
+                    )
+                    self._apply_copy_result(itd, result)
+                except Exception as e:
+                    self._mark_failed(itd, e, failed, _log)
+
+        if pool:
+            # 等待所有复制任务完成，按提交顺序回填结果，保证元数据与顺序执行一致
+            for itd, future in pending:
+                try:
+                    self._apply_copy_result(itd, future.result())
+                except Exception as e:
+                    self._mark_failed(itd, e, failed, _log)
+            pool.shutdown()
+        if tracker:
+            tracker.finish()
+
+    @traced("place")
+    def _place_file(
+        self,
+        src,
+        entry,
+        dest,
+        hash_cache=None,
+        link_mode=LINK_COPY,
+        journal=None,
+        i=None,
+        tracker=None,
+    ):
+        """复制或链接单个文件，返回 (目标文件 stat, 内容哈希或 None, 实际放置方式)
+
+        提供 journal 时，文件放置完成后立即在复制线程中写入日志；
+        提供 tracker 时，大文件逐块汇报进度，其余文件在完成（或失败）后一次计入。
+        """
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tracer.count("syscall.mkdir")
+        if tracker:
+            reported = 0
+
+            def on_bytes(n):
+                nonlocal reported
+                reported += n
+                tracker.add_bytes(n)
+
+            try:
+                used_mode = src.place(entry, dest, link_mode, on_bytes)
+            finally:
+                tracker.file_done(max(entry.size - reported, 0), str(dest))
         else:
-            _log("\n安装完成！元数据已保存。")
+            used_mode = src.place(entry, dest, link_mode)
+        dest_stat = dest.stat()
+        tracer.count("syscall.stat")
+        tracer.count("place.files")
+        tracer.count("place.bytes", dest_stat.st_size)
+        tracer.count(f"place.{used_mode}")
+        digest = None
+        if hash_cache:
+            digest = src.hash(entry, hash_cache)
+            # 目标文件内容与源文件一致，直接写入缓存，卸载校验时无需重新计算
+            hash_cache.put(dest, dest_stat, digest)
+        if journal:
+            journal.record(i, dest_stat, digest, used_mode)
+        return dest_stat, digest, used_mode
 
-        return True
+    def _apply_copy_result(self, itd, result):
+        dest_stat, digest, used_mode = result
+        # 核心修复：记录目标文件在安装后的实际时间戳，确保删除校验一致
+        itd["mtime"] = int(dest_stat.st_mtime * 1_000_000)
+        itd["size"] = dest_stat.st_size
+        if digest:
+            itd["hash"] = digest
+        if used_mode != LINK_COPY:
+            itd["link"] = used_mode
 
-    def _get_all_referenced_files(self, meta_dir, exclude_meta_path):
-        """获取所有其他资源包引用的文件和目录集合"""
-        referenced = set()
-        meta_path = Path(meta_dir)
-        exclude_meta_path = Path(exclude_meta_path)
+    def _mark_failed(self, itd, error, failed, log):
+        """将复制失败的文件记录为 failed 状态"""
+        itd["status"] = "failed"
+        itd["message"] = str(error)
+        failed.append({"source": itd["source"], "dest": itd["dest"], "error": str(error)})
+        log(f"复制失败: {itd['source']} ({error})")
 
-        for json_file in meta_path.glob("*.json"):
-            if json_file.resolve() == exclude_meta_path.resolve():
-                continue
+    def _meta_exists(self, meta_dir, name, sid):
+        return any(
+            (Path(meta_dir) / meta_filename(name, sid, fmt)).exists()
+            for fmt in (META_FORMAT_JSON, META_FORMAT_COMPACT_GZ)
+        )
+
+    def pending_installs(self, meta_dir):
+        """列出被中断的安装（元数据目录下残留的安装日志）
+
+        元数据已写入、只是日志未及删除的安装视为已完成，直接清理其日志。
+        """
+        pending = []
+        for path in list_journals(meta_dir):
             try:
-                with open(json_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                # 收集文件
-                for item in data.get("files", []):
-                    dest = item.get("dest")
-                    if dest:
-                        referenced.add(dest)
-                # 收集目录
-                for d_info in data.get("dirs", []):
-                    dest = d_info.get("dest")
-                    if dest:
-                        referenced.add(dest)
-            except:
+                header, done = load_journal(path)
+            except Exception as e:
+                print(f"读取安装日志失败 {path}: {e}")
+                continue
+            if self._meta_exists(meta_dir, header["name"], header["sid"]):
+                print(f"[DEBUG] 安装已完成，清理日志: {path}")
+                remove_journal(path)
                 continue
-        return referenced
+            pending.append(
+                {
+                    "journal": str(path),
+                    "name": header["name"],
+                    "sid": header["sid"],
+                    "type": header["type"],
+                    "source": header["source"],
+                    "source_exists": Path(header["source"]).exists(),
+                    "done": len(done),
+                    "total": sum(
+                        1
+                        for item in header["items"]
+                        if item["status"] in ("copied", "overwritten")
+                    ),
+                }
+            )
+        return pending
 
-    def delete_package(self, meta_path, app_root):
-        """删除资源包及其相关文件和目录"""
-        meta_path = Path(meta_path)
+    @traced("resume_install", operation=True)
+    def resume_install(self, journal, log_func=None, workers=None, progress_func=None):
+        """按安装日志继续被中断的安装
+
+        已完成的文件只核对大小和时间戳（与日志记录一致即视为完成），不重新复制或计算哈希。
+        progress_func 与 install() 相同，只统计剩余的文件。返回值与 install() 相同。
+        """
+        journal = Path(journal)
+        meta_dir = journal.parent.parent.parent
+        header, done = load_journal(journal)
+        name, sid = header["name"], header["sid"]
+        root = Path(header["source"])
+        app_root = Path(header["app_root"])
+        link_mode = header["link_mode"]
+        hash_cache = self.get_hash_cache() if header["hash_mode"] else None
+        if workers is None:
+            workers = self.config.get("install_workers", 1)
+        workers = max(1, int(workers))
+        items = header["items"]
+        failed = []
+        dirs = []
+
+        def _log(msg):
+            if log_func:
+                log_func(msg)
+
+        finished = set()
+        stats = stat_files(app_root, {items[i]["dest"] for i in done})
+        for i, record in done.items():
+            st = stats.get(items[i]["dest"])
+            if (
+                st is None
+                or st.st_size != record["size"]
+                or int(st.st_mtime * 1_000_000) != record["mtime"]
+            ):
+                continue
+            items[i]["mtime"] = record["mtime"]
+            items[i]["size"] = record["size"]
+            if "hash" in record:
+                items[i]["hash"] = record["hash"]
+            if record.get("link", LINK_COPY) != LINK_COPY:
+                items[i]["link"] = record["link"]
+            finished.add(i)
+
+        remaining = [
+            i
+            for i, item in enumerate(items)
+            if item["status"] in ("copied", "overwritten") and i not in finished
+        ]
+        _log(f"继续安装: {name} ({sid})，已完成 {len(finished)} 个文件，剩余 {len(remaining)} 个")
+
+        if remaining:
+            if not root.exists():
+                raise FileNotFoundError(f"资源包来源已不存在，只能回滚: {root}")
+            plan = InstallPlan()
+            plan.dirs = header["dirs"]
+            with open_source(root) as src:
+                entries = {str(entry.relpath): entry for entry in src.entries()}
+                for i, item in enumerate(items):
+                    entry = entries.get(item["source"])
+                    dest = app_root / item["dest"] if item.get("dest") else None
+                    plan.add(item, entry, dest)
+                    if entry is None and i in remaining:
+                        self._mark_failed(item, "源文件不存在", failed, _log)
+                writer = InstallJournal(journal)
+                try:
+                    self._execute_plan(
+                        src,
+                        plan,
+                        app_root,
+                        dirs,
+                        failed,
+                        _log,
+                        workers,
+                        hash_cache,
+                        link_mode,
+                        journal=writer,
+                        done=finished,
+                        progress_func=progress_func,
+                    )
+                finally:
+                    writer.close()
+        else:
+            dirs = [
+                {"dest": rel_d, "timestamp": datetime.now().isoformat()}
+                for rel_d in header["dirs"]
+            ]
+
+        self._save_install_meta(
+            meta_dir, name, sid, header["type"], items, dirs, False, root, hash_cache, link_mode
+        )
+        remove_journal(journal)
+        if hash_cache:
+            hash_cache.save()
+        if failed:
+            _log(f"\n有 {len(failed)} 个文件复制失败，已记录在元数据中。")
+        _log("\n安装完成！元数据已保存。")
+        return self._install_summary(items, failed, 0)
+
+    @traced("rollback_install", operation=True)
+    def rollback_install(self, journal, log_func=None):
+        """撤销被中断的安装：删除本次新建的文件和空目录，然后删除安装日志
+
+        被覆盖的文件无法恢复原内容，保留在原处并在 "kept" 中列出。
+        有文件删除失败时保留日志，可再次回滚。
+        """
+        journal = Path(journal)
+        header, done = load_journal(journal)
+        app_root = Path(header["app_root"])
+        items = header["items"]
+
+        def _log(msg):
+            if log_func:
+                log_func(msg)
+
+        _log(f"回滚安装: {header['name']} ({header['sid']})")
+        # 计划为复制的文件在安装前不存在，无论是否复制完成都由本次安装创建
+        stats = stat_files(
+            app_root, {item["dest"] for item in items if item["status"] == "copied"}
+        )
+        paths = [str(app_root / dest) for dest in stats]
+        errors = unlink_files(paths)
+        removed_dirs = prune_dirs(str(app_root / rel_d) for rel_d in header["dirs"])
+        kept = [
+            items[i]["dest"] for i in sorted(done) if items[i]["status"] == "overwritten"
+        ]
+        for path, error in errors:
+            _log(f"删除失败: {path} ({error})")
+        for dest in kept:
+            _log(f"已被覆盖，无法恢复: {dest}")
+        if not errors:
+            remove_journal(journal)
+        _log(f"已删除 {len(paths) - len(errors)} 个文件和 {removed_dirs} 个空目录")
+        return {
+            "name": header["name"],
+            "sid": header["sid"],
+            "removed": len(paths) - len(errors),
+            "dirs": removed_dirs,
+            "failed": [{"path": path, "error": str(error)} for path, error in errors],
+            "kept": kept,
+        }
+
+    def delete_package(self, meta_path, app_root, progress_func=None, workers=None):
+        """删除资源包及其相关文件和目录
+
+        progress_func(事件) 按文件数和字节数汇报进度（格式见 progress 模块）；workers 为删除线程数，
+        未指定时读取配置项 uninstall_workers（默认 4）。
+        """
+        result = self.delete_packages([meta_path], app_root, progress_func, workers)[0]
+        return result["success"], result["message"]
+
+    @traced("delete_packages", operation=True)
+    def delete_packages(self, meta_paths, app_root, progress_func=None, workers=None):
+        """批量删除多个资源包
+
+        引用检查排除所有正在删除的资源包，全部文件在一次批量操作中删除，
+        元数据的更新和删除作为一个批次提交。
+        返回每个资源包的结果 [{"meta_path", "success", "status", "message"}]，
+        有文件因冲突保留时 status 为 CONFLICT。
+        """
         app_root = Path(app_root)
+        results = []
+        groups = {}  # 元数据目录 -> [(meta_path, data, result)]
+        for meta_path in map(Path, meta_paths):
+            result = {
+                "meta_path": str(meta_path),
+                "success": False,
+                "status": None,
+                "message": "",
+            }
+            results.append(result)
+            if not meta_path.exists():
+                result["message"] = "元数据文件不存在"
+                continue
+            try:
+                with tracer.span("read_meta"):
+                    data = read_meta(meta_path)
+            except Exception as e:
+                result["message"] = f"删除失败: {str(e)}"
+                continue
+            groups.setdefault(meta_path.parent, []).append((meta_path, data, result))
 
-        if not meta_path.exists():
-            return False, "元数据文件不存在"
+        for meta_dir, group in groups.items():
+            try:
+                self._delete_group(meta_dir, group, app_root, progress_func, workers)
+            except Exception as e:
+                for _, _, result in group:
+                    result["message"] = f"删除失败: {str(e)}"
+        return results
 
-        try:
-            with open(meta_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+    def _delete_group(self, meta_dir, group, app_root, progress_func, workers):
+        """删除同一元数据目录下的一组资源包"""
+        # 通过文件归属索引判断共享文件，避免重新解析所有元数据
+        index = self.get_file_index(meta_dir)
+        catalog = self.get_catalog(meta_dir)
+        exclude = {meta_path.name for meta_path, _, _ in group}
 
+        statuses = []
+        for _, data, _ in group:
             status = data.get("status")
             # 兼容旧数据：如果没有 status 字段，则看 dry_run 字段
             if status is None:
@@ -348,95 +929,592 @@ class PackageManager:
                     if data.get("dry_run")
                     else PackageStatus.NORMAL.value
                 )
+            statuses.append(status)
+
+        # 只有 NORMAL 状态才执行物理删除逻辑
+        normal = [
+            i for i, status in enumerate(statuses) if status == PackageStatus.NORMAL.value
+        ]
+        removed_conflicts = self._remove_package_files(
+            [group[i][1] for i in normal], app_root, index, exclude, progress_func, workers
+        )
+        conflicts = {i: c for i, c in zip(normal, removed_conflicts) if c}
 
-            is_dry_run = status == PackageStatus.DRY_RUN.value
-            conflicts = []
-
-            # 获取其他包引用的文件，用于处理共享文件
-            meta_dir = meta_path.parent
-            other_referenced = self._get_all_referenced_files(meta_dir, meta_path)
-
-            # 只有 NORMAL 状态才执行物理删除逻辑
-            if status == PackageStatus.NORMAL.value:
-                # 1. 删除文件
-                items = data.get("files", [])
-                for item in items:
-                    dest_rel = item.get("dest")
-                    if not dest_rel:
-                        continue
-
-                    if item.get("status") in ("copied", "overwritten", "skipped"):
-                        dest_path = app_root / dest_rel
-                        if dest_path.exists() and dest_path.is_file():
-                            # 检查是否被其他包引用
-                            if dest_rel in other_referenced:
-                                print(
-                                    f"[DEBUG] 文件被其他包引用，跳过删除: {dest_path}"
-                                )
-                                continue
-
-                            # 比较时间戳，如果不一致说明被其他资源包修改过
-                            current_mtime = int(dest_path.stat().st_mtime * 1_000_000)
-                            recorded_mtime = item.get("mtime")
-
-                            if (
-                                recorded_mtime is not None
-                                and current_mtime != recorded_mtime
-                            ):
-                                # 时间戳不一致，保留文件
-                                print(
-                                    f"[DEBUG] 文件时间戳不一致，保留文件: {dest_path}"
-                                )
-                                item["reason"] = "timestamp_mismatch"
-                                item["current_mtime"] = current_mtime
-                                conflicts.append(item)
-                            else:
-                                # 时间戳一致，可以删除
-                                print(f"[DEBUG] 准备删除文件: {dest_path}")
-                                dest_path.unlink()
-                        else:
-                            # 文件不存在，视为已删除
-                            pass
-
-                # 2. 删除目录 (仅在没有冲突文件的情况下尝试)
-                if not conflicts:
-                    dirs = data.get("dirs", [])
-                    for d_info in reversed(dirs):
-                        dest_rel = d_info.get("dest")
-                        if not dest_rel:
-                            continue
-
-                        if dest_rel in other_referenced:
-                            print(f"[DEBUG] 目录被其他包引用，跳过删除: {dest_rel}")
-                            continue
-
-                        d_path = app_root / dest_rel
-                        if d_path.exists() and d_path.is_dir():
-                            # 只有目录为空时才删除，避免误删其他资源包的文件
-                            try:
-                                if not any(d_path.iterdir()):
-                                    print(f"[DEBUG] 准备删除空目录: {d_path}")
-                                    d_path.rmdir()
-                            except:
-                                pass
-
-            # 3. 处理元数据文件
-            if conflicts:
+        if self._hash_cache:
+            self._hash_cache.save()
+
+        # 处理元数据文件
+        replace, delete = [], []
+        for i, (meta_path, data, result) in enumerate(group):
+            result["success"] = True
+            if i in conflicts:
                 # 有文件未成功删除，更新 meta 文件并保留
                 data["status"] = PackageStatus.CONFLICT.value
-                data["delete_conflicts"] = conflicts
+                data["delete_conflicts"] = conflicts[i]
                 data["delete_attempt_time"] = datetime.now().isoformat()
                 print(f"[DEBUG] 准备更新元数据 (记录冲突详情): {meta_path}")
-                with open(meta_path, "w", encoding="utf-8") as f:
-                    json.dump(data, f, indent=4, ensure_ascii=False)
-                return (
-                    True,
-                    f"卸载完成，但有 {len(conflicts)} 个文件因被修改而保留。元数据已更新。",
+                replace.append((meta_path, data))
+                result["status"] = PackageStatus.CONFLICT.value
+                result["message"] = (
+                    f"卸载完成，但有 {len(conflicts[i])} 个文件因被修改而保留。元数据已更新。"
                 )
             else:
                 print(f"[DEBUG] 准备删除元数据: {meta_path}")
-                meta_path.unlink()
-                msg = "模拟记录已移除" if is_dry_run else "资源包已成功卸载"
-                return True, msg
-        except Exception as e:
-            return False, f"删除失败: {str(e)}"
+                delete.append(meta_path)
+                is_dry_run = statuses[i] == PackageStatus.DRY_RUN.value
+                result["message"] = "模拟记录已移除" if is_dry_run else "资源包已成功卸载"
+
+        self._commit_meta_batch(meta_dir, replace, delete)
+        # 索引和摘要缓存按文件变化同步，整批只保存一次
+        index.refresh()
+        catalog.refresh()
+
+    @traced("remove_files")
+    def _remove_package_files(
+        self, packages, app_root, index, exclude, progress_func=None, workers=None
+    ):
+        """删除一组资源包安装的文件和空目录
+
+        先按目录批量获取所有文件状态，再由线程池并行删除，最后自底向上一次性清理空目录。
+        同一文件被多个正在删除的资源包记录时，只要其中任一记录与当前文件一致即删除。
+        返回每个资源包因被修改或删除失败而保留的文件项列表。
+        """
+        if workers is None:
+            workers = self.config.get("uninstall_workers", 4)
+        workers = max(1, int(workers))
+
+        candidates = []  # (资源包序号, 文件项)
+        for i, data in enumerate(packages):
+            for item in data.get("files", []):
+                # 因冲突而选择不覆盖的文件不属于该资源包，不能删除
+                if not is_package_file(item):
+                    continue
+                dest_rel = item["dest"]
+                # 检查是否被其他包引用
+                if index.is_referenced(dest_rel, exclude):
+                    print(f"[DEBUG] 文件被其他包引用，跳过删除: {app_root / dest_rel}")
+                    continue
+                candidates.append((i, item))
+
+        conflicts = [[] for _ in packages]
+        matched = {}  # 目标路径 -> [(序号, 文件项)]，记录与当前文件一致
+        modified = {}  # 目标路径 -> [(序号, 文件项)]，文件已被修改
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # 不存在的文件视为已删除
+            with tracer.span("stat_files", files=len(candidates)):
+                stats = stat_files(
+                    app_root, {item["dest"] for _, item in candidates}, pool
+                )
+            for i, item in candidates:
+                dest_stat = stats.get(item["dest"])
+                if dest_stat is None:
+                    continue
+                dest_path = app_root / item["dest"]
+
+                # 比较时间戳，如果不一致说明被其他资源包修改过
+                current_mtime = int(dest_stat.st_mtime * 1_000_000)
+                recorded_mtime = item.get("mtime")
+                recorded_hash = item.get("hash")
+
+                changed = recorded_mtime is not None and current_mtime != recorded_mtime
+                if changed and recorded_hash:
+                    # 记录了哈希时以内容为准，仅时间戳变化不视为修改
+                    current_hash = self.get_hash_cache().get(dest_path, dest_stat)
+                    changed = current_hash != recorded_hash
+
+                if changed:
+                    item["reason"] = (
+                        "content_mismatch" if recorded_hash else "timestamp_mismatch"
+                    )
+                    item["current_mtime"] = current_mtime
+                    modified.setdefault(item["dest"], []).append((i, item))
+                else:
+                    matched.setdefault(item["dest"], []).append((i, item))
+
+            for dest, records in modified.items():
+                if dest not in matched:
+                    # 文件已被修改，保留文件
+                    print(f"[DEBUG] 文件已被修改，保留文件: {app_root / dest}")
+                    for i, item in records:
+                        conflicts[i].append(item)
+
+            # 硬链接安装的文件只解除目标路径的链接，源库中的文件不受影响
+            print(f"[DEBUG] 准备删除 {len(matched)} 个文件")
+            dests = list(matched)
+            paths = [str(app_root / dest) for dest in dests]
+            on_unlinked = None
+            if progress_func:
+                sizes = [stats[dest].st_size for dest in dests]
+                tracker = ProgressTracker(
+                    PHASE_UNINSTALL, len(paths), sum(sizes), progress_func
+                )
+
+                def on_unlinked(done, total):
+                    tracker.file_done(sizes[done - 1], paths[done - 1])
+
+            with tracer.span("unlink", files=len(paths)):
+                errors = dict(unlink_files(paths, pool, on_unlinked))
+            if progress_func:
+                tracker.finish()
+
+        for dest, path in zip(dests, paths):
+            error = errors.get(path)
+            if error is not None:
+                print(f"[DEBUG] 删除文件失败，保留记录: {path} ({error})")
+                for i, item in matched[dest]:
+                    item["reason"] = "delete_failed"
+                    item["error"] = str(error)
+                    conflicts[i].append(item)
+            elif any(item.get("hash") for _, item in matched[dest]):
+                self.get_hash_cache().discard(path)
+
+        # 只清理没有冲突文件的资源包的目录；rmdir 只会删除空目录，不会误删其他资源包的文件
+        dir_paths = set()
+        for i, data in enumerate(packages):
+            if conflicts[i]:
+                continue
+            for d_info in data.get("dirs", []):
+                dest_rel = d_info.get("dest")
+                if not dest_rel:
+                    continue
+                if index.is_referenced(dest_rel, exclude):
+                    print(f"[DEBUG] 目录被其他包引用，跳过删除: {dest_rel}")
+                    continue
+                dir_paths.add(str(app_root / dest_rel))
+        with tracer.span("prune_dirs", dirs=len(dir_paths)):
+            removed = prune_dirs(dir_paths)
+        print(f"[DEBUG] 已删除 {removed} 个空目录")
+
+        return conflicts
+
+    @traced("commit_meta")
+    def _commit_meta_batch(self, meta_dir, replace, delete):
+        """作为一个批次更新或删除多个元数据文件
+
+        新内容先写入 .hspm/txn/ 暂存，清单落盘后才开始替换和删除；
+        如果中途中断，下次访问该元数据目录时按清单继续完成。
+        """
+        txn_dir = Path(meta_dir) / CACHE_DIR_NAME / TXN_DIR_NAME
+        txn_dir.mkdir(parents=True, exist_ok=True)
+        ops = []
+        for meta_path, data in replace:
+            # 保持文件原有格式，路径不变
+            staged = write_meta(txn_dir / meta_path.name, data, meta_format_of(meta_path))
+            ops.append({"op": "replace", "staged": staged.name, "target": meta_path.name})
+        for meta_path in delete:
+            ops.append({"op": "delete", "target": meta_path.name})
+
+        manifest = txn_dir / TXN_MANIFEST_NAME
+        tmp_path = manifest.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"ops": ops}, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, manifest)
+        self._recover_meta_batch(meta_dir)
+
+    def _recover_meta_batch(self, meta_dir):
+        """完成未执行完的元数据批次；没有清单时清理残留的暂存文件"""
+        txn_dir = Path(meta_dir) / CACHE_DIR_NAME / TXN_DIR_NAME
+        if not txn_dir.exists():
+            return
+        with self._txn_lock:
+            if not txn_dir.exists():
+                return
+            manifest = txn_dir / TXN_MANIFEST_NAME
+            if manifest.exists():
+                with open(manifest, "r", encoding="utf-8") as f:
+                    ops = json.load(f)["ops"]
+                for op in ops:
+                    target = Path(meta_dir) / op["target"]
+                    if op["op"] == "replace":
+                        staged = txn_dir / op["staged"]
+                        if staged.exists():
+                            os.replace(staged, target)
+                    else:
+                        target.unlink(missing_ok=True)
+            # 清单删除后批次才算完成
+            manifest.unlink(missing_ok=True)
+            for leftover in txn_dir.iterdir():
+                leftover.unlink()
+            txn_dir.rmdir()
+
+    def get_meta_format(self):
+        """新写入的元数据使用的存储格式"""
+        fmt = self.config.get("meta_format", META_FORMAT_JSON)
+        if fmt not in META_FORMATS:
+            print(f"未知的元数据格式 {fmt}，使用 {META_FORMAT_JSON}")
+            return META_FORMAT_JSON
+        return fmt
+
+    @traced("migrate_metadata", operation=True)
+    def migrate_metadata(self, meta_dir, fmt, log_func=None):
+        """把元数据目录下的所有元数据转换为指定格式
+
+        每个文件写入后重新读取并与原数据比较，不一致时保留原文件。
+        返回 {"converted", "unchanged", "failed": [{meta_path, error}]}。
+        """
+        _log = log_func or print
+        if fmt not in META_FORMATS:
+            raise ValueError(f"未知的元数据格式: {fmt}")
+        meta_dir = Path(meta_dir)
+        summary = {"converted": 0, "unchanged": 0, "failed": []}
+        staging_dir = meta_dir / CACHE_DIR_NAME / "migrate"
+        staging_dir.mkdir(parents=True, exist_ok=True)
+
+        for meta_path in iter_meta_files(meta_dir):
+            try:
+                if meta_format_of(meta_path) == fmt:
+                    summary["unchanged"] += 1
+                    continue
+                data = read_meta(meta_path)
+                # 先写入暂存目录并校验，确认无损后再替换原文件
+                staged = write_meta(staging_dir / meta_path.name, data, fmt)
+                if read_meta(staged) != data:
+                    staged.unlink()
+                    raise ValueError("转换后的内容与原数据不一致")
+                new_path = meta_dir / staged.name
+                os.replace(staged, new_path)
+                if new_path != meta_path:
+                    meta_path.unlink()
+                summary["converted"] += 1
+                _log(f"已转换: {meta_path.name} -> {new_path.name}")
+            except Exception as e:
+                _log(f"转换失败 {meta_path.name}: {e}")
+                summary["failed"].append({"meta_path": str(meta_path), "error": str(e)})
+
+        try:
+            staging_dir.rmdir()
+        except OSError:
+            pass
+        # 索引和摘要缓存按文件变化同步，所有文件转换完成后只保存一次
+        self.get_file_index(meta_dir)
+        self.get_catalog(meta_dir)
+        return summary
+
+    def export_metadata(self, meta_path):
+        """把元数据导出为带缩进的 JSON，返回可直接打开查看的文件路径
+
+        原始 JSON 格式的文件直接返回自身。
+        """
+        meta_path = Path(meta_path)
+        if meta_format_of(meta_path) == META_FORMAT_JSON:
+            return meta_path
+        return export_meta(meta_path, meta_path.parent / CACHE_DIR_NAME / "export")
+
+    @traced("overlap_report", operation=True)
+    def overlap_report(self, meta_dir):
+        """统计资源包之间的文件重叠（同一目标文件被多个资源包记录）
+
+        直接使用文件归属索引，不读取元数据。返回
+        {"files": {目标路径: [<名称>.<SID>]}, "pairs": [{"packages": [A, B], "files": 重叠文件数}]}，
+        pairs 按重叠文件数从多到少排列。
+        """
+        overlaps = self.get_file_index(meta_dir).overlaps()
+        files = {}
+        pair_counts = {}
+        for dest, names in sorted(overlaps.items()):
+            packages = [meta_stem(name) for name in names]
+            files[dest] = packages
+            for i, a in enumerate(packages):
+                for b in packages[i + 1 :]:
+                    pair_counts[(a, b)] = pair_counts.get((a, b), 0) + 1
+        pairs = [
+            {"packages": list(pair), "files": count}
+            for pair, count in sorted(pair_counts.items(), key=lambda kv: (-kv[1], kv[0]))
+        ]
+        return {"files": files, "pairs": pairs}
+
+    @traced("verify_packages", operation=True)
+    def verify_packages(self, meta_dir, app_root, full=False, workers=None, meta_paths=None):
+        """校验资源包安装的文件是否仍与元数据记录一致
+
+        所有文件的状态由线程池按目录并行获取。每个资源包汇报完好（intact）的文件数，
+        以及缺失（missing）、被修改（modified）和被其他资源包正常覆盖（replaced）的文件。
+        full 为 False 时，元数据和所有文件的 (大小, mtime_ns) 都没有变化的资源包沿用上次的
+        结果（checked 为 False），不再查询归属索引或计算哈希；文件状态每次都会重新获取。
+        meta_paths 指定只校验部分资源包；模拟记录和卸载冲突记录不校验。
+        workers 未指定时读取配置项 verify_workers（默认 8）。
+        返回 [{"meta_path", "name", "sid", "checked", "intact", "missing", "modified",
+        "replaced", "source_path", "repairable"}]，repairable 表示可以从来源修复。
+        """
+        meta_dir = Path(meta_dir)
+        app_root = Path(app_root)
+        if workers is None:
+            workers = self.config.get("verify_workers", 8)
+        workers = max(1, int(workers))
+        index = self.get_file_index(meta_dir)
+        state = VerifyState(meta_dir)
+        signatures = scan_meta_files(meta_dir)
+        if meta_paths is None:
+            names = sorted(signatures)
+        else:
+            names = [Path(p).name for p in meta_paths if Path(p).name in signatures]
+
+        cached = {}  # 元数据文件名 -> 上次的记录
+        parsed = {}  # 元数据文件名 -> 元数据
+        for name in names:
+            entry = None if full else state.cached(app_root, name, signatures[name])
+            if entry is not None:
+                if entry["result"] is not None:
+                    cached[name] = entry
+                continue
+            try:
+                data = read_meta(meta_dir / name)
+            except Exception as e:
+                print(f"读取元数据失败 {name}: {e}")
+                continue
+            if data.get("status", PackageStatus.NORMAL.value) != PackageStatus.NORMAL.value:
+                state.update(app_root, name, signatures[name], {}, None)
+                continue
+            parsed[name] = data
+
+        dests = {dest for entry in cached.values() for dest in entry["files"]}
+        for data in parsed.values():
+            dests.update(package_files(data))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            with tracer.span("stat_files", files=len(dests)):
+                stats = stat_files(app_root, dests, pool)
+
+        results = {}  # 元数据文件名 -> 结果
+        for name, entry in cached.items():
+            if file_signatures(entry["files"], stats) == entry["files"]:
+                results[name] = dict(entry["result"], checked=False)
+                continue
+            try:
+                parsed[name] = read_meta(meta_dir / name)
+            except Exception as e:
+                print(f"读取元数据失败 {name}: {e}")
+
+        for name, data in parsed.items():
+            result = {
+                "name": data.get("name"),
+                "sid": data.get("sid"),
+                "checked": True,
+                "intact": 0,
+                "missing": [],
+                "modified": [],
+                "replaced": [],
+                "source_path": data.get("source_path"),
+            }
+            for item in data.get("files", []):
+                if not is_package_file(item):
+                    continue
+                dest = item["dest"]
+                dest_stat = stats.get(dest)
+                status, owner = check_file(item, dest_stat)
+                if status == "modified":
+                    current_hash = None
+                    if item.get("hash"):
+                        current_hash = self.get_hash_cache().get(app_root / dest, dest_stat)
+                    status, owner = check_file(
+                        item, dest_stat, index.file_owners(dest, {name}), current_hash
+                    )
+                if status == "intact":
+                    result["intact"] += 1
+                elif status == "replaced":
+                    result["replaced"].append({"dest": dest, "package": meta_stem(owner)})
+                else:
+                    result[status].append(dest)
+            # 记录检查时的文件状态，之后的任何变化都会在下次校验时重新检查
+            files = file_signatures(package_files(data), stats)
+            state.update(app_root, name, signatures[name], files, result)
+            results[name] = result
+
+        if meta_paths is None:
+            state.prune(set(signatures))
+        state.save()
+        if self._hash_cache:
+            self._hash_cache.save()
+
+        verified = []
+        for name in names:
+            if name not in results:
+                continue
+            result = dict(results[name], meta_path=str(meta_dir / name))
+            source = result["source_path"]
+            result["repairable"] = bool(
+                (result["missing"] or result["modified"]) and source and Path(source).exists()
+            )
+            verified.append(result)
+        return verified
+
+    @traced("repair_package", operation=True)
+    def repair_package(self, meta_path, app_root, log_func=None):
+        """从安装来源（source_path）重新放置缺失或被修改的文件，并更新元数据
+
+        被其他资源包正常覆盖的文件不会修复。返回 {"repaired": [目标路径], "failed": [{"dest", "error"}]}。
+        """
+        meta_path = Path(meta_path)
+        meta_dir = meta_path.parent
+        app_root = Path(app_root)
+
+        def _log(msg):
+            if log_func:
+                log_func(msg)
+
+        data = read_meta(meta_path)
+        source = data.get("source_path")
+        if not source or not Path(source).exists():
+            raise FileNotFoundError(f"资源包来源未知或已不存在: {source}")
+        verified = self.verify_packages(meta_dir, app_root, full=True, meta_paths=[meta_path])
+        targets = set(verified[0]["missing"] + verified[0]["modified"]) if verified else set()
+        repaired, failed = [], []
+        if not targets:
+            return {"repaired": repaired, "failed": failed}
+
+        hash_cache = self.get_hash_cache() if data.get("hash_algorithm") else None
+        link_mode = data.get("link_mode", LINK_COPY)
+        with open_source(Path(source)) as src:
+            entries = {str(entry.relpath): entry for entry in src.entries()}
+            for item in data.get("files", []):
+                dest = item.get("dest")
+                if dest not in targets or not is_package_file(item):
+                    continue
+                entry = entries.get(item["source"])
+                if entry is None:
+                    failed.append({"dest": dest, "error": "来源中没有该文件"})
+                    _log(f"修复失败: {dest} (来源中没有该文件)")
+                    continue
+                try:
+                    result = self._place_file(src, entry, app_root / dest, hash_cache, link_mode)
+                except Exception as e:
+                    failed.append({"dest": dest, "error": str(e)})
+                    _log(f"修复失败: {dest} ({e})")
+                    continue
+                self._apply_copy_result(item, result)
+                repaired.append(dest)
+                _log(f"修复: {dest}")
+
+        if repaired:
+            new_path = write_meta(meta_path, data, meta_format_of(meta_path))
+            self.get_file_index(meta_dir).update_package(new_path, data)
+            self.get_catalog(meta_dir).update_package(new_path, data)
+            # 更新校验记录
+            self.verify_packages(meta_dir, app_root, full=True, meta_paths=[new_path])
+        if hash_cache:
+            hash_cache.save()
+        return {"repaired": repaired, "failed": failed}
+
+    @traced("scan_orphans", operation=True)
+    def scan_orphans(self, meta_dir, app_root, include_abdata=False, workers=None):
+        """扫描游戏目录中没有任何元数据记录的文件（孤立文件）
+
+        并行遍历 mods/MyMods、UserData/chara/female、DHH_Data（include_abdata 时还有 abdata），
+        与所有元数据记录的路径比较。workers 未指定时读取配置项 orphan_workers（默认 8）。
+        返回按路径排序的 [{"dest", "size", "mtime"}]。
+        """
+        meta_dir = Path(meta_dir)
+        if workers is None:
+            workers = self.config.get("orphan_workers", 8)
+        with ThreadPoolExecutor(max_workers=max(1, int(workers))) as pool:
+            with tracer.span("walk"):
+                files = walk_files(
+                    app_root, managed_roots(include_abdata), pool, exclude=[meta_dir]
+                )
+        referenced = self.get_file_index(meta_dir).referenced_dests()
+        orphans = find_orphans(files, referenced)
+        print(f"[DEBUG] 扫描 {len(files)} 个文件，其中 {len(orphans)} 个没有元数据记录")
+        return orphans
+
+    def _unreferenced_orphans(self, meta_dir, app_root, dests, log_func=None):
+        """重新确认待处理的路径仍是孤立文件，返回 [(相对路径, stat)]
+
+        扫描之后可能有新安装的资源包记录了这些文件，也可能文件已被删除。
+        """
+        index = self.get_file_index(meta_dir)
+        result = []
+        for dest in dests:
+            if not is_managed(dest, include_abdata=True):
+                raise ValueError(f"路径不在资源包目录中: {dest}")
+            if index.is_referenced(dest):
+                if log_func:
+                    log_func(f"跳过（已有元数据记录）: {dest}")
+                continue
+            try:
+                result.append((dest, (Path(app_root) / dest).stat()))
+            except OSError:
+                if log_func:
+                    log_func(f"跳过（文件不存在）: {dest}")
+        return result
+
+    @traced("adopt_orphans", operation=True)
+    def adopt_orphans(self, meta_dir, app_root, dests, name, sid=None, pkg_type=None, log_func=None):
+        """把孤立文件记录为一个新的资源包，之后可以像正常安装的资源包一样校验和卸载
+
+        文件保留在原位置，没有安装来源，因此不能修复。已被其他元数据记录或已不存在的文件会被跳过。
+        返回 {"meta_path": 新元数据文件路径（没有可收编的文件时为 None）, "adopted": [实际收编的路径]}。
+        """
+        app_root = Path(app_root)
+        pkg_type = pkg_type or PackageType.OTHER.value
+        if not sid:
+            sid = self.generate_sid(pkg_type)
+        if self._meta_exists(meta_dir, name, sid):
+            raise FileExistsError(f"资源包 {name} ({sid}) 已存在")
+        orphans = self._unreferenced_orphans(meta_dir, app_root, dests, log_func)
+        if not orphans:
+            return {"meta_path": None, "adopted": []}
+
+        index = self.get_file_index(meta_dir)
+        roots = {os.path.normcase(root) for root in managed_roots(include_abdata=True)}
+        items = []
+        dir_set = set()
+        for dest, st in orphans:
+            mtime = int(st.st_mtime * 1_000_000)
+            items.append(
+                {
+                    "status": "copied",
+                    "source": dest,
+                    "dest": dest,
+                    "mtime": mtime,
+                    "size": st.st_size,
+                    "message": "adopted",
+                    "timestamp": datetime.fromtimestamp(st.st_mtime).isoformat(),
+                }
+            )
+            # 记录管理目录以下、没有被其他资源包引用的上级目录，卸载时清理空目录
+            d = os.path.dirname(dest)
+            while d and os.path.normcase(d) not in roots and not index.is_referenced(d):
+                dir_set.add(d)
+                d = os.path.dirname(d)
+        dirs = [
+            {"dest": d, "timestamp": datetime.now().isoformat()} for d in sorted(dir_set)
+        ]
+        meta_path = self._save_install_meta(
+            meta_dir, name, sid, pkg_type, items, dirs, False, None, None, LINK_COPY
+        )
+        if log_func:
+            log_func(f"已收编 {len(items)} 个文件为资源包 {name} ({sid})")
+        return {"meta_path": meta_path, "adopted": [item["dest"] for item in items]}
+
+    @traced("delete_orphans", operation=True)
+    def delete_orphans(self, meta_dir, app_root, dests, log_func=None, workers=None):
+        """删除孤立文件并清理变空的上级目录（不会越过资源包目录）
+
+        返回 {"removed": 删除的文件数, "failed": [{"dest", "error"}]}。
+        """
+        app_root = Path(app_root)
+        orphans = self._unreferenced_orphans(meta_dir, app_root, dests, log_func)
+        paths = [str(app_root / dest) for dest, _ in orphans]
+        if workers is None:
+            workers = self.config.get("orphan_workers", 8)
+        with ThreadPoolExecutor(max_workers=max(1, int(workers))) as pool:
+            with tracer.span("unlink", files=len(paths)):
+                errors = dict(unlink_files(paths, pool))
+
+        failed = []
+        dir_paths = set()
+        roots = {os.path.normcase(root) for root in managed_roots(include_abdata=True)}
+        for (dest, _), path in zip(orphans, paths):
+            error = errors.get(path)
+            if error is not None:
+                failed.append({"dest": dest, "error": str(error)})
+                if log_func:
+                    log_func(f"删除失败: {dest} ({error})")
+                continue
+            if log_func:
+                log_func(f"已删除: {dest}")
+            d = os.path.dirname(dest)
+            while d and os.path.normcase(d) not in roots:
+                dir_paths.add(str(app_root / d))
+                d = os.path.dirname(d)
+        with tracer.span("prune_dirs", dirs=len(dir_paths)):
+            prune_dirs(dir_paths)
+        return {"removed": len(orphans) - len(failed), "failed": failed}
@@ -0,0 +1,237 @@
+"""资源包元数据文件的读写
+
+支持三种存储格式：
+- json: 带缩进的原始 JSON（默认）
+- compact: 紧凑 JSON，路径存入前缀共享的路径表，时间戳存为整数微秒
+- compact.gz: gzip 压缩的 compact 格式，文件名以 .json.gz 结尾
+
+所有读取元数据的地方都应通过 read_meta()，由它识别格式并还原为原始结构。
+"""
+
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+META_FORMAT_JSON = "json"
+META_FORMAT_COMPACT = "compact"
+META_FORMAT_COMPACT_GZ = "compact.gz"
+META_FORMATS = (META_FORMAT_JSON, META_FORMAT_COMPACT, META_FORMAT_COMPACT_GZ)
+
+# 较长的后缀在前，便于去掉扩展名
+META_SUFFIXES = (".json.gz", ".json")
+COMPACT_MARKER = "hspm-compact/1"
+
+# 以路径表序号存储的字段
+PATH_KEYS = frozenset({"dest", "source"})
+PATH_LIST_KEYS = frozenset({"news"})
+# 以整数微秒存储的时间字段（无时区，相对于 1970-01-01）
+TIME_KEYS = frozenset({"created_at", "timestamp", "delete_attempt_time"})
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def is_meta_file(name):
+    return name.endswith(META_SUFFIXES)
+
+
+def meta_stem(name):
+    """去掉元数据文件扩展名，返回 <name>.<sid>"""
+    for suffix in META_SUFFIXES:
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return name
+
+
+def other_format_paths(path):
+    """同一资源包其他格式的元数据文件路径（不检查是否存在）"""
+    path = Path(path)
+    stem = meta_stem(path.name)
+    return [path.with_name(stem + suffix) for suffix in META_SUFFIXES if stem + suffix != path.name]
+
+
+def meta_filename(name, sid, fmt=META_FORMAT_JSON):
+    suffix = ".json.gz" if fmt == META_FORMAT_COMPACT_GZ else ".json"
+    return f"{name}.{sid}{suffix}"
+
+
+def iter_meta_files(meta_dir):
+    """按文件名顺序列出元数据目录下的所有元数据文件"""
+    meta_dir = Path(meta_dir)
+    if not meta_dir.exists():
+        return []
+    return sorted(p for p in meta_dir.iterdir() if is_meta_file(p.name) and p.is_file())
+
+
+def _encode_time(value):
+    """ISO 时间字符串转为整数微秒；无法无损还原时（带时区、非标准格式）返回原字符串"""
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if dt.tzinfo is not None:
+        return value
+    micros = (dt - _EPOCH) // _MICROSECOND
+    return micros if _decode_time(micros) == value else value
+
+
+def _decode_time(value):
+    return (_EPOCH + timedelta(microseconds=value)).isoformat()
+
+
+class _PathTable:
+    def __init__(self):
+        self.ids = {}
+
+    def intern(self, path):
+        return self.ids.setdefault(path, len(self.ids))
+
+    def front_coded(self):
+        """按字典序排序后的前缀共享编码 [[与上一条相同的前缀长度, 剩余部分], ...]，
+        以及 原序号 -> 排序后序号 的映射"""
+        ordered = sorted(self.ids)
+        remap = {}
+        table = []
+        prev = ""
+        for i, path in enumerate(ordered):
+            shared = len(os.path.commonprefix((prev, path)))
+            table.append([shared, path[shared:]])
+            remap[self.ids[path]] = i
+            prev = path
+        return table, remap
+
+
+def _walk_encode(value, table, key=None):
+    if isinstance(value, dict):
+        return {k: _walk_encode(v, table, k) for k, v in value.items()}
+    if isinstance(value, list):
+        if key in PATH_LIST_KEYS and all(isinstance(v, str) for v in value):
+            return [table.intern(v) for v in value]
+        return [_walk_encode(v, table) for v in value]
+    if key in PATH_KEYS or key in TIME_KEYS:
+        if isinstance(value, int):
+            # 整数已被用作编码后的值，无法区分
+            raise ValueError(f"字段 {key} 的值为整数，无法转换为紧凑格式")
+        if isinstance(value, str):
+            return table.intern(value) if key in PATH_KEYS else _encode_time(value)
+    return value
+
+
+def _walk_remap(value, remap, key=None):
+    """把临时路径序号替换为排序后的路径表序号"""
+    if isinstance(value, dict):
+        return {k: _walk_remap(v, remap, k) for k, v in value.items()}
+    if isinstance(value, list):
+        if key in PATH_LIST_KEYS:
+            return [remap[v] if isinstance(v, int) else v for v in value]
+        return [_walk_remap(v, remap) for v in value]
+    if key in PATH_KEYS and isinstance(value, int):
+        return remap[value]
+    return value
+
+
+def _walk_decode(value, paths, key=None):
+    if isinstance(value, dict):
+        return {k: _walk_decode(v, paths, k) for k, v in value.items()}
+    if isinstance(value, list):
+        if key in PATH_LIST_KEYS:
+            return [paths[v] if isinstance(v, int) else v for v in value]
+        return [_walk_decode(v, paths) for v in value]
+    if isinstance(value, int) and not isinstance(value, bool):
+        if key in PATH_KEYS:
+            return paths[value]
+        if key in TIME_KEYS:
+            return _decode_time(value)
+    return value
+
+
+def encode_compact(data):
+    """把元数据转换为紧凑结构，decode_compact() 可无损还原"""
+    table = _PathTable()
+    body = _walk_encode(data, table)
+    front_coded, remap = table.front_coded()
+    compact = {"format": COMPACT_MARKER, "paths": front_coded}
+    compact.update(_walk_remap(body, remap))
+    return compact
+
+
+def decode_compact(compact):
+    paths = []
+    prev = ""
+    for shared, rest in compact["paths"]:
+        prev = prev[:shared] + rest
+        paths.append(prev)
+    body = {k: v for k, v in compact.items() if k not in ("format", "paths")}
+    return _walk_decode(body, paths)
+
+
+def _is_compact(data):
+    return isinstance(data, dict) and data.get("format") == COMPACT_MARKER
+
+
+def read_meta(path):
+    """读取任意格式的元数据文件，返回原始结构"""
+    path = Path(path)
+    if path.name.endswith(".gz"):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    return decode_compact(data) if _is_compact(data) else data
+
+
+def meta_format_of(path):
+    """根据文件名和文件头判断元数据文件的存储格式"""
+    path = Path(path)
+    if path.name.endswith(".gz"):
+        return META_FORMAT_COMPACT_GZ
+    with open(path, "r", encoding="utf-8") as f:
+        head = f.read(64)
+    return META_FORMAT_COMPACT if COMPACT_MARKER in head else META_FORMAT_JSON
+
+
+def dumps_meta(data, fmt=META_FORMAT_JSON):
+    if fmt == META_FORMAT_JSON:
+        return json.dumps(data, indent=4, ensure_ascii=False)
+    return json.dumps(encode_compact(data), ensure_ascii=False, separators=(",", ":"))
+
+
+def write_meta(path, data, fmt=META_FORMAT_JSON):
+    """以指定格式原子写入元数据，返回实际写入的路径
+
+    path 可以是任意格式的现有文件路径，扩展名会按 fmt 调整；
+    同一资源包其他格式的文件（包括 path 本身）会被删除，避免同一资源包出现两份元数据。
+    """
+    if fmt not in META_FORMATS:
+        raise ValueError(f"未知的元数据格式: {fmt}")
+    path = Path(path)
+    new_path = path.with_name(
+        meta_stem(path.name) + (".json.gz" if fmt == META_FORMAT_COMPACT_GZ else ".json")
+    )
+    text = dumps_meta(data, fmt)
+    tmp_path = new_path.with_name(new_path.name + ".tmp")
+    if fmt == META_FORMAT_COMPACT_GZ:
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, new_path)
+    for other in other_format_paths(new_path):
+        try:
+            other.unlink()
+        except FileNotFoundError:
+            pass
+    return new_path
+
+
+def export_meta(path, export_dir):
+    """把元数据导出为带缩进的 JSON（用于查看），返回导出文件路径"""
+    path = Path(path)
+    export_dir = Path(export_dir)
+    export_dir.mkdir(parents=True, exist_ok=True)
+    out = export_dir / (meta_stem(path.name) + ".json")
+    out.write_text(dumps_meta(read_meta(path)), encoding="utf-8")
+    return out
@@ -20,3 +20,4 @@ class GUIConfigKey(Enum):
     SHOW_CARD_VIEW = "show_card_view"  # 列表页是否显示人物卡预览
     SHOW_IMPORT_PREVIEW = "show_import_preview"  # 导入页是否显示人物卡预览
     SELECTED_TAB = "selected_tab"  # 上次选中的标签页索引 (0: 导入, 1: 列表)
+    THUMBNAIL_CACHE_MB = "thumbnail_cache_mb"  # 磁盘缩略图缓存上限 (MB)
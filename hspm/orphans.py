@@ -0,0 +1,84 @@
+"""孤立文件扫描：找出游戏目录中没有任何元数据记录的文件
+
+只扫描 get_dest_path 会安装文件的目录。abdata 中大部分是游戏本体文件，
+默认不扫描，需要时显式开启。
+"""
+
+import os
+
+from .trace import tracer
+
+# 资源包文件会被安装到的目录（相对游戏根目录）
+MANAGED_ROOTS = (
+    os.path.join("mods", "MyMods"),
+    os.path.join("UserData", "chara", "female"),
+    "DHH_Data",
+)
+ABDATA_ROOT = "abdata"
+
+
+def managed_roots(include_abdata=False):
+    return MANAGED_ROOTS + (ABDATA_ROOT,) if include_abdata else MANAGED_ROOTS
+
+
+def is_managed(rel_path, include_abdata=False):
+    """路径是否位于扫描范围内"""
+    rel = os.path.normcase(os.path.normpath(rel_path))
+    return any(
+        rel.startswith(os.path.normcase(root) + os.sep)
+        for root in managed_roots(include_abdata)
+    )
+
+
+def _scan_dir(path):
+    """扫描单个目录，返回 ([(路径, 大小, mtime)], [子目录])"""
+    files, subdirs = [], []
+    tracer.count("syscall.scandir")
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file():
+                        st = entry.stat()
+                        files.append((entry.path, st.st_size, int(st.st_mtime * 1_000_000)))
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return files, subdirs
+
+
+def walk_files(app_root, roots, pool=None, exclude=()):
+    """逐层遍历 app_root 下的多个目录，提供线程池时同一层的目录并行扫描
+
+    exclude 中的目录（绝对路径）及其内容会被跳过。
+    返回 {相对路径: (大小, mtime)}。
+    """
+    app_root = os.fspath(app_root)
+    skipped = {os.path.normcase(os.path.abspath(p)) for p in exclude}
+    level = [os.path.join(app_root, root) for root in roots]
+    level = [p for p in level if os.path.isdir(p)]
+    result = {}
+    while level:
+        scans = pool.map(_scan_dir, level) if pool else map(_scan_dir, level)
+        level = []
+        for files, subdirs in scans:
+            for path, size, mtime in files:
+                result[os.path.relpath(path, app_root)] = (size, mtime)
+            level.extend(
+                p for p in subdirs if os.path.normcase(os.path.abspath(p)) not in skipped
+            )
+    return result
+
+
+def find_orphans(files, referenced):
+    """从扫描结果中去掉已被记录的路径（按 normcase 比较），返回按路径排序的
+    [{"dest", "size", "mtime"}]"""
+    known = {os.path.normcase(os.path.normpath(dest)) for dest in referenced}
+    return [
+        {"dest": rel, "size": size, "mtime": mtime}
+        for rel, (size, mtime) in sorted(files.items())
+        if os.path.normcase(rel) not in known
+    ]
@@ -0,0 +1,133 @@
+from pathlib import Path
+
+from .metafile import meta_stem
+from .trace import tracer
+
+# 跳过原因（元数据中的 message）对应的日志说明
+SKIP_REASONS = {
+    "global skip rule": "无目标路径或规则跳过",
+    "same size": "文件已存在且大小相同",
+    "same content": "文件已存在且内容相同",
+    "user chose not to overwrite": "用户选择不覆盖",
+}
+
+
+class InstallPlan:
+    """安装计划：扫描阶段的结果
+
+    items 与 entries 一一对应，按源文件顺序排列：items 为写入元数据的 files 项，
+    entries 为 (源条目, 目标绝对路径)。冲突项在解决之前状态为 "conflict"。
+    dirs 为需要新建的目录（相对游戏根目录，父目录在前）。
+    """
+
+    def __init__(self):
+        self.items = []
+        self.entries = []
+        self.conflicts = []  # {"source", "dest", "old_size", "new_size", "owners"}
+        self.dirs = []
+        self._conflict_items = {}  # dest -> item
+
+    def add(self, item, entry, dest):
+        self.items.append(item)
+        self.entries.append((entry, dest))
+
+    def add_conflict(self, item, entry, dest, old_size, new_size, owners=()):
+        """owners 为记录了该目标文件的其他资源包 [{"package", "modified"}]，
+        为空表示文件不属于任何已安装的资源包"""
+        self.add(item, entry, dest)
+        self.conflicts.append(
+            {
+                "source": item["source"],
+                "dest": item["dest"],
+                "old_size": old_size,
+                "new_size": new_size,
+                "owners": list(owners),
+            }
+        )
+        self._conflict_items[item["dest"]] = item
+
+    def resolve(self, overwrite):
+        """按用户选择解决冲突：overwrite 为需要覆盖的目标相对路径集合"""
+        for dest, item in self._conflict_items.items():
+            if dest in overwrite:
+                item["status"] = "overwritten"
+            else:
+                item["status"] = "skipped"
+                item["message"] = "user chose not to overwrite"
+        self._conflict_items = {}
+
+    def drop_conflicts(self):
+        """没有冲突处理方式时，冲突文件不安装也不记录"""
+        kept = [
+            (item, entry)
+            for item, entry in zip(self.items, self.entries)
+            if item["status"] != "conflict"
+        ]
+        self.items = [item for item, _ in kept]
+        self.entries = [entry for _, entry in kept]
+        self._conflict_items = {}
+
+    def placements(self):
+        """需要复制或覆盖的 (序号, 元数据项, 源条目, 目标路径)，序号为 items 中的位置"""
+        for i, (item, (entry, dest)) in enumerate(zip(self.items, self.entries)):
+            if item["status"] in ("copied", "overwritten"):
+                yield i, item, entry, dest
+
+    def counts(self):
+        counts = {"copied": 0, "overwritten": 0, "skipped": 0, "conflict": 0}
+        for item in self.items:
+            if item["status"] in counts:
+                counts[item["status"]] += 1
+        return counts
+
+    def owner_counts(self):
+        """冲突文件按所属资源包计数 {资源包: 文件数}"""
+        counts = {}
+        for c in self.conflicts:
+            for owner in c["owners"]:
+                counts[owner["package"]] = counts.get(owner["package"], 0) + 1
+        return counts
+
+    def describe(self):
+        counts = self.counts()
+        return (
+            f"复制 {counts['copied']}，覆盖 {counts['overwritten']}，"
+            f"跳过 {counts['skipped']}，新建目录 {len(self.dirs)}"
+        )
+
+
+def missing_dirs(parent, app_root, known):
+    """返回 parent 及其上级中尚不存在、也未计划创建的目录（父目录在前）
+
+    known 为已确认存在或已计划创建的目录集合，会被原地更新，
+    因此同一目录下的大量文件只需检查一次。
+    """
+    app_root = Path(app_root)
+    missing = []
+    d = parent
+    while d != app_root and d not in known:
+        tracer.count("syscall.stat")
+        if d.exists():
+            known.add(d)
+            break
+        missing.append(d)
+        d = d.parent
+    missing.reverse()
+    known.update(missing)
+    return missing
+
+
+def conflict_owners(index, rel_dest, dest_stat, exclude=()):
+    """从文件归属索引中查找记录了冲突文件的资源包
+
+    返回 [{"package": <名称>.<SID>, "modified": 文件在该包安装后是否又被修改}]，
+    只比较索引中的大小和时间戳，不读取元数据。
+    """
+    owners = []
+    current_mtime = int(dest_stat.st_mtime * 1_000_000)
+    for meta_name, size, mtime in index.file_owners(rel_dest, exclude):
+        modified = (size is not None and size != dest_stat.st_size) or (
+            mtime is not None and mtime != current_mtime
+        )
+        owners.append({"package": meta_stem(meta_name), "modified": modified})
+    return owners
@@ -0,0 +1,59 @@
+import queue
+import threading
+
+
+class PreviewLoader:
+    """后台预览加载线程
+
+    只保留最新的一个主请求：选中项变化时旧请求直接被替换，已在执行的旧请求结果
+    会因令牌过期而被界面丢弃。主请求处理完后再依次处理预取请求。
+    load_func 在后台线程执行，不能访问 Tk 控件；结果通过 results 队列交回主循环。
+    """
+
+    def __init__(self, load_func):
+        self._load_func = load_func
+        self._cond = threading.Condition()
+        self._current = None  # (token, key, args)
+        self._prefetch = []  # [(key, args)]
+        self._token = 0
+        self.results = queue.SimpleQueue()  # (token, key, result, is_prefetch)
+        threading.Thread(target=self._run, daemon=True).start()
+
+    @property
+    def token(self):
+        """当前有效的请求令牌"""
+        return self._token
+
+    def request(self, key=None, args=(), prefetch=()):
+        """提交新请求并取消之前未完成的请求，返回新的令牌
+
+        key 为 None 时只提交预取请求；prefetch 为 [(key, args)] 列表。
+        """
+        with self._cond:
+            self._token += 1
+            self._current = (self._token, key, args) if key is not None else None
+            self._prefetch = list(prefetch)
+            self._cond.notify()
+            return self._token
+
+    def cancel(self):
+        self.request()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._current is None and not self._prefetch:
+                    self._cond.wait()
+                if self._current is not None:
+                    token, key, args = self._current
+                    self._current = None
+                    is_prefetch = False
+                else:
+                    key, args = self._prefetch.pop(0)
+                    token = self._token
+                    is_prefetch = True
+            try:
+                result = self._load_func(*args)
+            except Exception as e:
+                result = e
+            self.results.put((token, key, result, is_prefetch))
@@ -0,0 +1,130 @@
+"""安装与卸载的进度汇报：文件数、字节数、吞吐量和预计剩余时间
+
+进度事件为字典：
+{"phase", "files_done", "files_total", "bytes_done", "bytes_total",
+ "rate" (字节/秒), "eta" (秒，无法估计时为 None), "current" (最近处理的文件), "finished"}
+"""
+
+import threading
+import time
+from collections import deque
+
+# 两次进度事件之间的最短间隔（秒），避免频繁回调拖慢复制
+PROGRESS_INTERVAL = 0.1
+# 吞吐量按最近一段时间计算（秒）
+RATE_WINDOW = 3.0
+
+PHASE_INSTALL = "install"
+PHASE_UNINSTALL = "uninstall"
+
+
+class ProgressTracker:
+    """线程安全的进度累计器
+
+    复制线程调用 add_bytes() / file_done()，达到汇报间隔时在当前线程中调用
+    callback(事件)，因此 callback 应尽快返回（界面中只需转交给主线程）。
+    """
+
+    def __init__(self, phase, total_files, total_bytes, callback, interval=PROGRESS_INTERVAL):
+        self.phase = phase
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.callback = callback
+        self.interval = interval
+        self.files_done = 0
+        self.bytes_done = 0
+        self.current = None
+        self._lock = threading.Lock()
+        # 以开始时间作为第一个样本；第一个事件在一个汇报间隔之后发出
+        self._last_emit = time.monotonic()
+        self._samples = deque([(self._last_emit, 0)])  # (时间, 已完成字节数)
+        self._finished = False
+
+    def add_bytes(self, n):
+        """大文件分块复制时，每写入一块调用一次"""
+        with self._lock:
+            self.bytes_done += n
+            event = self._poll()
+        if event:
+            self.callback(event)
+
+    def file_done(self, remaining_bytes=0, current=None):
+        """一个文件处理完成（或失败），remaining_bytes 为尚未通过 add_bytes 汇报的字节数"""
+        with self._lock:
+            self.files_done += 1
+            self.bytes_done += remaining_bytes
+            if current is not None:
+                self.current = current
+            event = self._poll()
+        if event:
+            self.callback(event)
+
+    def finish(self):
+        """发送最终事件（不受汇报间隔限制）"""
+        with self._lock:
+            self._finished = True
+            event = self._snapshot(time.monotonic())
+        self.callback(event)
+
+    def _poll(self):
+        now = time.monotonic()
+        if now - self._last_emit < self.interval:
+            return None
+        return self._snapshot(now)
+
+    def _snapshot(self, now):
+        self._last_emit = now
+        self._samples.append((now, self.bytes_done))
+        while len(self._samples) > 2 and now - self._samples[0][0] > RATE_WINDOW:
+            self._samples.popleft()
+        start_time, start_bytes = self._samples[0]
+        elapsed = now - start_time
+        rate = (self.bytes_done - start_bytes) / elapsed if elapsed > 0 else 0.0
+        remaining = max(self.total_bytes - self.bytes_done, 0)
+        if self._finished or remaining == 0:
+            eta = 0.0
+        else:
+            eta = remaining / rate if rate > 0 else None
+        return {
+            "phase": self.phase,
+            "files_done": self.files_done,
+            "files_total": self.total_files,
+            "bytes_done": self.bytes_done,
+            "bytes_total": self.total_bytes,
+            "rate": rate,
+            "eta": eta,
+            "current": self.current,
+            "finished": self._finished,
+        }
+
+
+def format_size(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def progress_fraction(event):
+    """进度事件的完成比例，按字节计算；没有字节数时按文件数"""
+    if event["bytes_total"]:
+        return min(event["bytes_done"] / event["bytes_total"], 1.0)
+    if event["files_total"]:
+        return event["files_done"] / event["files_total"]
+    return 1.0
+
+
+def format_progress(event):
+    """进度事件的单行说明，例如：120/500 个文件，1.2 GB/3.4 GB，56.1 MB/s，剩余 00:42"""
+    text = (
+        f"{event['files_done']}/{event['files_total']} 个文件，"
+        f"{format_size(event['bytes_done'])}/{format_size(event['bytes_total'])}"
+    )
+    if not event["finished"]:
+        text += f"，{format_size(event['rate'])}/s"
+        if event["eta"] is not None:
+            minutes, seconds = divmod(int(event["eta"]), 60)
+            hours, minutes = divmod(minutes, 60)
+            eta = f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+            text += f"，剩余 {eta}"
+    return text
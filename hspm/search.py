@@ -0,0 +1,66 @@
+# 子串匹配使用的 n-gram 长度，短于该长度的查询直接扫描
+NGRAM_SIZE = 3
+
+
+def _ngrams(text):
+    return {text[i : i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+class PackageSearchIndex:
+    """资源包列表的内存搜索索引
+
+    对名称、SID、类型做不区分大小写的子串匹配（前缀匹配是其特例）：
+    先用 n-gram 倒排表求候选集，再逐个确认，避免每次输入都扫描全部记录。
+    """
+
+    def __init__(self):
+        self._texts = {}  # key -> 各字段小写文本
+        self._ngrams = {}  # n-gram -> {key}
+
+    def __len__(self):
+        return len(self._texts)
+
+    def add(self, key, fields):
+        """添加或更新一条记录，fields 为要检索的字段文本"""
+        texts = tuple(str(f).lower() for f in fields if f)
+        if self._texts.get(key) == texts:
+            return
+        self.remove(key)
+        self._texts[key] = texts
+        for text in texts:
+            for gram in _ngrams(text):
+                self._ngrams.setdefault(gram, set()).add(key)
+
+    def remove(self, key):
+        texts = self._texts.pop(key, None)
+        if texts is None:
+            return
+        for text in texts:
+            for gram in _ngrams(text):
+                keys = self._ngrams.get(gram)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._ngrams[gram]
+
+    def search(self, query):
+        """返回任一字段包含 query 的记录"""
+        query = query.strip().lower()
+        if not query:
+            return set(self._texts)
+        if len(query) < NGRAM_SIZE:
+            candidates = self._texts
+        else:
+            postings = []
+            for gram in _ngrams(query):
+                keys = self._ngrams.get(gram)
+                if not keys:
+                    return set()
+                postings.append(keys)
+            postings.sort(key=len)
+            candidates = set.intersection(*postings)
+        return {
+            key
+            for key in candidates
+            if any(query in text for text in self._texts[key])
+        }
@@ -0,0 +1,261 @@
+import hashlib
+import io
+import os
+import tarfile
+import time
+import zipfile
+from pathlib import Path, PurePosixPath
+
+from .fileops import LINK_COPY, place_file
+from .hashing import CHUNK_SIZE, HASH_DIGEST_SIZE
+from .trace import tracer
+
+ARCHIVE_SUFFIXES = (
+    ".zip",
+    ".tar",
+    ".tar.gz",
+    ".tgz",
+    ".tar.bz2",
+    ".tbz2",
+    ".tar.xz",
+    ".txz",
+)
+
+# 资源包根目录下会被安装的顶层目录（见 PackageManager.get_dest_path）
+PACKAGE_TOP_DIRS = ("mods", "UserData", "abdata", "DHH_Data")
+
+
+def is_archive(path):
+    """判断路径是否为支持的压缩包"""
+    path = Path(path)
+    return path.name.lower().endswith(ARCHIVE_SUFFIXES) and path.is_file()
+
+
+def source_stem(path):
+    """资源包的显示名称：目录名，或去掉压缩包后缀的文件名"""
+    name = Path(path).name
+    lower = name.lower()
+    for suffix in sorted(ARCHIVE_SUFFIXES, key=len, reverse=True):
+        if lower.endswith(suffix):
+            return name[: -len(suffix)]
+    return name
+
+
+def _safe_relpath(member_name):
+    """将压缩包成员名转换为相对路径，拒绝绝对路径与 .. 路径"""
+    parts = PurePosixPath(member_name.replace("\\", "/")).parts
+    if not parts or parts[0] == "/" or ".." in parts or ":" in parts[0]:
+        return None
+    return Path(*parts)
+
+
+def _has_wrapper_dir(relpaths):
+    """判断压缩包是否多包了一层文件夹
+
+    根目录下没有游戏目录，且所有文件都位于同一个顶层目录中时视为多包了一层。
+    """
+    tops = set()
+    for relpath in relpaths:
+        if len(relpath.parts) < 2:
+            return False
+        tops.add(relpath.parts[0])
+        if len(tops) > 1:
+            return False
+    return bool(tops) and not tops & set(PACKAGE_TOP_DIRS)
+
+
+class SourceEntry:
+    """资源包中的一个文件"""
+
+    __slots__ = ("relpath", "size", "mtime", "path", "stat", "member", "digest")
+
+    def __init__(self, relpath, size, mtime, path=None, stat=None, member=None):
+        self.relpath = relpath
+        self.size = size
+        self.mtime = mtime
+        self.path = path  # 目录来源的实际文件路径
+        self.stat = stat
+        self.member = member  # 压缩包来源的成员信息
+        self.digest = None
+
+
+class DirectorySource:
+    """目录形式的资源包"""
+
+    is_archive = False
+    parallel_safe = True
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def entries(self):
+        for path in self.root.rglob("*"):
+            # is_file() 与 stat() 各一次系统调用
+            tracer.count("syscall.stat", 2)
+            if not path.is_file():
+                continue
+            st = path.stat()
+            yield SourceEntry(
+                path.relative_to(self.root), st.st_size, st.st_mtime, path=path, stat=st
+            )
+
+    def open(self, entry):
+        return open(entry.path, "rb")
+
+    def place(self, entry, dest, link_mode=LINK_COPY, progress=None):
+        return place_file(entry.path, dest, link_mode, progress)
+
+    def hash(self, entry, hash_cache):
+        return hash_cache.get(entry.path, entry.stat)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _ArchiveSource(DirectorySource):
+    """压缩包来源的公共逻辑：成员以流的方式直接写入目标路径"""
+
+    is_archive = True
+
+    def _members(self):
+        raise NotImplementedError
+
+    def entries(self):
+        # 常见的打包方式是把整个资源包文件夹压进去，此时去掉这一层公共目录
+        entries = list(self._members())
+        if _has_wrapper_dir(entry.relpath for entry in entries):
+            for entry in entries:
+                entry.relpath = Path(*entry.relpath.parts[1:])
+        return entries
+
+    def place(self, entry, dest, link_mode=LINK_COPY, progress=None):
+        # 压缩包成员无法链接，始终流式复制；顺便计算哈希，避免再次解压
+        if os.path.lexists(dest):
+            os.unlink(dest)
+        h = hashlib.blake2b(digest_size=HASH_DIGEST_SIZE)
+        with self.open(entry) as fsrc, open(dest, "wb") as fdst:
+            while chunk := fsrc.read(CHUNK_SIZE):
+                h.update(chunk)
+                fdst.write(chunk)
+                if progress:
+                    progress(len(chunk))
+        os.utime(dest, (entry.mtime, entry.mtime))
+        entry.digest = h.hexdigest()
+        return LINK_COPY
+
+    def hash(self, entry, hash_cache):
+        if entry.digest is None:
+            h = hashlib.blake2b(digest_size=HASH_DIGEST_SIZE)
+            with self.open(entry) as f:
+                while chunk := f.read(CHUNK_SIZE):
+                    h.update(chunk)
+            entry.digest = h.hexdigest()
+        return entry.digest
+
+    def read_bytes(self, entry):
+        with self.open(entry) as f:
+            return f.read()
+
+
+class ZipSource(_ArchiveSource):
+    """zip 压缩包（读取线程安全，可并行解压）"""
+
+    parallel_safe = True
+
+    def __init__(self, root):
+        super().__init__(root)
+        self._zf = zipfile.ZipFile(self.root)
+
+    @staticmethod
+    def _member_name(info):
+        # 未设置 UTF-8 标志的成员名按 cp437 解码，中文 Windows 打包的通常是 GBK
+        if info.flag_bits & 0x800:
+            return info.filename
+        try:
+            return info.filename.encode("cp437").decode("gbk")
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            return info.filename
+
+    def _members(self):
+        for info in self._zf.infolist():
+            if info.is_dir():
+                continue
+            relpath = _safe_relpath(self._member_name(info))
+            if relpath is None:
+                continue
+            mtime = time.mktime(info.date_time + (0, 0, -1))
+            yield SourceEntry(relpath, info.file_size, mtime, member=info)
+
+    def open(self, entry):
+        return self._zf.open(entry.member)
+
+    def close(self):
+        self._zf.close()
+
+
+class TarSource(_ArchiveSource):
+    """tar 压缩包（流式读取，不支持并行解压）"""
+
+    parallel_safe = False
+
+    def __init__(self, root):
+        super().__init__(root)
+        self._tf = tarfile.open(self.root)
+
+    def _members(self):
+        for member in self._tf:
+            if not member.isfile():
+                continue
+            relpath = _safe_relpath(member.name)
+            if relpath is None:
+                continue
+            yield SourceEntry(relpath, member.size, member.mtime, member=member)
+
+    def open(self, entry):
+        return self._tf.extractfile(entry.member)
+
+    def close(self):
+        self._tf.close()
+
+
+def open_source(path):
+    """根据路径打开资源包来源（目录、zip 或 tar）"""
+    path = Path(path)
+    if is_archive(path):
+        if zipfile.is_zipfile(path):
+            return ZipSource(path)
+        return TarSource(path)
+    return DirectorySource(path)
+
+
+def _card_priority(relpath):
+    # 优先级：female > male > 其他
+    lower = str(relpath).lower()
+    return 0 if "female" in lower else 1 if "male" in lower else 2
+
+
+def find_card_image(source):
+    """在资源包中寻找人物卡 PNG
+
+    目录来源返回文件路径，压缩包来源返回包含图片内容的 BytesIO，未找到时返回 None。
+    """
+    with open_source(source) as src:
+        candidates = [
+            entry
+            for entry in src.entries()
+            if entry.relpath.suffix.lower() == ".png"
+            and "userdata/chara" in entry.relpath.as_posix().lower()
+        ]
+        if not candidates:
+            return None
+        candidates.sort(key=lambda e: _card_priority(e.relpath))
+        entry = candidates[0]
+        if src.is_archive:
+            return io.BytesIO(src.read_bytes(entry))
+        return entry.path
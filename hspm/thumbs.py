@@ -0,0 +1,137 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+# 磁盘缩略图缓存默认上限
+DEFAULT_DISK_LIMIT = 256 * 1024 * 1024
+THUMB_SUFFIX = ".png"
+
+
+class LRUCache:
+    """线程安全的定长 LRU 缓存"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class ThumbnailCache:
+    """人物卡缩略图的磁盘缓存
+
+    缩略图以 (来源路径, mtime, 目标高度) 为键保存为小尺寸 PNG，命中时只需解码缩略图，
+    无需再读取和缩放原始人物卡。总大小超过上限时按最近访问时间淘汰。
+    需要 PIL，调用方负责处理 ImportError。
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_DISK_LIMIT):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None  # 首次写入时统计
+
+    def cache_key(self, key_path, height):
+        st = os.stat(key_path)
+        raw = f"{Path(key_path).resolve()}|{st.st_mtime_ns}|{st.st_size}|{height}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key_path, height, opener):
+        """返回缩放到指定高度的 PIL 图像
+
+        key_path 为决定缓存是否失效的来源文件；opener 在未命中时调用，
+        返回原始图片的文件路径或数据流。
+        """
+        from PIL import Image
+
+        thumb_path = self.cache_dir / (self.cache_key(key_path, height) + THUMB_SUFFIX)
+        if thumb_path.exists():
+            try:
+                img = Image.open(thumb_path)
+                img.load()
+                # 更新访问时间，用于淘汰
+                os.utime(thumb_path)
+                return img
+            except Exception:
+                thumb_path.unlink(missing_ok=True)
+
+        source = opener()
+        img = Image.open(source if hasattr(source, "read") else str(source))
+        w, h = img.size
+        if h != height:
+            img = img.resize((max(1, int(w * height / h)), height), Image.Resampling.LANCZOS)
+        self._store(img, thumb_path)
+        return img
+
+    def _store(self, img, thumb_path):
+        tmp_path = None
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # 多个线程可能同时生成同一张缩略图，临时文件名必须唯一
+            with tempfile.NamedTemporaryFile(
+                dir=self.cache_dir, suffix=".tmp", delete=False
+            ) as f:
+                tmp_path = f.name
+                img.save(f, format="PNG")
+            os.replace(tmp_path, thumb_path)
+            tmp_path = None
+            with self._lock:
+                if self._total_bytes is None:
+                    self._total_bytes = self._scan_size()
+                else:
+                    self._total_bytes += thumb_path.stat().st_size
+                if self._total_bytes > self.max_bytes:
+                    self._evict()
+        except Exception as e:
+            print(f"保存缩略图缓存失败: {e}")
+            if tmp_path:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(THUMB_SUFFIX):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        """删除最久未访问的缩略图，直到总大小降到上限的 80%"""
+        target = self.max_bytes * 0.8
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                pass
+        self._total_bytes = total
@@ -0,0 +1,144 @@
+"""性能跟踪：按阶段计时并统计文件数、字节数和文件系统调用次数
+
+默认关闭，配置项 trace 为 true 时启用。每个顶层操作（安装、卸载等）结束后，
+把期间记录的事件写成 Chrome Trace Event 格式的 JSON，可用 chrome://tracing
+或 Perfetto (ui.perfetto.dev) 打开；各阶段的累计耗时和计数器汇总在 otherData 中。
+只记录顶层操作进行期间的阶段和计数。
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+_NULL_SPAN = nullcontext()
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.out_dir = None
+        self._lock = threading.Lock()
+        self._events = []
+        self._counters = {}
+        self._active = 0  # 正在进行的顶层操作数
+        self._pid = os.getpid()
+
+    def configure(self, enabled, out_dir=None):
+        self.enabled = bool(enabled)
+        self.out_dir = Path(out_dir) if out_dir else None
+
+    def _now(self):
+        return time.perf_counter_ns() // 1000
+
+    def _recording(self):
+        # 只在顶层操作进行中记录；操作之外（如界面刷新列表）的事件没有导出的时机，
+        # 记录下来只会不断累积并混入下一次操作的跟踪
+        return self.enabled and self._active > 0
+
+    def span(self, name, **args):
+        """记录一个阶段的耗时，用法：with tracer.span("plan"): ..."""
+        if not self._recording():
+            return _NULL_SPAN
+        return self._span(name, args)
+
+    @contextmanager
+    def _span(self, name, args):
+        start = self._now()
+        try:
+            yield
+        finally:
+            event = {
+                "name": name,
+                "ph": "X",
+                "ts": start,
+                "dur": self._now() - start,
+                "pid": self._pid,
+                "tid": threading.get_ident(),
+            }
+            if args:
+                event["args"] = args
+            with self._lock:
+                self._events.append(event)
+
+    def count(self, name, n=1):
+        """累加计数器（文件数、字节数、系统调用次数等）"""
+        if not self._recording():
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    @contextmanager
+    def operation(self, name, **args):
+        """顶层操作：最后一个进行中的操作结束时导出并清空记录的事件"""
+        if not self.enabled:
+            yield
+            return
+        with self._lock:
+            self._active += 1
+        try:
+            with self._span(name, args):
+                yield
+        finally:
+            with self._lock:
+                self._active -= 1
+                last = not self._active
+                if last:
+                    events, self._events = self._events, []
+                    counters, self._counters = self._counters, {}
+            if last:
+                self._export(name, events, counters)
+
+    def _export(self, name, events, counters):
+        if self.out_dir is None:
+            return
+        phases = {}
+        for event in events:
+            phase = phases.setdefault(event["name"], {"count": 0, "total_ms": 0.0})
+            phase["count"] += 1
+            phase["total_ms"] += event["dur"] / 1000
+        end = max((e["ts"] + e["dur"] for e in events), default=self._now())
+        counter_events = [
+            {"name": key, "ph": "C", "ts": end, "pid": self._pid, "args": {key: value}}
+            for key, value in sorted(counters.items())
+        ]
+        path = self.out_dir / f"{name}-{datetime.now():%Y%m%d-%H%M%S-%f}.json"
+        try:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "traceEvents": events + counter_events,
+                        "displayTimeUnit": "ms",
+                        "otherData": {"phases": phases, "counters": counters},
+                    },
+                    f,
+                    ensure_ascii=False,
+                )
+            print(f"[DEBUG] 性能跟踪已写入: {path}")
+        except Exception as e:
+            print(f"写入性能跟踪失败: {e}")
+
+
+# 全局跟踪器，由 PackageManager 按配置启用
+tracer = Tracer()
+
+
+def traced(name, operation=False):
+    """把函数调用记录为一个阶段；operation 为 True 时作为顶层操作，结束后导出"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.operation(name) if operation else tracer.span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,128 @@
+"""已安装文件的完整性校验
+
+按元数据记录的大小和时间戳检查每个资源包安装的文件是否仍然存在、是否被修改。
+上次校验的结果和当时每个文件的 (大小, mtime_ns) 保存在 <meta_dir>/.hspm/verify_state.json。
+每次校验都会重新获取所有文件的状态，元数据文件和所有文件的状态都没有变化时
+直接沿用上次的结果，不再查询归属索引或计算哈希。
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+from .index import CACHE_DIR_NAME, is_package_file
+
+VERIFY_STATE_FILE_NAME = "verify_state.json"
+VERIFY_STATE_VERSION = 2
+
+
+def file_signatures(dests, stats):
+    """目标路径 -> [大小, mtime_ns]，不存在的文件为 None；stats 为 stat_files 的结果"""
+    signatures = {}
+    for dest in dests:
+        st = stats.get(dest)
+        signatures[dest] = None if st is None else [st.st_size, st.st_mtime_ns]
+    return signatures
+
+
+def package_files(data):
+    """资源包安装的文件（相对游戏根目录）"""
+    return [item["dest"] for item in data.get("files", []) if is_package_file(item)]
+
+
+def check_file(item, dest_stat, owners=(), current_hash=None):
+    """判断单个文件的状态：intact / missing / modified / replaced
+
+    owners 为记录了该文件的其他资源包 [(元数据文件名, 大小, mtime)]，文件与其中某个
+    记录一致时说明是被该资源包正常覆盖（replaced），返回 (状态, 所属元数据文件名)。
+    current_hash 仅在记录了哈希且时间戳不一致时需要提供。
+    """
+    if dest_stat is None:
+        return "missing", None
+    current_mtime = int(dest_stat.st_mtime * 1_000_000)
+    size = item.get("size")
+    mtime = item.get("mtime")
+    if (size is None or size == dest_stat.st_size) and (
+        mtime is None or mtime == current_mtime
+    ):
+        return "intact", None
+    if item.get("hash") and current_hash == item["hash"]:
+        # 记录了哈希时以内容为准，仅时间戳变化不视为修改
+        return "intact", None
+    for name, owner_size, owner_mtime in owners:
+        if owner_size in (None, dest_stat.st_size) and owner_mtime == current_mtime:
+            return "replaced", name
+    return "modified", None
+
+
+class VerifyState:
+    """上次校验的结果，按元数据文件签名和各文件的 (大小, mtime_ns) 判断是否可以沿用"""
+
+    def __init__(self, meta_dir):
+        self.path = Path(meta_dir) / CACHE_DIR_NAME / VERIFY_STATE_FILE_NAME
+        self._lock = threading.Lock()
+        self.app_root = None
+        self.packages = {}  # 元数据文件名 -> {"meta", "files", "result"}
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == VERIFY_STATE_VERSION:
+                self.app_root = data.get("app_root")
+                self.packages = data.get("packages", {})
+        except Exception as e:
+            print(f"读取校验记录失败，将完整校验: {e}")
+
+    def cached(self, app_root, meta_name, meta_signature):
+        """元数据文件未变化时返回上次的记录 {"files", "result"}，否则返回 None
+
+        调用方还需确认 files 中各文件的状态没有变化才能沿用 result。
+        """
+        if self.app_root != str(app_root):
+            return None
+        entry = self.packages.get(meta_name)
+        if entry is None or entry["meta"] != list(meta_signature):
+            return None
+        return entry
+
+    def update(self, app_root, meta_name, meta_signature, files, result):
+        with self._lock:
+            if self.app_root != str(app_root):
+                self.app_root = str(app_root)
+                self.packages = {}
+            self.packages[meta_name] = {
+                "meta": list(meta_signature),
+                "files": files,
+                "result": result,
+            }
+
+    def prune(self, meta_names):
+        """移除已不存在的资源包"""
+        with self._lock:
+            for name in list(self.packages):
+                if name not in meta_names:
+                    del self.packages[name]
+
+    def save(self):
+        with self._lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_suffix(".tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(
+                        {
+                            "version": VERIFY_STATE_VERSION,
+                            "app_root": self.app_root,
+                            "packages": self.packages,
+                        },
+                        f,
+                        ensure_ascii=False,
+                    )
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"保存校验记录失败: {e}")
@@ -0,0 +1,40 @@
+import pytest
+
+from hspm.manager import PackageManager
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """使用临时用户目录的 PackageManager，不读写用户配置"""
+    home = tmp_path / "home"
+    home.mkdir()
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.setenv("USERPROFILE", str(home))
+    return PackageManager()
+
+
+@pytest.fixture
+def app_root(tmp_path):
+    path = tmp_path / "app"
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def meta_dir(tmp_path):
+    return tmp_path / "meta"
+
+
+@pytest.fixture
+def make_source(tmp_path):
+    """在临时目录中创建资源包目录，files 为 {相对路径: 内容}"""
+
+    def _make(name, files):
+        root = tmp_path / "src" / name
+        for rel, content in files.items():
+            path = root / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content, encoding="utf-8")
+        return root
+
+    return _make
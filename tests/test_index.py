@@ -0,0 +1,103 @@
+import json
+import os
+
+from hspm.catalog import PackageCatalog
+from hspm.index import FileIndex
+
+
+def _meta(name, sid, dests, status="normal"):
+    return {
+        "name": name,
+        "sid": sid,
+        "type": "其他",
+        "status": status,
+        "created_at": "2025-01-01T00:00:00",
+        "news": list(dests),
+        "dirs": [],
+        "files": [
+            {"status": "copied", "source": d, "dest": d, "mtime": 1, "size": 1} for d in dests
+        ],
+    }
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=4), encoding="utf-8")
+    return path
+
+
+def _rewrite_same_signature(path, text):
+    """改写文件内容但保持大小和 mtime 不变"""
+    st = path.stat()
+    assert len(text.encode("utf-8")) == st.st_size
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def test_index_tracks_added_changed_and_removed_meta(meta_dir):
+    meta_dir.mkdir()
+    a = _write(meta_dir / "A.s1.json", _meta("A", "s1", ["abdata/x", "abdata/shared"]))
+    _write(meta_dir / "B.s2.json", _meta("B", "s2", ["abdata/shared"]))
+    index = FileIndex(meta_dir)
+    index.refresh()
+    assert index.owners("abdata/shared") == {"A.s1.json", "B.s2.json"}
+    assert index.overlaps() == {"abdata/shared": ["A.s1.json", "B.s2.json"]}
+    assert index.file_owners("abdata/shared", exclude={"B.s2.json"}) == [("A.s1.json", 1, 1)]
+    assert index.is_referenced("abdata/shared", exclude={"A.s1.json"})
+    assert not index.is_referenced("abdata/x", exclude={"A.s1.json"})
+
+    _write(a, _meta("A", "s1", ["abdata/x", "abdata/y", "abdata/z"]))
+    index.refresh()
+    assert index.owners("abdata/shared") == {"B.s2.json"}
+    assert index.owners("abdata/z") == {"A.s1.json"}
+
+    a.unlink()
+    index.refresh()
+    assert index.owners("abdata/x") == set()
+
+
+def test_persisted_index_reuses_unchanged_entries(meta_dir):
+    meta_dir.mkdir()
+    path = _write(meta_dir / "A.s1.json", _meta("A", "s1", ["abdata/x"]))
+    FileIndex(meta_dir).refresh()
+
+    # 大小和 mtime 不变时不重新解析，持久化的索引直接沿用
+    text = path.read_text(encoding="utf-8")
+    _rewrite_same_signature(path, text.replace("abdata/x", "abdata/q"))
+    index = FileIndex(meta_dir)
+    index.refresh()
+    assert index.owners("abdata/x") == {"A.s1.json"}
+
+    # 大小变化时重新解析
+    _write(path, _meta("A", "s1", ["abdata/longer"]))
+    index = FileIndex(meta_dir)
+    index.refresh()
+    assert index.owners("abdata/x") == set()
+    assert index.owners("abdata/longer") == {"A.s1.json"}
+
+
+def test_catalog_invalidation(meta_dir):
+    meta_dir.mkdir()
+    path = _write(meta_dir / "A.s1.json", _meta("A", "s1", ["abdata/x"]))
+    catalog = PackageCatalog(meta_dir)
+    catalog.refresh()
+    assert [p["name"] for p in catalog.packages()] == ["A"]
+
+    text = path.read_text(encoding="utf-8")
+    _rewrite_same_signature(path, text.replace('"A"', '"Z"'))
+    catalog = PackageCatalog(meta_dir)
+    catalog.refresh()
+    assert [p["name"] for p in catalog.packages()] == ["A"]
+
+    _write(path, _meta("Renamed", "s1", ["abdata/x"]))
+    _write(meta_dir / "B.s2.json", _meta("B", "s2", [], status="dry_run"))
+    catalog = PackageCatalog(meta_dir)
+    catalog.refresh()
+    assert sorted((p["name"], p["status"]) for p in catalog.packages()) == [
+        ("B", "dry_run"),
+        ("Renamed", "normal"),
+    ]
+    assert catalog.find_by_sid("s1")["name"] == "Renamed"
+
+    path.unlink()
+    catalog.refresh()
+    assert [p["name"] for p in catalog.packages()] == ["B"]
@@ -0,0 +1,112 @@
+import os
+
+from hspm.metafile import read_meta
+from hspm.models import PackageType
+from hspm.sources import open_source
+
+OTHER = PackageType.OTHER.value
+
+
+def _install(manager, source, name, sid, app_root, meta_dir, **kwargs):
+    return manager.install(source, name, sid, OTHER, app_root, meta_dir, **kwargs)
+
+
+def _statuses(plan):
+    return {item["source"]: (item["status"], item.get("message")) for item in plan.items}
+
+
+def test_install_delete_round_trip_keeps_shared_files(manager, app_root, meta_dir, make_source):
+    a = make_source("A", {"abdata/a.zipmod": "aaa", "abdata/shared/s.zipmod": "ss"})
+    b = make_source("B", {"abdata/b.zipmod": "b", "abdata/shared/s.zipmod": "ss"})
+    assert _install(manager, a, "A", "s1", app_root, meta_dir)["copied"] == 2
+    result = _install(manager, b, "B", "s2", app_root, meta_dir)
+    assert (result["copied"], result["skipped"]) == (1, 1)
+
+    shared = app_root / "abdata" / "shared" / "s.zipmod"
+    success, _ = manager.delete_package(meta_dir / "A.s1.json", app_root)
+    assert success
+    assert not (app_root / "abdata" / "a.zipmod").exists()
+    # B 也记录了该文件（大小相同而跳过），卸载 A 时必须保留
+    assert shared.read_text() == "ss"
+
+    success, _ = manager.delete_package(meta_dir / "B.s2.json", app_root)
+    assert success
+    assert not shared.exists()
+    assert manager.get_package_list(meta_dir) == []
+
+
+def test_install_records_actual_dest_stat(manager, app_root, meta_dir, make_source):
+    src = make_source("A", {"abdata/a.zipmod": "aaa"})
+    _install(manager, src, "A", "s1", app_root, meta_dir)
+    item = read_meta(meta_dir / "A.s1.json")["files"][0]
+    st = (app_root / item["dest"]).stat()
+    assert item["size"] == st.st_size
+    assert item["mtime"] == int(st.st_mtime * 1_000_000)
+
+
+def test_plan_classifies_entries(manager, app_root, meta_dir, make_source):
+    a = make_source("A", {"abdata/owned.zipmod": "aaa", "abdata/edited.zipmod": "eee"})
+    _install(manager, a, "A", "s1", app_root, meta_dir)
+    (app_root / "abdata" / "foreign.zipmod").write_text("foreign")
+    edited = app_root / "abdata" / "edited.zipmod"
+    edited.write_text("changed!")
+
+    b = make_source(
+        "B",
+        {
+            "abdata/new.zipmod": "n",
+            "abdata/owned.zipmod": "bbb",  # 大小相同
+            "abdata/edited.zipmod": "bbb",  # 与 A 安装后又被修改的文件冲突
+            "abdata/foreign.zipmod": "x",  # 与不属于任何资源包的文件冲突
+            "abdata/chara/thumb/t.png": "t",  # 规则跳过
+        },
+    )
+    index = manager.get_file_index(meta_dir)
+    with open_source(b) as src:
+        plan = manager.plan_install(src, "B", "s2", OTHER, app_root, index=index)
+
+    statuses = _statuses(plan)
+    assert statuses[os.path.join("abdata", "new.zipmod")] == ("copied", None)
+    assert statuses[os.path.join("abdata", "owned.zipmod")] == ("skipped", "same size")
+    assert statuses[os.path.join("abdata", "chara", "thumb", "t.png")] == (
+        "skipped",
+        "global skip rule",
+    )
+    owners = {c["dest"]: c["owners"] for c in plan.conflicts}
+    assert owners == {
+        os.path.join("abdata", "edited.zipmod"): [{"package": "A.s1", "modified": True}],
+        os.path.join("abdata", "foreign.zipmod"): [],
+    }
+    assert plan.counts() == {"copied": 1, "overwritten": 0, "skipped": 2, "conflict": 2}
+
+
+def test_plan_hash_mode_compares_content(manager, app_root, meta_dir, make_source):
+    a = make_source("A", {"abdata/same.zipmod": "abc", "abdata/diff.zipmod": "abc"})
+    _install(manager, a, "A", "s1", app_root, meta_dir)
+    b = make_source("B", {"abdata/same.zipmod": "abc", "abdata/diff.zipmod": "xyz"})
+    hash_cache = manager.get_hash_cache()
+    index = manager.get_file_index(meta_dir)
+    with open_source(b) as src:
+        plan = manager.plan_install(src, "B", "s2", OTHER, app_root, hash_cache, index)
+    statuses = _statuses(plan)
+    assert statuses[os.path.join("abdata", "same.zipmod")] == ("skipped", "same content")
+    assert statuses[os.path.join("abdata", "diff.zipmod")] == ("conflict", None)
+    assert plan.conflicts[0]["owners"] == [{"package": "A.s1", "modified": False}]
+
+
+def test_resolve_func_overwrites_selected_conflicts(manager, app_root, meta_dir, make_source):
+    (app_root / "abdata").mkdir()
+    (app_root / "abdata" / "keep.zipmod").write_text("old")
+    (app_root / "abdata" / "take.zipmod").write_text("old")
+    src = make_source("A", {"abdata/keep.zipmod": "new!", "abdata/take.zipmod": "new!"})
+    take = os.path.join("abdata", "take.zipmod")
+    result = _install(manager, src, "A", "s1", app_root, meta_dir, resolve_func=lambda c: {take})
+    assert (result["overwritten"], result["conflicts"]) == (1, 2)
+    assert (app_root / "abdata" / "keep.zipmod").read_text() == "old"
+    assert (app_root / "abdata" / "take.zipmod").read_text() == "new!"
+
+    assert manager.delete_package(meta_dir / "A.s1.json", app_root)[0]
+    assert not (meta_dir / "A.s1.json").exists()
+    assert not (app_root / "abdata" / "take.zipmod").exists()
+    # 用户选择不覆盖的文件不属于该资源包，卸载时原样保留
+    assert (app_root / "abdata" / "keep.zipmod").read_text() == "old"
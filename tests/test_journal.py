@@ -0,0 +1,103 @@
+from pathlib import Path
+
+import pytest
+
+from hspm.journal import InstallJournal, list_journals, load_journal
+from hspm.metafile import read_meta
+from hspm.models import PackageType
+
+FILES = 10
+
+
+@pytest.fixture
+def interrupted(manager, app_root, meta_dir, make_source, monkeypatch):
+    """所有文件放置完成、元数据写入前中断的安装，返回安装日志路径"""
+    source = make_source(
+        "P", {f"abdata/d{i % 3}/f{i}.zipmod": "x" * (i + 1) for i in range(FILES)}
+    )
+    # 一个已存在的文件会被覆盖
+    (app_root / "abdata" / "d0").mkdir(parents=True)
+    (app_root / "abdata" / "d0" / "f0.zipmod").write_text("old content")
+
+    def crash(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    with monkeypatch.context() as m:
+        m.setattr(manager, "_save_install_meta", crash)
+        with pytest.raises(KeyboardInterrupt):
+            manager.install(
+                source,
+                "P",
+                "S",
+                PackageType.OTHER.value,
+                app_root,
+                meta_dir,
+                resolve_func=lambda conflicts: {c["dest"] for c in conflicts},
+            )
+    journals = list_journals(meta_dir)
+    assert len(journals) == 1
+    return journals[0]
+
+
+def _truncate(journal, keep):
+    """只保留计划和前 keep 条完成记录，并追加半行，模拟写入中途退出"""
+    lines = journal.read_text(encoding="utf-8").splitlines(keepends=True)
+    journal.write_text("".join(lines[: 1 + keep]) + lines[1 + keep][:5], encoding="utf-8")
+
+
+@pytest.mark.parametrize("keep", [0, 4, FILES - 1])
+def test_resume_truncated_journal(manager, app_root, meta_dir, interrupted, keep):
+    _truncate(interrupted, keep)
+    header, done = load_journal(interrupted)
+    assert len(done) == keep
+
+    placed = []
+    original = manager._place_file
+
+    def counting(src, entry, dest, *args, **kwargs):
+        placed.append(dest)
+        return original(src, entry, dest, *args, **kwargs)
+
+    manager._place_file = counting
+    result = manager.resume_install(interrupted)
+    assert len(placed) == FILES - keep
+    assert (result["copied"], result["overwritten"], result["failed"]) == (FILES - 1, 1, [])
+
+    assert list_journals(meta_dir) == []
+    data = read_meta(meta_dir / "P.S.json")
+    assert len(data["files"]) == FILES
+    for item in data["files"]:
+        st = (app_root / item["dest"]).stat()
+        assert (item["size"], item["mtime"]) == (st.st_size, int(st.st_mtime * 1_000_000))
+    assert manager.pending_installs(meta_dir) == []
+
+
+def test_rollback_removes_copied_files(manager, app_root, meta_dir, interrupted):
+    _truncate(interrupted, 4)
+    result = manager.rollback_install(interrupted)
+    assert result["removed"] == FILES - 1
+    assert result["failed"] == []
+    # 已覆盖的文件无法恢复，保留在原处
+    overwritten = app_root / "abdata" / "d0" / "f0.zipmod"
+    assert overwritten.exists()
+    assert sorted(p.relative_to(app_root) for p in app_root.rglob("*")) == [
+        Path("abdata"),
+        Path("abdata", "d0"),
+        Path("abdata", "d0", "f0.zipmod"),
+    ]
+    assert list_journals(meta_dir) == []
+    assert not (meta_dir / "P.S.json").exists()
+
+
+def test_new_install_refuses_interrupted_journal(manager, app_root, meta_dir, interrupted):
+    _truncate(interrupted, 4)
+    before = interrupted.read_bytes()
+    with pytest.raises(FileExistsError):
+        manager.install(
+            app_root.parent / "src" / "P", "P", "S", PackageType.OTHER.value, app_root, meta_dir
+        )
+    with pytest.raises(FileExistsError):
+        InstallJournal(interrupted, header={"name": "P", "sid": "S"})
+    # 日志保持原样，仍可继续安装
+    assert interrupted.read_bytes() == before
+    assert manager.resume_install(interrupted)["failed"] == []
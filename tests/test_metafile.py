@@ -0,0 +1,94 @@
+import copy
+
+from hspm.metafile import (
+    META_FORMAT_COMPACT,
+    META_FORMAT_COMPACT_GZ,
+    META_FORMAT_JSON,
+    decode_compact,
+    encode_compact,
+    read_meta,
+    write_meta,
+)
+
+SAMPLE = {
+    "name": "霜雪",
+    "sid": "HS2ChaF_20251105165109590",
+    "type": "人物卡",
+    "status": "normal",
+    "source_path": None,
+    "created_at": "2025-11-05T16:51:09.590123",
+    "news": ["mods/MyMods/x/a.zipmod"],
+    "dirs": [{"dest": "mods/MyMods/x", "timestamp": "2025-11-05T16:51:09"}],
+    "files": [
+        {
+            "status": "copied",
+            "source": "mods/a.zipmod",
+            "dest": "mods/MyMods/x/a.zipmod",
+            "mtime": 1730796669590123,
+            "size": 12,
+            "timestamp": "2025-11-05T16:51:09.590123",
+        },
+        {
+            "status": "copied",
+            "source": "mods/ab.zipmod",
+            "dest": "mods/MyMods/x/ab.zipmod",
+            "mtime": 1730796669590124,
+            "size": 3,
+            "timestamp": "2025-11-05T16:51:09+08:00",
+        },
+        {
+            "status": "skipped",
+            "source": "abdata/chara/thumb/t.png",
+            "dest": None,
+            "message": "global skip rule",
+            "timestamp": "not a date",
+        },
+    ],
+}
+
+
+def test_compact_round_trip_is_lossless():
+    data = copy.deepcopy(SAMPLE)
+    assert decode_compact(encode_compact(data)) == SAMPLE
+    # 编码不能修改输入
+    assert data == SAMPLE
+
+
+def test_front_coding_shares_prefixes():
+    compact = encode_compact(SAMPLE)
+    paths = compact["paths"]
+    assert paths[0][0] == 0
+    assert any(shared > 0 for shared, _ in paths[1:])
+
+
+def test_write_read_every_format(tmp_path):
+    for fmt in (META_FORMAT_JSON, META_FORMAT_COMPACT, META_FORMAT_COMPACT_GZ):
+        path = write_meta(tmp_path / "霜雪.sid.json", SAMPLE, fmt)
+        assert read_meta(path) == SAMPLE
+
+
+def test_write_removes_other_format_sibling(tmp_path):
+    write_meta(tmp_path / "A.s1.json", SAMPLE, META_FORMAT_JSON)
+    path = write_meta(tmp_path / "A.s1.json", SAMPLE, META_FORMAT_COMPACT_GZ)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [path.name]
+    path = write_meta(tmp_path / "A.s1.json", SAMPLE, META_FORMAT_JSON)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["A.s1.json"]
+
+
+def test_migrate_metadata_round_trip(manager, meta_dir):
+    meta_dir.mkdir()
+    originals = {}
+    for i in range(3):
+        data = dict(copy.deepcopy(SAMPLE), name=f"P{i}", sid=f"S{i}")
+        write_meta(meta_dir / f"P{i}.S{i}.json", data)
+        originals[f"P{i}.S{i}"] = data
+
+    summary = manager.migrate_metadata(meta_dir, META_FORMAT_COMPACT_GZ, log_func=lambda m: None)
+    assert summary == {"converted": 3, "unchanged": 0, "failed": []}
+    summary = manager.migrate_metadata(meta_dir, META_FORMAT_JSON, log_func=lambda m: None)
+    assert summary["converted"] == 3
+
+    files = sorted(p for p in meta_dir.iterdir() if p.is_file())
+    assert [p.name for p in files] == [f"{stem}.json" for stem in sorted(originals)]
+    for path in files:
+        assert read_meta(path) == originals[path.name[: -len(".json")]]
@@ -0,0 +1,65 @@
+import tarfile
+import zipfile
+
+import pytest
+
+from hspm.models import PackageType
+from hspm.sources import open_source
+
+OTHER = PackageType.OTHER.value
+
+
+def _zip(path, files):
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+    return path
+
+
+def _tar(path, files):
+    src = path.parent / "tar_src"
+    with tarfile.open(path, "w:gz") as tf:
+        for name, content in files.items():
+            file = src / name
+            file.parent.mkdir(parents=True, exist_ok=True)
+            file.write_text(content, encoding="utf-8")
+            tf.add(file, arcname=name)
+    return path
+
+
+def _relpaths(archive):
+    with open_source(archive) as src:
+        return sorted(entry.relpath.as_posix() for entry in src.entries())
+
+
+@pytest.mark.parametrize("make, suffix", [(_zip, ".zip"), (_tar, ".tar.gz")])
+def test_archive_wrapper_dir_is_stripped(tmp_path, make, suffix):
+    archive = make(
+        tmp_path / f"Pkg{suffix}",
+        {"Pkg/abdata/a.zipmod": "a", "Pkg/mods/m.zipmod": "m"},
+    )
+    assert _relpaths(archive) == ["abdata/a.zipmod", "mods/m.zipmod"]
+
+
+def test_archive_layout_is_kept_without_single_wrapper(tmp_path):
+    # 根目录下已有游戏目录
+    archive = _zip(tmp_path / "A.zip", {"abdata/a.zipmod": "a", "abdata/b.zipmod": "b"})
+    assert _relpaths(archive) == ["abdata/a.zipmod", "abdata/b.zipmod"]
+    # 多个顶层目录或根目录下有文件时无法判断，保持原样
+    archive = _zip(tmp_path / "B.zip", {"x/abdata/a.zipmod": "a", "readme.txt": "r"})
+    assert _relpaths(archive) == ["readme.txt", "x/abdata/a.zipmod"]
+
+
+def test_install_wrapped_archive(manager, app_root, meta_dir, tmp_path):
+    archive = _zip(tmp_path / "Pkg.zip", {"Pkg/abdata/a.zipmod": "aaa"})
+    result = manager.install(archive, "Pkg", "s1", OTHER, app_root, meta_dir)
+    assert result["copied"] == 1
+    assert (app_root / "abdata" / "a.zipmod").read_text() == "aaa"
+
+
+def test_install_fails_when_nothing_maps(manager, app_root, meta_dir, tmp_path):
+    archive = _zip(tmp_path / "Pkg.zip", {"a/x.zipmod": "x", "b/y.zipmod": "y"})
+    with pytest.raises(ValueError):
+        manager.install(archive, "Pkg", "s1", OTHER, app_root, meta_dir)
+    assert not any(meta_dir.glob("Pkg.*"))
+    assert not any(app_root.iterdir())